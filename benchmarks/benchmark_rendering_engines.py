@@ -0,0 +1,105 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the throughput of the "jinja", "direct" and "fragment" rendering
+engines on the bundled templates.
+
+Each template with a transaction loop is rendered with the rows of its
+bundled sample CSV file, repeated up to the requested number of
+transactions. Run it from the root of the repository:
+
+    python benchmarks/benchmark_rendering_engines.py --transactions 20000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pain001.constants.constants import valid_xml_types  # noqa: E402
+from pain001.csv.load_csv_data import load_csv_data  # noqa: E402
+from pain001.xml.template_registry import TemplateRegistry  # noqa: E402
+
+
+def build_context(message_type, transactions):
+    """Builds the template variables of a message with many transactions."""
+    rows = load_csv_data(f"pain001/templates/{message_type}/template.csv")
+    rows = (rows * (transactions // len(rows) + 1))[:transactions]
+    return {**rows[0], "transactions": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    registry = TemplateRegistry(bytecode_cache_directory=None)
+    print(
+        f"{'message type':<16} {'jinja tx/s':>12} {'direct tx/s':>12} "
+        f"{'fragment tx/s':>14} {'speedup':>8}"
+    )
+    for message_type in valid_xml_types:
+        template_path = f"pain001/templates/{message_type}/template.xml"
+        if not os.path.isfile(template_path):
+            continue
+        with open(template_path, encoding="utf-8") as template_file:
+            if "{% for" not in template_file.read():
+                print(f"{message_type:<16} single transaction template")
+                continue
+        context = build_context(message_type, arguments.transactions)
+        template = registry.get_template(template_path)
+        writer = registry.get_byte_writer(template_path)
+        fragment_writer = registry.get_fragment_writer(template_path)
+        expected = template.render(**context).encode("utf-8")
+        assert writer.render(context) == expected and (
+            fragment_writer.render(context) == expected
+        ), f"{message_type}: the engines disagree"
+
+        jinja_time = min(
+            timeit.repeat(
+                lambda: template.render(**context).encode("utf-8"),
+                number=1,
+                repeat=arguments.repeat,
+            )
+        )
+        direct_time = min(
+            timeit.repeat(
+                lambda: writer.render(context),
+                number=1,
+                repeat=arguments.repeat,
+            )
+        )
+        fragment_time = min(
+            timeit.repeat(
+                lambda: fragment_writer.render(context),
+                number=1,
+                repeat=arguments.repeat,
+            )
+        )
+        print(
+            f"{message_type:<16} "
+            f"{arguments.transactions / jinja_time:>12,.0f} "
+            f"{arguments.transactions / direct_time:>12,.0f} "
+            f"{arguments.transactions / fragment_time:>14,.0f} "
+            f"{jinja_time / min(direct_time, fragment_time):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 # Other imports remain the same
 import click
+import json
 import os
 import sys
-from pain001.constants.constants import valid_xml_types
+from pain001.constants.constants import (
+    valid_rendering_engines,
+    valid_xml_types,
+)
 from pain001.context.context import Context
 from pain001.core.core import process_files
+from pain001.db.load_db_data import parse_db_filters
+from pain001.xml.validate_files_via_xsd import validate_files_via_xsd
 from rich.console import Console
 from rich.table import Table
 from rich import box
@@ -22,11 +28,44 @@ table = Table(box=box.ROUNDED, safe_box=True, show_header=False, title=title)
 table.add_column(justify="center", no_wrap=False, vertical="middle")
 table.add_row(description)
 table.width = 80
-console.print(table)
 
 
-@click.command(
+class DefaultCommandGroup(click.Group):
+    """A click group that runs its default command when the first argument
+    is not the name of one of its subcommands.
+
+    This keeps `python -m pain001 -t ... -m ... -s ... -d ...` working while
+    allowing subcommands such as `python -m pain001 validate ...`. The help
+    options of the group are not forwarded, so `python -m pain001 --help`
+    lists the subcommands.
+    """
+
+    def __init__(self, *args, default_command=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if not args or (
+            args[0] not in self.commands
+            and args[0] not in ctx.help_option_names
+        ):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(
+    cls=DefaultCommandGroup,
+    default_command="generate",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+def cli():
+    pass
+
+
+@cli.command(
+    name="generate",
     help=("To use Pain001, you must specify the following options:\n\n"),
+    short_help="Generate a pain.001 file from a CSV or SQLite data file.",
     context_settings=dict(help_option_names=["-h", "--help"]),
 )
 @click.option(
@@ -56,17 +95,126 @@ console.print(table)
     type=click.Path(),
     help="Path to data file (CSV or SQLite) (required)",
 )
-def cli(
+@click.option(
+    "--cache/--no_cache",
+    "use_cache",
+    default=True,
+    show_default=True,
+    help="Reuse cached XSD validation results of unchanged files",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="Stream the generated XML to disk instead of building it in memory",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(valid_rendering_engines),
+    default="jinja",
+    show_default=True,
+    help="Engine rendering the XML template",
+)
+@click.option(
+    "--max_transactions",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Split the batch into files of at most this many transactions",
+)
+@click.option(
+    "--max_bytes",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Split the batch into files of at most this many bytes",
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of processes generating split files (default: CPUs)",
+)
+@click.option(
+    "--single_pass",
+    is_flag=True,
+    default=False,
+    help="Compute NbOfTxs and control sums while streaming the XML",
+)
+@click.option(
+    "--group_payments",
+    is_flag=True,
+    default=False,
+    help="Write a PmtInf block per debtor account, date and charge bearer",
+)
+@click.option(
+    "--max_rows_in_memory",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of grouped rows held in memory before spilling to disk",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Write the XML without indentation between tags",
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    metavar="COLUMN=VALUE",
+    help=(
+        "Only load the SQLite rows matching COLUMN=VALUE, or "
+        "COLUMN=START..END for a range (repeatable)"
+    ),
+)
+@click.option(
+    "--csv_workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of processes parsing and validating the CSV file",
+)
+def generate(
     xml_message_type,
     xml_template_file_path,
     xsd_schema_file_path,
     data_file_path,
+    use_cache,
+    stream,
+    engine,
+    max_transactions,
+    max_bytes,
+    workers,
+    single_pass,
+    group_payments,
+    max_rows_in_memory,
+    compact,
+    filters,
+    csv_workers,
 ):
+    console.print(table)
+    try:
+        db_filters = parse_db_filters(filters)
+    except ValueError as e:
+        console.print(f"Error: {e}")
+        sys.exit(1)
     main(
         xml_message_type,
         xml_template_file_path,
         xsd_schema_file_path,
         data_file_path,
+        use_validation_cache=use_cache,
+        streaming=stream,
+        engine=engine,
+        max_transactions=max_transactions,
+        max_bytes=max_bytes,
+        max_workers=workers,
+        single_pass=single_pass,
+        group_payments=group_payments,
+        max_rows_in_memory=max_rows_in_memory,
+        compact=compact,
+        db_filters=db_filters,
+        csv_workers=csv_workers,
     )
 
 
@@ -75,6 +223,18 @@ def main(
     xml_template_file_path,
     xsd_schema_file_path,
     data_file_path,
+    use_validation_cache=False,
+    streaming=False,
+    engine="jinja",
+    max_transactions=None,
+    max_bytes=None,
+    max_workers=None,
+    single_pass=False,
+    group_payments=False,
+    max_rows_in_memory=None,
+    compact=False,
+    db_filters=None,
+    csv_workers=None,
 ):
     try:
         # Check that the required arguments are provided
@@ -142,12 +302,112 @@ def main(
             xml_template_file_path,
             xsd_schema_file_path,
             data_file_path,
+            use_validation_cache=use_validation_cache,
+            streaming=streaming,
+            engine=engine,
+            max_transactions=max_transactions,
+            max_bytes=max_bytes,
+            max_workers=max_workers,
+            single_pass=single_pass,
+            group_payments=group_payments,
+            max_rows_in_memory=max_rows_in_memory,
+            compact=compact,
+            db_filters=db_filters,
+            csv_workers=csv_workers,
         )
     except Exception as e:
         console.print(f"An error occurred: {e}")
         sys.exit(1)
 
 
+@cli.command(
+    name="validate",
+    help=(
+        "Validate existing pain.001 files, or directories of files, against "
+        "their XSD schemas in parallel.\n\n"
+    ),
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-s",
+    "--xsd_schema_file_path",
+    default=None,
+    type=click.Path(exists=True),
+    help="Path to XSD schema file (default: bundled schema of each file)",
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of worker processes (default: number of CPUs)",
+)
+@click.option(
+    "--max_errors",
+    default=10,
+    type=click.IntRange(min=1),
+    help="Maximum number of errors reported per file",
+)
+@click.option(
+    "--lazy",
+    is_flag=True,
+    help="Stream each file instead of loading it fully into memory",
+)
+@click.option(
+    "--json",
+    "json_lines",
+    is_flag=True,
+    help="Print one JSON object per file instead of a summary table",
+)
+def validate(
+    paths, xsd_schema_file_path, workers, max_errors, lazy, json_lines
+):
+    if not json_lines:
+        console.print(table)
+
+    valid_count = 0
+    invalid_count = 0
+    for result in validate_files_via_xsd(
+        paths,
+        xsd_file_path=xsd_schema_file_path,
+        max_workers=workers,
+        max_errors=max_errors,
+        lazy=lazy,
+    ):
+        if result["is_valid"]:
+            valid_count += 1
+        else:
+            invalid_count += 1
+
+        if json_lines:
+            click.echo(json.dumps(result))
+        elif result["is_valid"]:
+            console.print(f"[green]VALID[/green]   {result['xml_file_path']}")
+        else:
+            console.print(f"[red]INVALID[/red] {result['xml_file_path']}")
+            for error in result["errors"]:
+                location = error["path"] or "document"
+                if error["transaction_index"] is not None:
+                    location += f" (transaction {error['transaction_index']})"
+                console.print(f"    {location}: {error['reason']}")
+
+    if not json_lines:
+        summary = Table(box=box.ROUNDED, title="Validation summary")
+        summary.add_column("Files", justify="right")
+        summary.add_column("Valid", justify="right", style="green")
+        summary.add_column("Invalid", justify="right", style="red")
+        summary.add_row(
+            str(valid_count + invalid_count),
+            str(valid_count),
+            str(invalid_count),
+        )
+        console.print(summary)
+
+    if invalid_count:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     # pylint: disable=no-value-for-parameter
     cli()
@@ -19,9 +19,13 @@ import sys
 import click
 import configparser
 
-from pain001.constants.constants import valid_xml_types
+from pain001.constants.constants import (
+    valid_rendering_engines,
+    valid_xml_types,
+)
 from pain001.context.context import Context
 from pain001.core.core import process_files
+from pain001.db.load_db_data import parse_db_filters
 from pain001.xml.validate_via_xsd import validate_via_xsd
 
 from rich.console import Console
@@ -83,12 +87,103 @@ console.print(table)
     type=click.Path(),
     help="Path to configuration file (optional)",
 )
+@click.option(
+    "--cache/--no_cache",
+    "use_cache",
+    default=True,
+    show_default=True,
+    help="Reuse cached XSD validation results of unchanged files",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="Stream the generated XML to disk instead of building it in memory",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(valid_rendering_engines),
+    default="jinja",
+    show_default=True,
+    help="Engine rendering the XML template",
+)
+@click.option(
+    "--max_transactions",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Split the batch into files of at most this many transactions",
+)
+@click.option(
+    "--max_bytes",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Split the batch into files of at most this many bytes",
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of processes generating split files (default: CPUs)",
+)
+@click.option(
+    "--single_pass",
+    is_flag=True,
+    default=False,
+    help="Compute NbOfTxs and control sums while streaming the XML",
+)
+@click.option(
+    "--group_payments",
+    is_flag=True,
+    default=False,
+    help="Write a PmtInf block per debtor account, date and charge bearer",
+)
+@click.option(
+    "--max_rows_in_memory",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of grouped rows held in memory before spilling to disk",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Write the XML without indentation between tags",
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    metavar="COLUMN=VALUE",
+    help=(
+        "Only load the SQLite rows matching COLUMN=VALUE, or "
+        "COLUMN=START..END for a range (repeatable)"
+    ),
+)
+@click.option(
+    "--csv_workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of processes parsing and validating the CSV file",
+)
 def main(
     xml_message_type,
     xml_template_file_path,
     xsd_schema_file_path,
     data_file_path,
     config_file,
+    use_cache,
+    stream,
+    engine,
+    max_transactions,
+    max_bytes,
+    workers,
+    single_pass,
+    group_payments,
+    max_rows_in_memory,
+    compact,
+    filters,
+    csv_workers,
 ):
     # Expand user-friendly paths
     xml_template_file_path = os.path.expanduser(xml_template_file_path)
@@ -142,17 +237,40 @@ def main(
 
     # Validate XML and XSD schemas
     try:
-        validate_via_xsd(xml_template_file_path, xsd_schema_file_path)
+        validate_via_xsd(
+            xml_template_file_path,
+            xsd_schema_file_path,
+            use_cache=use_cache,
+        )
     except Exception as e:
         logger.error(f"Schema validation failed: {e}")
         print(f"Schema validation failed: {e}")
         sys.exit(1)
 
+    # Parse the conditions on the rows of an SQLite file
+    try:
+        db_filters = parse_db_filters(filters)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     process_files(
         xml_message_type,
         xml_template_file_path,
         xsd_schema_file_path,
         data_file_path,
+        use_validation_cache=use_cache,
+        streaming=stream,
+        engine=engine,
+        max_transactions=max_transactions,
+        max_bytes=max_bytes,
+        max_workers=workers,
+        single_pass=single_pass,
+        group_payments=group_payments,
+        max_rows_in_memory=max_rows_in_memory,
+        compact=compact,
+        db_filters=db_filters,
+        csv_workers=csv_workers,
     )
 
 
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 # Defines the valid XML types for the ISO 20022 Payment Initiation
 # message types that are supported by the pain001 library.
 valid_xml_types = [
@@ -26,3 +28,19 @@ valid_xml_types = [
     "pain.001.001.10"  # Notification of Amendment (pain.001.001.10)
     "pain.001.001.11",  # Request for Cancellation (pain.001.001.11)
 ]
+
+# Defines the engines that can render the XML templates: "jinja" evaluates
+# them with Jinja2, "direct" writes them with the `XmlByteWriter`, and
+# "fragment" writes them with the `XmlFragmentWriter`.
+valid_rendering_engines = ["jinja", "direct", "fragment"]
+
+# Defines the directory holding the XML templates and XSD schemas bundled
+# with the pain001 library.
+TEMPLATES_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"
+)
+
+# Defines the depth of the CdtTrfTxInf elements (Document/CstmrCdtTrfInitn/
+# PmtInf/CdtTrfTxInf) at which lazy XSD validation prunes the subtrees it has
+# already validated.
+LAZY_VALIDATION_DEPTH = 3
@@ -21,12 +21,21 @@ import os
 # Import the pain001 library functions
 from pain001.constants.constants import valid_xml_types
 from pain001.context.context import Context
-from pain001.csv.load_csv_data import load_csv_data
-from pain001.csv.validate_csv_data import validate_csv_data
-from pain001.db.load_db_data import load_db_data
-from pain001.db.validate_db_data import validate_db_data
+from pain001.csv.load_csv_data import iter_csv_data, load_csv_data
+from pain001.csv.load_csv_data_parallel import iter_csv_data_parallel
+from pain001.csv.validate_csv_data import (
+    iter_validated_csv_data,
+    validate_csv_data,
+)
+from pain001.db.load_db_data import iter_db_data, load_db_data
+from pain001.db.validate_db_data import (
+    REQUIRED_COLUMNS,
+    iter_validated_db_data,
+    validate_db_data,
+)
 from pain001.xml.register_namespaces import register_namespaces
 from pain001.xml.generate_xml import generate_xml
+from pain001.xml.message_field_specs import get_required_columns
 
 
 def process_files(
@@ -34,6 +43,18 @@ def process_files(
     xml_template_file_path,
     xsd_schema_file_path,
     data_file_path,
+    use_validation_cache=False,
+    streaming=False,
+    engine="jinja",
+    max_transactions=None,
+    max_bytes=None,
+    max_workers=None,
+    single_pass=False,
+    group_payments=False,
+    max_rows_in_memory=None,
+    compact=False,
+    db_filters=None,
+    csv_workers=None,
 ):
     """
     This function generates an ISO 20022 payment message from a CSV or SQLite
@@ -47,6 +68,33 @@ def process_files(
         xsd_schema_file_path (str): The path of the XSD schema file.
         data_file_path (str): The path of the CSV or SQLite file containing the
         payment data.
+        use_validation_cache (bool): Reuse cached XSD validation outcomes of
+        unchanged output, see `ValidationResultCache`. Off by default, the
+        command line turns it on.
+        streaming (bool): Stream the rendered XML to the file instead of
+        building the whole document in memory, see `generate_xml`.
+        engine (str): The rendering engine, "jinja", "direct" or "fragment",
+        see `generate_xml`.
+        max_transactions (int): Split the batch into files of at most this
+        number of transactions, see `generate_xml_shards`.
+        max_bytes (int): Split the batch into files of at most this size in
+        bytes.
+        max_workers (int): The number of processes generating the files of
+        a split batch.
+        single_pass (bool): Compute the number of transactions and control
+        sums of the header while streaming the file, see
+        `generate_xml_single_pass`.
+        group_payments (bool): Write a payment information block per
+        debtor account, requested execution date and charge bearer, see
+        `generate_xml_grouped`.
+        max_rows_in_memory (int): The number of grouped rows held in memory
+        before they are spilled to disk.
+        compact (bool): Write the file without whitespace between its tags.
+        db_filters (dict): The conditions on the rows loaded from an SQLite
+        file, such as a batch identifier or an execution date range, see
+        `build_select_query`.
+        csv_workers (int): Parse and validate ranges of a CSV file in this
+        number of processes, see `iter_csv_data_parallel`.
 
     Returns:
         None
@@ -56,6 +104,9 @@ def process_files(
         FileNotFoundError: If the XML template file does not exist.
         FileNotFoundError: If the XSD schema file does not exist.
         FileNotFoundError: If the Data file does not exist.
+        ValueError: If the data file is empty or holds an invalid row. Unless
+        the batch is split, the rows are validated while they are rendered
+        and nothing is written.
     """
 
     # Initialize the context and log a message.
@@ -111,15 +162,51 @@ def process_files(
     is_csv = data_file_path.endswith(".csv")
     is_sqlite = data_file_path.endswith(".db")
 
+    # The rows are consumed once, in order, so they are read, validated and
+    # rendered as a stream and the data file is never held in memory as a
+    # whole. Only a batch split into several files needs every row up front
+    split_batch = max_transactions is not None or max_bytes is not None
+    stream_rows = single_pass or group_payments or not split_batch
+
+    if db_filters and not is_sqlite:
+        error_message = "Error: Filters only apply to SQLite data files."
+        logger.error(error_message)
+        raise ValueError(error_message)
+
+    # Only the columns read by the message version or checked by the
+    # validation are loaded from an SQLite file
+    db_columns = get_required_columns(xml_message_type) | set(REQUIRED_COLUMNS)
+
     # Load data into a list of dictionaries based on the file type
-    if is_csv:
+    if is_csv and csv_workers:
+        # The rows come back validated and in the order of the file
+        data = iter_csv_data_parallel(data_file_path, max_workers=csv_workers)
+        if not stream_rows:
+            data = list(data)
+    elif is_csv and stream_rows:
+        data = iter_validated_csv_data(iter_csv_data(data_file_path))
+    elif is_csv:
         data = load_csv_data(data_file_path)
         if not validate_csv_data(data):
             error_message = "Error: Invalid CSV data."
             logger.error(error_message)
             raise ValueError(error_message)
+    elif is_sqlite and stream_rows:
+        data = iter_validated_db_data(
+            iter_db_data(
+                data_file_path,
+                table_name="pain001",
+                columns=db_columns,
+                filters=db_filters,
+            )
+        )
     elif is_sqlite:
-        data = load_db_data(data_file_path, table_name="pain001")
+        data = load_db_data(
+            data_file_path,
+            table_name="pain001",
+            columns=db_columns,
+            filters=db_filters,
+        )
         if not validate_db_data(data):
             error_message = "Error: Invalid SQLite data."
             logger.error(error_message)
@@ -132,13 +219,29 @@ def process_files(
     # Register the namespace prefixes and URIs for the XML message type
     register_namespaces(xml_message_type)
 
-    # Generate the updated XML file path
-    generate_xml(
-        data,
-        xml_message_type,
-        xml_template_file_path,
-        xsd_schema_file_path,
-    )
+    # Generate the updated XML file path. Streamed rows are validated while
+    # they are rendered, so an invalid row raises here, before anything is
+    # written
+    try:
+        generate_xml(
+            data,
+            xml_message_type,
+            xml_template_file_path,
+            xsd_schema_file_path,
+            use_validation_cache=use_validation_cache,
+            streaming=streaming,
+            engine=engine,
+            max_transactions=max_transactions,
+            max_bytes=max_bytes,
+            max_workers=max_workers,
+            single_pass=single_pass,
+            group_payments=group_payments,
+            max_rows_in_memory=max_rows_in_memory,
+            compact=compact,
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        raise
 
     # Confirm the XML file has been created
     if os.path.exists(xml_template_file_path):
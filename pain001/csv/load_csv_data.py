@@ -15,18 +15,25 @@
 
 import csv
 import logging
+from itertools import islice
 
 logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(message)s")
 
+# Default number of rows in a chunk yielded by `iter_csv_chunks`
+DEFAULT_CSV_CHUNK_SIZE = 10_000
 
-def load_csv_data(file_path):
-    """Load CSV data from a file.
+
+def iter_csv_data(file_path):
+    """Yield the rows of a CSV file one at a time.
+
+    The file is read as the rows are consumed, so memory use does not depend
+    on the size of the file.
 
     Args:
         file_path (str): The path to the CSV file.
 
-    Returns:
-        list: A list of dictionaries containing the CSV data.
+    Yields:
+        dict: The next row of the CSV file.
 
     Raises:
         FileNotFoundError: If the file does not exist.
@@ -34,12 +41,12 @@ def load_csv_data(file_path):
         UnicodeDecodeError: If there is an issue decoding the file's content.
         ValueError: If the CSV file is empty.
     """
-    data = []
+    row_count = 0
     try:
         with open(file_path, mode="r", encoding="utf-8") as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                data.append(row)
+            for row in csv.DictReader(file):
+                row_count += 1
+                yield row
     except FileNotFoundError:
         logging.error(f"File '{file_path}' not found.")
         raise
@@ -56,7 +63,50 @@ def load_csv_data(file_path):
         )
         raise
 
-    if not data:
+    if not row_count:
         raise ValueError(f"The CSV file '{file_path}' is empty.")
 
-    return data
+
+def iter_csv_chunks(file_path, chunk_size=DEFAULT_CSV_CHUNK_SIZE):
+    """Yield the rows of a CSV file in lists of at most `chunk_size` rows.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        chunk_size (int): The maximum number of rows in a chunk.
+
+    Yields:
+        list: The next rows of the CSV file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        IOError: If there is an issue reading the file.
+        UnicodeDecodeError: If there is an issue decoding the file's content.
+        ValueError: If the CSV file is empty or the chunk size is not
+        positive.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size: {chunk_size}")
+    rows = iter_csv_data(file_path)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_csv_data(file_path):
+    """Load CSV data from a file.
+
+    Args:
+        file_path (str): The path to the CSV file.
+
+    Returns:
+        list: A list of dictionaries containing the CSV data.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        IOError: If there is an issue reading the file.
+        UnicodeDecodeError: If there is an issue decoding the file's content.
+        ValueError: If the CSV file is empty.
+    """
+    return list(iter_csv_data(file_path))
@@ -0,0 +1,200 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `iter_csv_data_parallel`, which parses and
+validates a large CSV file in several processes.
+
+The file is memory-mapped and split into byte ranges that end on record
+boundaries. A newline only ends a record outside a quoted field, which is
+known from the parity of the quotes seen since the start of the range, as an
+escaped quote is written as two quotes. Newlines and quotes are single bytes
+that never occur inside a multi-byte UTF-8 sequence, so the ranges are
+found without decoding the file.
+
+Each range is parsed with `csv.DictReader` and validated with
+`validate_csv_row` in a worker process, and the rows are yielded in the
+order of the file, so the result is the same as `load_csv_data` followed by
+`validate_csv_data`. Like the file opened in text mode by `load_csv_data`,
+each range is read with universal newlines, so line breaks inside quoted
+fields are returned as "\n". A range always ends after a "\n", so a "\r\n"
+is never split between two ranges.
+"""
+
+import csv
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pain001.csv.validate_csv_data import validate_csv_row
+
+# Default size in bytes of the ranges of the file parsed by each task
+DEFAULT_CSV_RANGE_SIZE = 8 * 1024 * 1024
+
+
+def find_record_end(buffer, start, position):
+    """Returns the end of the record holding a position of a CSV buffer.
+
+    Args:
+        buffer (bytes or mmap.mmap): The CSV content.
+        start (int): The start of a record at or before the position.
+        position (int): The position.
+
+    Returns:
+        int: The offset following the first newline at or after the
+        position that is outside a quoted field, or the size of the buffer.
+    """
+    quoted = buffer[start:position].count(b'"') & 1
+    while True:
+        newline = buffer.find(b"\n", position)
+        if newline < 0:
+            return len(buffer)
+        quoted ^= buffer[position:newline].count(b'"') & 1
+        position = newline + 1
+        if not quoted:
+            return position
+
+
+def split_csv_ranges(buffer, start, range_size=DEFAULT_CSV_RANGE_SIZE):
+    """Splits a CSV buffer into ranges of whole records.
+
+    Args:
+        buffer (bytes or mmap.mmap): The CSV content.
+        start (int): The start of the first record.
+        range_size (int): The approximate size of each range in bytes.
+
+    Returns:
+        list: The (start, end) offsets of each range, in order.
+    """
+    ranges = []
+    size = len(buffer)
+    while start < size:
+        end = find_record_end(buffer, start, min(start + range_size, size))
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def parse_csv_range(file_path, start, end, fieldnames):
+    """Parses and validates the records of a range of a CSV file.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        start (int): The start of the range.
+        end (int): The end of the range.
+        fieldnames (list): The column names read from the header.
+
+    Returns:
+        tuple: The rows of the range as dictionaries, and whether every row
+        is valid.
+    """
+    with open(file_path, mode="rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            text = buffer[start:end].decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(text, newline=None), fieldnames))
+    is_valid = True
+    for row in rows:
+        if not validate_csv_row(row):
+            is_valid = False
+    return rows, is_valid
+
+
+def _iter_range_results(file_path, ranges, fieldnames, max_workers):
+    """Yields the results of `parse_csv_range` for each range, in order.
+
+    At most twice as many ranges as there are workers are submitted ahead of
+    the consumer, and the ranges not parsed yet are cancelled when the
+    generator is closed.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        try:
+            for start, end in ranges:
+                pending.append(
+                    executor.submit(
+                        parse_csv_range, file_path, start, end, fieldnames
+                    )
+                )
+                if len(pending) >= max_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_csv_data_parallel(
+    file_path, max_workers=None, range_size=DEFAULT_CSV_RANGE_SIZE
+):
+    """Parses and validates a CSV file in several processes.
+
+    The ranges are parsed ahead of the consumer by at most twice as many
+    tasks as there are workers, so memory use does not depend on the size
+    of the file.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        max_workers (int, optional): The number of worker processes.
+            Defaults to the number of CPUs; 1 parses in the calling process.
+        range_size (int): The approximate size in bytes of the range parsed
+            by each task.
+
+    Yields:
+        dict: The rows of the file, in order.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        UnicodeDecodeError: If there is an issue decoding the file's content.
+        ValueError: If the file is empty or a range holds an invalid row,
+        once every row of that range has been reported.
+    """
+    with open(file_path, mode="rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError(f"The CSV file '{file_path}' is empty.")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header_end = find_record_end(buffer, 0, 0)
+            header = buffer[:header_end].decode("utf-8")
+            ranges = split_csv_ranges(buffer, header_end, range_size)
+    fieldnames = next(csv.reader(io.StringIO(header, newline=None)))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(ranges))
+
+    if max_workers <= 1:
+        results = (
+            parse_csv_range(file_path, start, end, fieldnames)
+            for start, end in ranges
+        )
+    else:
+        results = _iter_range_results(
+            file_path, ranges, fieldnames, max_workers
+        )
+
+    row_count = 0
+    try:
+        for rows, is_valid in results:
+            if not is_valid:
+                raise ValueError("Error: Invalid CSV data.")
+            row_count += len(rows)
+            yield from rows
+    finally:
+        results.close()
+
+    if not row_count:
+        raise ValueError(f"The CSV file '{file_path}' is empty.")
@@ -42,92 +42,136 @@
 
 import datetime
 
+# The columns every row must hold, and the type their values must parse as
+REQUIRED_COLUMNS = {
+    "id": int,
+    "date": datetime.datetime,
+    "nb_of_txs": int,
+    "ctrl_sum": float,
+    "initiator_name": str,
+    "payment_information_id": str,
+    "payment_method": str,
+    "batch_booking": bool,
+    "service_level_code": str,
+    "requested_execution_date": datetime.datetime,
+    "debtor_name": str,
+    "debtor_account_IBAN": str,
+    "debtor_agent_BIC": str,
+    "forwarding_agent_BIC": str,
+    "charge_bearer": str,
+    "payment_id": str,
+    "payment_amount": float,
+    "currency": str,
+    "creditor_agent_BIC": str,
+    "creditor_name": str,
+    "creditor_account_IBAN": str,
+    "remittance_information": str,
+}
+
+
+def validate_csv_row(row):
+    """Validate a row of the CSV data and print its errors.
+
+    Args:
+        row (dict): A row of the CSV data.
+
+    Returns:
+        bool: True if the row is valid, False otherwise.
+    """
+    missing_columns = []
+    invalid_columns = []
+    for column, data_type in REQUIRED_COLUMNS.items():
+        value = row.get(column)
+        if value is None or value.strip() == "":
+            missing_columns.append(column)
+        else:
+            try:
+                if data_type == int:
+                    int(value)
+                elif data_type == float:
+                    float(value)
+                elif data_type == bool:
+                    if value.strip().lower() not in [
+                        "true",
+                        "false",
+                    ]:
+                        raise ValueError
+                elif data_type == datetime.datetime:
+                    try:
+                        # Handle the "Z" suffix for UTC
+                        if value.endswith("Z"):
+                            value = value[:-1] + "+00:00"
+                        datetime.datetime.fromisoformat(value)
+                    except ValueError:
+                        datetime.datetime.strptime(value, "%Y-%m-%d")
+                else:
+                    str(value)
+            except ValueError:
+                invalid_columns.append(column)
+    if missing_columns:
+        print(
+            f"Error: Missing value(s) for column(s) {missing_columns} "
+            f"in row: {row}"
+        )
+    if invalid_columns:
+        expected_types = [
+            REQUIRED_COLUMNS[col].__name__ for col in invalid_columns
+        ]
+        print(
+            f"Error: Invalid data type for column(s) {invalid_columns}, "
+            f"expected {expected_types} in row: {row}"
+        )
+    return not missing_columns and not invalid_columns
+
 
 def validate_csv_data(data):
     """Validate the CSV data before processing it.
 
     Args:
-        data (list): A list of dictionaries containing the CSV data.
+        data (iterable): The rows of the CSV data, a list of dictionaries
+            or a stream of them.
 
     Returns:
         bool: True if the data is valid, False otherwise.
     """
-    required_columns = {
-        "id": int,
-        "date": datetime.datetime,
-        "nb_of_txs": int,
-        "ctrl_sum": float,
-        "initiator_name": str,
-        "payment_information_id": str,
-        "payment_method": str,
-        "batch_booking": bool,
-        "service_level_code": str,
-        "requested_execution_date": datetime.datetime,
-        "debtor_name": str,
-        "debtor_account_IBAN": str,
-        "debtor_agent_BIC": str,
-        "forwarding_agent_BIC": str,
-        "charge_bearer": str,
-        "payment_id": str,
-        "payment_amount": float,
-        "currency": str,
-        "creditor_agent_BIC": str,
-        "creditor_name": str,
-        "creditor_account_IBAN": str,
-        "remittance_information": str,
-    }
-
-    if not data:
+    is_valid = True
+    row_count = 0
+    for row in data:
+        row_count += 1
+        if not validate_csv_row(row):
+            is_valid = False
+
+    if not row_count:
         print("Error: The CSV data is empty.")
         return False
 
-    is_valid = True
+    return is_valid
+
 
+def iter_validated_csv_data(data):
+    """Validate the rows of the CSV data while they are consumed.
+
+    Each row is validated before it is yielded, so a stream of rows is
+    validated and processed in a single pass. The stream stops at the first
+    invalid row, before it reaches the caller, which can then discard what
+    it produced from the previous rows.
+
+    Args:
+        data (iterable): The rows of the CSV data.
+
+    Yields:
+        dict: The next row of the CSV data.
+
+    Raises:
+        ValueError: If the data is empty or a row is invalid.
+    """
+    row_count = 0
     for row in data:
-        missing_columns = []
-        invalid_columns = []
-        for column, data_type in required_columns.items():
-            value = row.get(column)
-            if value is None or value.strip() == "":
-                missing_columns.append(column)
-                is_valid = False
-            else:
-                try:
-                    if data_type == int:
-                        int(value)
-                    elif data_type == float:
-                        float(value)
-                    elif data_type == bool:
-                        if value.strip().lower() not in [
-                            "true",
-                            "false",
-                        ]:
-                            raise ValueError
-                    elif data_type == datetime.datetime:
-                        try:
-                            # Handle the "Z" suffix for UTC
-                            if value.endswith("Z"):
-                                value = value[:-1] + "+00:00"
-                            datetime.datetime.fromisoformat(value)
-                        except ValueError:
-                            datetime.datetime.strptime(value, "%Y-%m-%d")
-                    else:
-                        str(value)
-                except ValueError:
-                    invalid_columns.append(column)
-                    is_valid = False
-        if missing_columns:
-            print(
-                f"Error: Missing value(s) for column(s) {missing_columns} "
-                f"in row: {row}"
-            )
-        if invalid_columns:
-            expected_types = [
-                required_columns[col].__name__ for col in invalid_columns
-            ]
-            print(
-                f"Error: Invalid data type for column(s) {invalid_columns}, "
-                f"expected {expected_types} in row: {row}"
-            )
+        if not validate_csv_row(row):
+            raise ValueError("Error: Invalid CSV data.")
+        row_count += 1
+        yield row
 
-    return is_valid
+    if not row_count:
+        print("Error: The CSV data is empty.")
+        raise ValueError("Error: Invalid CSV data.")
@@ -13,8 +13,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import sqlite3
+import logging
 import os
+import pathlib
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Default number of rows fetched at a time by `iter_db_chunks`
+DEFAULT_DB_CHUNK_SIZE = 10_000
+
+# Pragmas of the read-only connections, tuned for bulk reads: the file is
+# memory-mapped (up to 256 MiB) and cached (64 MiB), temporary tables such
+# as the sorter of an ORDER BY are kept in memory, and no statement can
+# write to the database
+DB_READ_PRAGMAS = {
+    "query_only": 1,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
 
 
 def sanitize_table_name(table_name):
@@ -42,29 +60,316 @@ def sanitize_table_name(table_name):
     return sanitized_name
 
 
-def load_db_data(data_file_path, table_name):
+def is_wal_database(data_file_path):
     """
-    Load data from an SQLite database table into a list of dictionaries.
+    Check whether an SQLite database is in WAL journal mode.
+
+    The mode is read from the file format versions of the database header,
+    which are 2 in WAL mode, so that no connection is opened.
 
     Args:
         data_file_path (str): The path to the SQLite database file.
-        table_name (str): The name of the table from which data will be loaded.
 
     Returns:
-        list:
-            A list of dictionaries where each dictionary represents a row of
-            data.
-            The keys in each dictionary correspond to the column names, and the
-            values are the column values for that row.
+        bool: True if the database is in WAL mode, False otherwise or if the
+        file is not an SQLite database.
+    """
+    try:
+        with open(data_file_path, "rb") as file:
+            header = file.read(20)
+    except OSError:
+        return False
+    return (
+        header[:16] == b"SQLite format 3\x00" and header[18:20] == b"\x02\x02"
+    )
+
+
+def connect_read_only(data_file_path, immutable=None):
+    """
+    Open an SQLite database read-only, with the pragmas of `DB_READ_PRAGMAS`.
+
+    The database is opened through a ``mode=ro`` URI, so the connection
+    never writes to the file nor takes a write lock that would block other
+    writers. A database in WAL mode without a ``-wal`` file, whose changes
+    are all checkpointed and which no connection has open, is opened with
+    ``immutable=1`` as well, so that no ``-shm`` or ``-wal`` file is created
+    next to it. If a ``-wal`` file exists, the changes it holds are read but
+    never checkpointed into the database; reading them needs the ``-shm``
+    file, which SQLite creates and leaves next to the database if it is
+    missing, for instance after a writer crashed.
+
+    Set the ``PAIN001_SQLITE_IMMUTABLE`` environment variable to ``1`` to
+    open the database with ``immutable=1`` instead, which skips locking and
+    the WAL files altogether; only do so if no other process writes to the
+    file while it is read, as changes not yet checkpointed from the ``-wal``
+    file are not seen.
+
+    Args:
+        data_file_path (str): The path to the SQLite database file.
+        immutable (bool, optional): Open the database as immutable. Defaults
+            to the ``PAIN001_SQLITE_IMMUTABLE`` environment variable.
+
+    Returns:
+        sqlite3.Connection: The read-only connection.
+
+    Raises:
+        sqlite3.OperationalError: If the database cannot be opened, or the
+            ``-wal`` file of a database in WAL mode cannot be read, such as
+            when the ``-shm`` file is missing and cannot be created.
+    """
+    if immutable is None:
+        immutable = os.environ.get(
+            "PAIN001_SQLITE_IMMUTABLE", "0"
+        ).lower() in ("1", "true", "yes", "on")
+    reads_wal = not immutable and os.path.exists(f"{data_file_path}-wal")
+    uri = pathlib.Path(os.path.abspath(data_file_path)).as_uri()
+    if immutable or (not reads_wal and is_wal_database(data_file_path)):
+        uri += "?mode=ro&immutable=1"
+    else:
+        uri += "?mode=ro"
+
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        if reads_wal:
+            # The -wal and -shm files are opened on the first read
+            try:
+                conn.execute("PRAGMA schema_version")
+            except sqlite3.OperationalError as e:
+                raise sqlite3.OperationalError(
+                    f"Cannot read the SQLite database '{data_file_path}' in "
+                    f"WAL journal mode ({e}): its '-shm' file must exist or "
+                    "its directory be writable, or its changes checkpointed "
+                    "first."
+                ) from e
+        for name, value in DB_READ_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Report the values in effect, which SQLite may have capped
+            profile = {
+                name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in DB_READ_PRAGMAS
+            }
+            logger.debug(
+                "Opened SQLite database '%s' read-only (%s) with pragmas %s",
+                data_file_path,
+                uri.partition("?")[2],
+                profile,
+            )
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def get_table_columns(cursor, table_name):
+    """
+    Get the column names of an SQLite database table.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor of the database.
+        table_name (str): The sanitized name of the table.
+
+    Returns:
+        list: The column names, in the order of the table.
+
+    Raises:
+        sqlite3.OperationalError: If the table does not exist.
+    """
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = [column[1] for column in cursor.fetchall()]
+    if not columns:
+        raise sqlite3.OperationalError(f"no such table: {table_name}")
+    return columns
+
+
+def table_has_rowid(cursor, table_name):
+    """
+    Check whether the rows of an SQLite database table have a rowid.
+
+    Tables created ``WITHOUT ROWID`` have none.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor of the database.
+        table_name (str): The sanitized name of the table.
+
+    Returns:
+        bool: True if the rows can be sorted by rowid, False otherwise.
+    """
+    try:
+        cursor.execute(f"SELECT rowid FROM {table_name} LIMIT 0")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def parse_db_filters(expressions):
+    """
+    Parse filter expressions into the filters of `build_select_query`.
+
+    An expression is either "column=value", or "column=start..end" for an
+    inclusive range, where either bound may be left empty. Repeating a
+    column keeps the rows matching any of its values.
+
+    Args:
+        expressions (iterable): The filter expressions.
+
+    Returns:
+        dict: The filters, keyed by column name.
+
+    Raises:
+        ValueError: If an expression is malformed.
+    """
+    filters = {}
+    for expression in expressions:
+        column, separator, value = expression.partition("=")
+        column = column.strip()
+        if not separator or not column:
+            raise ValueError(
+                f"Invalid filter '{expression}', expected column=value."
+            )
+        previous = filters.get(column)
+        if ".." in value:
+            start, _, end = value.partition("..")
+            filters[column] = (start or None, end or None)
+        elif isinstance(previous, list):
+            previous.append(value)
+        elif isinstance(previous, str):
+            filters[column] = [previous, value]
+        else:
+            filters[column] = value
+    return filters
+
+
+def build_select_query(
+    table_name, table_columns, columns=None, filters=None, keep_order=True
+):
+    """
+    Build the query selecting some columns of the rows matching filters.
+
+    The columns that the table does not hold are left out, so rows miss them
+    like they would with ``SELECT *``. Filter values are bound as query
+    parameters.
+
+    Args:
+        table_name (str): The sanitized name of the table.
+        table_columns (list): The column names of the table.
+        columns (iterable, optional): The columns to select. Defaults to
+            every column of the table.
+        filters (dict, optional): The conditions on the rows, keyed by
+            column name. A value matches a single value, a list matches any
+            of its values, and a (start, end) tuple matches an inclusive
+            range whose bounds may be None.
+        keep_order (bool, optional): Sort the filtered rows by rowid, in the
+            order of the table. Tables without a rowid must set it to False.
+            Defaults to True.
+
+    Returns:
+        tuple: The query and its parameters.
+
+    Raises:
+        ValueError: If no column to select or a filtered column is not in the
+        table.
+    """
+    if columns is None:
+        selected = "*"
+    else:
+        wanted = set(columns)
+        names = [column for column in table_columns if column in wanted]
+        if not names:
+            raise ValueError(
+                f"The table '{table_name}' holds none of the columns to load."
+            )
+        selected = ", ".join(f'"{column}"' for column in names)
+
+    conditions = []
+    parameters = []
+    for column, value in (filters or {}).items():
+        if column not in table_columns:
+            raise ValueError(
+                f"Cannot filter on column '{column}', which the table "
+                f"'{table_name}' does not hold."
+            )
+        if isinstance(value, tuple):
+            start, end = value
+            if start is not None:
+                conditions.append(f'"{column}" >= ?')
+                parameters.append(start)
+            if end is not None:
+                conditions.append(f'"{column}" <= ?')
+                parameters.append(end)
+        elif isinstance(value, (list, set, frozenset)):
+            values = list(value)
+            placeholders = ", ".join("?" * len(values))
+            conditions.append(f'"{column}" IN ({placeholders})')
+            parameters.extend(values)
+        else:
+            conditions.append(f'"{column}" = ?')
+            parameters.append(value)
+
+    query = f"SELECT {selected} FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+        if keep_order:
+            # An index used by the filters may return the rows in another
+            # order
+            query += " ORDER BY rowid"
+    return query, parameters
+
+
+def dict_row_factory(columns):
+    """
+    Create a row factory that builds a dictionary from a row of a query.
+
+    The column names are read once from the cursor description rather than
+    for every row.
+
+    Args:
+        columns (tuple): The column names of the query.
+
+    Returns:
+        callable: The row factory, to set on a cursor or a connection.
+    """
+
+    def row_factory(cursor, row):
+        return dict(zip(columns, row))
+
+    return row_factory
+
+
+def iter_db_chunks(
+    data_file_path,
+    table_name,
+    chunk_size=DEFAULT_DB_CHUNK_SIZE,
+    columns=None,
+    filters=None,
+):
+    """
+    Yield the rows of an SQLite database table in lists of dictionaries.
+
+    The rows are fetched `chunk_size` at a time, so memory use does not
+    depend on the size of the table. The connection is closed once the rows
+    are exhausted or the generator is closed.
+
+    Args:
+        data_file_path (str): The path to the SQLite database file.
+        table_name (str): The name of the table from which data will be loaded.
+        chunk_size (int): The maximum number of rows in a chunk.
+        columns (iterable, optional): The columns to load, see
+            `build_select_query`. Defaults to every column.
+        filters (dict, optional): The conditions on the rows to load, see
+            `build_select_query`.
+
+    Yields:
+        list: The next rows of the table, as dictionaries keyed by the column
+        names.
 
     Raises:
         FileNotFoundError:
             If the SQLite file specified by data_file_path does not exist.
+        ValueError: If the chunk size is not positive, or the columns or
+            filters do not match the table.
         sqlite3.OperationalError:
             If there is an issue with SQLite database operations.
-
-    Example:
-        data = load_db_data("my_database.db", "my_table")
     """
 
     # Check if the SQLite file exists
@@ -72,36 +377,107 @@ def load_db_data(data_file_path, table_name):
         raise FileNotFoundError(
             f"SQLite file '{data_file_path}' does not exist."
         )
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size: {chunk_size}")
 
-    # Connect to the SQLite database
-    conn = sqlite3.connect(data_file_path)
-    cursor = conn.cursor()
+    # Connect to the SQLite database without taking write locks
+    conn = connect_read_only(data_file_path)
+    try:
+        cursor = conn.cursor()
 
-    # Sanitize the table_name before using it in the query
-    table_name = sanitize_table_name(table_name)
+        # Sanitize the table_name before using it in the query
+        table_name = sanitize_table_name(table_name)
 
-    # Fetch column names from the table
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [column[1] for column in cursor.fetchall()]
+        # Let SQLite skip the unused columns and the filtered rows
+        if columns is None and not filters:
+            query, parameters = f"SELECT * FROM {table_name}", []
+        else:
+            query, parameters = build_select_query(
+                table_name,
+                get_table_columns(cursor, table_name),
+                columns,
+                filters,
+                keep_order=table_has_rowid(cursor, table_name),
+            )
+        cursor.execute(query, parameters)
 
-    # Sanitize the table_name before using it in the query
-    table_name = sanitize_table_name(table_name)
+        # Build the dictionaries while the rows are fetched
+        columns = tuple(column[0] for column in cursor.description)
+        cursor.row_factory = dict_row_factory(columns)
 
-    # Use string formatting to construct the query
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # Close the connection to the SQLite database
+        conn.close()
 
-    query = f"SELECT * FROM {table_name}"
-    cursor.execute(query)
-    rows = cursor.fetchall()
 
-    # Create a list of dictionaries with column names as keys
-    data = []
-    for row in rows:
-        row_dict = {}
-        for i, value in enumerate(row):
-            row_dict[columns[i]] = value
-        data.append(row_dict)
+def iter_db_data(
+    data_file_path,
+    table_name,
+    chunk_size=DEFAULT_DB_CHUNK_SIZE,
+    columns=None,
+    filters=None,
+):
+    """
+    Yield the rows of an SQLite database table one at a time.
 
-    # Close the connection to the SQLite database
-    conn.close()
+    Args:
+        data_file_path (str): The path to the SQLite database file.
+        table_name (str): The name of the table from which data will be loaded.
+        chunk_size (int): The number of rows fetched at a time.
+        columns (iterable, optional): The columns to load.
+        filters (dict, optional): The conditions on the rows to load.
+
+    Yields:
+        dict: The next row of the table.
+
+    Raises:
+        FileNotFoundError:
+            If the SQLite file specified by data_file_path does not exist.
+        sqlite3.OperationalError:
+            If there is an issue with SQLite database operations.
+    """
+    for chunk in iter_db_chunks(
+        data_file_path, table_name, chunk_size, columns, filters
+    ):
+        yield from chunk
+
+
+def load_db_data(data_file_path, table_name, columns=None, filters=None):
+    """
+    Load data from an SQLite database table into a list of dictionaries.
+
+    Args:
+        data_file_path (str): The path to the SQLite database file.
+        table_name (str): The name of the table from which data will be loaded.
+        columns (iterable, optional): The columns to load, see
+            `build_select_query`. Defaults to every column.
+        filters (dict, optional): The conditions on the rows to load, see
+            `build_select_query`.
 
+    Returns:
+        list:
+            A list of dictionaries where each dictionary represents a row of
+            data.
+            The keys in each dictionary correspond to the column names, and the
+            values are the column values for that row.
+
+    Raises:
+        FileNotFoundError:
+            If the SQLite file specified by data_file_path does not exist.
+        sqlite3.OperationalError:
+            If there is an issue with SQLite database operations.
+
+    Example:
+        data = load_db_data("my_database.db", "my_table")
+    """
+    data = []
+    for chunk in iter_db_chunks(
+        data_file_path, table_name, columns=columns, filters=filters
+    ):
+        data.extend(chunk)
     return data
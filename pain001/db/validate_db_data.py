@@ -20,6 +20,81 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.ERROR)
 
 
+# The columns every row must hold a value for
+REQUIRED_COLUMNS = [
+    "id",
+    "date",
+    "nb_of_txs",
+    "initiator_name",
+    "initiator_street_name",
+    "initiator_building_number",
+    "initiator_postal_code",
+    "initiator_town_name",
+    "initiator_country_code",
+    "payment_information_id",
+    "payment_method",
+    "batch_booking",
+    "requested_execution_date",
+    "debtor_name",
+    "debtor_street_name",
+    "debtor_building_number",
+    "debtor_postal_code",
+    "debtor_town_name",
+    "debtor_country_code",
+    "debtor_account_IBAN",
+    "debtor_agent_BIC",
+    "charge_bearer",
+    "payment_id",
+    "payment_amount",
+    "currency",
+    "payment_currency",
+    "ctrl_sum",
+    "creditor_agent_BIC",
+    "creditor_name",
+    "creditor_street_name",
+    "creditor_building_number",
+    "creditor_postal_code",
+    "creditor_town_name",
+    "creditor_country_code",
+    "creditor_account_IBAN",
+    "purpose_code",
+    "reference_number",
+    "reference_date",
+    "service_level_code",
+    "end_to_end_id",
+    "payment_instruction_id",
+    "instruction_id",
+    "category_purpose",
+    "remittance_info_unstructured",
+    "remittance_info_structured",
+    "addtl_end_to_end_id",
+    "payment_info_structured",
+    "forwarding_agent_BIC",
+    "remittance_information",
+]
+
+
+def validate_db_row(row):
+    """
+    Validate a row of the data from a database.
+
+    Args:
+        row (dict): The row to validate.
+
+    Returns:
+        bool: True if the row is valid, False otherwise.
+    """
+    for column in REQUIRED_COLUMNS:
+        if column not in row or row[column] is None:
+            logger.error(
+                "Error: Missing value for column '%s' in row: %s",
+                column,
+                row,
+            )
+            return False
+    return True
+
+
 def validate_db_data(data):
     """
     Validate the data from a database.
@@ -30,65 +105,28 @@ def validate_db_data(data):
     Returns:
         bool: True if the data is valid, False otherwise.
     """
-    required_columns = [
-        "id",
-        "date",
-        "nb_of_txs",
-        "initiator_name",
-        "initiator_street_name",
-        "initiator_building_number",
-        "initiator_postal_code",
-        "initiator_town_name",
-        "initiator_country_code",
-        "payment_information_id",
-        "payment_method",
-        "batch_booking",
-        "requested_execution_date",
-        "debtor_name",
-        "debtor_street_name",
-        "debtor_building_number",
-        "debtor_postal_code",
-        "debtor_town_name",
-        "debtor_country_code",
-        "debtor_account_IBAN",
-        "debtor_agent_BIC",
-        "charge_bearer",
-        "payment_id",
-        "payment_amount",
-        "currency",
-        "payment_currency",
-        "ctrl_sum",
-        "creditor_agent_BIC",
-        "creditor_name",
-        "creditor_street_name",
-        "creditor_building_number",
-        "creditor_postal_code",
-        "creditor_town_name",
-        "creditor_country_code",
-        "creditor_account_IBAN",
-        "purpose_code",
-        "reference_number",
-        "reference_date",
-        "service_level_code",
-        "end_to_end_id",
-        "payment_instruction_id",
-        "instruction_id",
-        "category_purpose",
-        "remittance_info_unstructured",
-        "remittance_info_structured",
-        "addtl_end_to_end_id",
-        "payment_info_structured",
-        "forwarding_agent_BIC",
-        "remittance_information",
-    ]
-
     for row in data:
-        for column in required_columns:
-            if column not in row or row[column] is None:
-                logger.error(
-                    "Error: Missing value for column '%s' in row: %s",
-                    column,
-                    row,
-                )
-                return False
+        if not validate_db_row(row):
+            return False
     return True
+
+
+def iter_validated_db_data(data):
+    """
+    Validate the rows of the data from a database while they are consumed.
+
+    The stream stops at the first invalid row, before it reaches the caller.
+
+    Args:
+        data (iterable): The rows of the data.
+
+    Yields:
+        dict: The next row of the data.
+
+    Raises:
+        ValueError: If a row is invalid.
+    """
+    for row in data:
+        if not validate_db_row(row):
+            raise ValueError("Error: Invalid SQLite data.")
+        yield row
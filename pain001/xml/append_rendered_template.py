@@ -0,0 +1,69 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `append_rendered_template`, which renders a
+template and appends the children of its document element to an existing
+element, for the `create_xml_v3` ... `create_xml_v9` functions.
+
+The rendered blocks are fed to the parser as they are produced, so the
+document is never held as a whole string, and the parsed children are moved
+under the existing element in a single call instead of being appended one by
+one.
+"""
+
+import xml.etree.ElementTree as et
+
+from pain001.xml.template_registry import TemplateRegistry
+
+
+def _iter_rendered_blocks(template_path, xml_data):
+    """Yields the rendered blocks of a template.
+
+    The "direct" engine is used, whose output is identical to the Jinja2
+    output, unless it does not support the template.
+    """
+    registry = TemplateRegistry.get_instance()
+    try:
+        writer = registry.get_byte_writer(template_path)
+    except ValueError:
+        return registry.get_template(template_path).generate(**xml_data)
+    return writer.iter_bytes(xml_data)
+
+
+def append_rendered_template(parent, template_path, xml_data):
+    """Renders a template and appends the children of its document element.
+
+    The attributes and the text of the document element are dropped.
+
+    Args:
+        parent (xml.etree.ElementTree.Element): The element the children are
+            appended to.
+        template_path (str): The path to the template file.
+        xml_data (dict): The template variables.
+
+    Returns:
+        xml.etree.ElementTree.Element: The parent element.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the rendered document is not
+        well-formed.
+    """
+    parser = et.XMLParser()
+    for block in _iter_rendered_blocks(template_path, xml_data):
+        parser.feed(block)
+    # The children are moved under the parent in one call, not copied
+    parent.extend(parser.close())
+    return parent
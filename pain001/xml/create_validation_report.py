@@ -0,0 +1,298 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `create_validation_report`, which validates
+an XML document against an XSD schema and collects the validation errors into
+a structured `ValidationReport` instead of a bare boolean.
+
+Errors are collected lazily through `xmlschema.XMLSchema.iter_errors`, so
+validation stops as soon as the configured maximum number of errors has been
+reached. Each error carries its XPath and, when it occurred inside a
+`CdtTrfTxInf` element, the 1-based index of the offending transaction.
+
+Reports can be stored in the on-disk `ValidationResultCache`, keyed by the
+content hashes of the document and of the schema, so that validating the same
+bytes against the same schema again skips the XSD pass.
+"""
+
+import hashlib
+import re
+import xml.etree.ElementTree as et
+
+import xmlschema
+
+from pain001.constants.constants import LAZY_VALIDATION_DEPTH
+from pain001.xml.compute_file_digest import compute_file_digest
+from pain001.xml.validation_result_cache import ValidationResultCache
+from pain001.xml.xsd_schema_registry import XsdSchemaRegistry
+
+# Matches the Clark notation namespace prefix of an element in a path
+NAMESPACE_PATTERN = re.compile(r"\{[^}]*\}")
+
+# Matches a CdtTrfTxInf step, with an optional position, in a path
+TRANSACTION_PATTERN = re.compile(r"/CdtTrfTxInf(?:\[(\d+)\])?(?=/|$)")
+
+
+class ValidationError:
+    """A single XSD validation error.
+
+    Attributes:
+        reason (str): The reason of the error.
+        path (str): The XPath of the element where the error occurred, or
+            None if the document could not be parsed.
+        transaction_index (int): The 1-based index of the CdtTrfTxInf
+            element holding the error, or None if the error occurred outside
+            of a transaction.
+    """
+
+    def __init__(self, reason, path=None):
+        """Initializes the error and derives its transaction index.
+
+        Args:
+            reason (str): The reason of the error.
+            path (str, optional): The XPath of the element where the error
+                occurred. Namespace prefixes are stripped.
+        """
+        self.reason = reason
+        self.path = NAMESPACE_PATTERN.sub("", path) if path else None
+        self.transaction_index = None
+        if self.path:
+            match = TRANSACTION_PATTERN.search(self.path)
+            if match:
+                self.transaction_index = int(match.group(1) or 1)
+
+    def as_dict(self):
+        """Returns the error as a dictionary.
+
+        Returns:
+            dict: The reason, path and transaction index of the error.
+        """
+        return {
+            "reason": self.reason,
+            "path": self.path,
+            "transaction_index": self.transaction_index,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates an error from a dictionary built by `as_dict`.
+
+        Args:
+            data (dict): The reason, path and transaction index of the error.
+
+        Returns:
+            ValidationError: The error.
+        """
+        error = cls(data["reason"])
+        error.path = data.get("path")
+        error.transaction_index = data.get("transaction_index")
+        return error
+
+    def __str__(self):
+        location = self.path or "document"
+        if self.transaction_index is not None:
+            location += f" (transaction {self.transaction_index})"
+        return f"{location}: {self.reason}"
+
+
+class ValidationReport:
+    """The outcome of validating an XML document against an XSD schema.
+
+    Attributes:
+        xsd_file_path (str): Path to the XSD schema file.
+        errors (list of ValidationError): The collected errors.
+        truncated (bool): True if validation stopped early because the
+            maximum number of errors was reached, in which case the document
+            may contain further errors.
+    """
+
+    def __init__(self, xsd_file_path, errors=None, truncated=False):
+        self.xsd_file_path = xsd_file_path
+        self.errors = errors if errors is not None else []
+        self.truncated = truncated
+
+    @property
+    def is_valid(self):
+        """bool: True if no validation error was found."""
+        return not self.errors
+
+    def as_dict(self):
+        """Returns the report as a dictionary.
+
+        Returns:
+            dict: The validity, errors and truncation flag of the report.
+        """
+        return {
+            "xsd_file_path": self.xsd_file_path,
+            "is_valid": self.is_valid,
+            "error_count": len(self.errors),
+            "truncated": self.truncated,
+            "errors": [error.as_dict() for error in self.errors],
+        }
+
+    @classmethod
+    def from_dict(cls, data, xsd_file_path=None):
+        """Creates a report from a dictionary built by `as_dict`.
+
+        Args:
+            data (dict): The report as a dictionary.
+            xsd_file_path (str, optional): Overrides the stored XSD path.
+
+        Returns:
+            ValidationReport: The report.
+        """
+        return cls(
+            xsd_file_path or data.get("xsd_file_path"),
+            [ValidationError.from_dict(error) for error in data["errors"]],
+            data.get("truncated", False),
+        )
+
+
+def _is_xml_content(xml_source):
+    """Checks whether a source holds serialized XML rather than a path."""
+    return isinstance(xml_source, (bytes, bytearray)) or (
+        isinstance(xml_source, str) and xml_source.lstrip().startswith("<")
+    )
+
+
+def _get_document_digest(xml_source):
+    """Returns the SHA-256 digest of a document, or None if it has none.
+
+    Args:
+        xml_source: The XML source, see `create_validation_report`.
+
+    Returns:
+        str: The hexadecimal digest of the serialized document or XML file,
+        or None for element trees and unreadable files.
+    """
+    if isinstance(xml_source, str) and not _is_xml_content(xml_source):
+        try:
+            return compute_file_digest(xml_source)
+        except OSError:
+            return None
+    if isinstance(xml_source, str):
+        xml_source = xml_source.encode("utf-8")
+    if isinstance(xml_source, (bytes, bytearray)):
+        return hashlib.sha256(xml_source).hexdigest()
+    return None
+
+
+def _get_cached_report(cached, xsd_file_path, max_errors):
+    """Rebuilds a report from a cached result if it answers the request.
+
+    A cached result can serve any request for at most as many errors as it
+    holds; a complete result can serve every request.
+
+    Args:
+        cached (dict): The cached report, see `ValidationReport.as_dict`.
+        xsd_file_path (str): Path to the XSD schema file.
+        max_errors (int): The maximum number of errors requested.
+
+    Returns:
+        ValidationReport: The report, or None if validation must run again.
+    """
+    report = ValidationReport.from_dict(cached, xsd_file_path)
+    if max_errors is None or len(report.errors) < max_errors:
+        return None if report.truncated else report
+    report.errors = report.errors[:max_errors]
+    report.truncated = True
+    return report
+
+
+def create_validation_report(
+    xml_source,
+    xsd_file_path,
+    max_errors=100,
+    fail_fast=False,
+    lazy=False,
+    use_cache=False,
+):
+    """
+    Validates an XML document and collects its errors into a report.
+
+    Args:
+        xml_source (str, bytes, xml.etree.ElementTree.Element or
+            xml.etree.ElementTree.ElementTree): The path to the XML file,
+            the rendered XML content as bytes, or an already built element
+            tree. Strings starting with "<" are treated as XML content.
+        xsd_file_path (str): Path to the XSD schema file.
+        max_errors (int, optional): The maximum number of errors to collect
+            before validation stops. None collects every error.
+        fail_fast (bool): Stop at the first error. Equivalent to
+            max_errors=1.
+        lazy (bool): Stream XML files instead of loading them fully into
+            memory, see `validate_via_xsd`.
+        use_cache (bool): Look the report up in, and store it to, the
+            on-disk `ValidationResultCache`. Element trees are never cached.
+
+    Returns:
+        ValidationReport: The validation report.
+
+    Raises:
+        ValueError: If max_errors is lower than 1.
+    """
+    if fail_fast:
+        max_errors = 1
+    if max_errors is not None and max_errors < 1:
+        raise ValueError("max_errors must be at least 1.")
+
+    report = ValidationReport(xsd_file_path)
+
+    # Fetch the compiled XSD schema from the process-wide registry.
+    registry = XsdSchemaRegistry.get_instance()
+    xsd = registry.get_schema(xsd_file_path)
+
+    # Reuse the outcome of a previous validation of the same bytes.
+    document_digest = _get_document_digest(xml_source) if use_cache else None
+    if document_digest is not None:
+        cache = ValidationResultCache.get_instance()
+        schema_digest = registry.get_digest(xsd_file_path)
+        cached = cache.get(document_digest, schema_digest)
+        if cached is not None:
+            cached_report = _get_cached_report(
+                cached, xsd_file_path, max_errors
+            )
+            if cached_report is not None:
+                return cached_report
+
+    try:
+        if _is_xml_content(xml_source):
+            xml_tree = et.fromstring(xml_source)
+        elif isinstance(xml_source, str) and lazy:
+            xml_tree = xmlschema.XMLResource(
+                xml_source, lazy=LAZY_VALIDATION_DEPTH, thin_lazy=True
+            )
+        elif isinstance(xml_source, str):
+            xml_tree = et.parse(xml_source)
+        else:
+            xml_tree = xml_source
+
+        for error in xsd.iter_errors(xml_tree):
+            report.errors.append(
+                ValidationError(error.reason or str(error), error.path)
+            )
+            if max_errors is not None and len(report.errors) >= max_errors:
+                report.truncated = True
+                break
+    except Exception as e:
+        # Malformed documents surface here, either while loading them or,
+        # in lazy mode, while they are parsed during validation.
+        report.errors.append(ValidationError(str(e)))
+
+    if document_digest is not None:
+        cache.put(document_digest, schema_digest, report.as_dict())
+
+    return report
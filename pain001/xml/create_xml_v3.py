@@ -24,7 +24,8 @@ returns the root element of the modified XML tree.
 """
 
 import xml.etree.ElementTree as et
-from jinja2 import Environment, FileSystemLoader
+from pain001.xml.append_rendered_template import append_rendered_template
+from pain001.xml.message_field_specs import project_message_data
 
 
 def create_xml_v3(root, data):
@@ -54,71 +55,18 @@ def create_xml_v3(root, data):
     cstmr_cdt_trf_initn_element = et.Element("CstmrCdtTrfInitn")
     root.append(cstmr_cdt_trf_initn_element)
 
-    # Initialize the Jinja2 environment
-    env = Environment(loader=FileSystemLoader("."), autoescape=True)
-
-    # Load the Jinja2 template for the pain.001.001.03 schema
-    template = env.get_template(
-        "pain001/templates/pain.001.001.03/template.xml"
+    # Project the rows onto the template variables; the first row holds
+    # the header fields and the subsequent rows the transactions
+    xml_data_pain001_001_03 = project_message_data(
+        "pain.001.001.03", data, data[1:], create_xml=True
     )
 
-    # Prepare the data dictionary for rendering through the Jinja2 template
-    # This dictionary is a reformatted version of the `data` parameter, made to
-    # fit the template's requirements.
-    xml_data_pain001_001_03 = {
-        "id": data[0]["id"],
-        "date": data[0]["date"],
-        "nb_of_txs": data[0]["nb_of_txs"],
-        "initiator_name": data[0]["initiator_name"],
-        "initiator_street_name": data[0]["initiator_street_name"],
-        "initiator_building_number": data[0]["initiator_building_number"],
-        "initiator_postal_code": data[0]["initiator_postal_code"],
-        "initiator_town_name": data[0]["initiator_town_name"],
-        "initiator_country_code": data[0]["initiator_country_code"],
-        "payment_id": data[0]["payment_id"],
-        "payment_method": data[0]["payment_method"],
-        "batch_booking": data[0]["batch_booking"],
-        "requested_execution_date": data[0]["requested_execution_date"],
-        "debtor_name": data[0]["debtor_name"],
-        "debtor_street_name": data[0]["debtor_street_name"],
-        "debtor_building_number": data[0]["debtor_building_number"],
-        "debtor_postal_code": data[0]["debtor_postal_code"],
-        "debtor_town_name": data[0]["debtor_town_name"],
-        "debtor_country_code": data[0]["debtor_country_code"],
-        "debtor_account_IBAN": data[0]["debtor_account_IBAN"],
-        "debtor_agent_BIC": data[0]["debtor_agent_BIC"],
-        "charge_bearer": data[0]["charge_bearer"],
-        "transactions": [
-            {
-                "payment_id": row["payment_id"],
-                "payment_amount": row.get("payment_amount", ""),
-                "payment_currency": row.get("payment_currency", ""),
-                "charge_bearer": row["charge_bearer"],
-                "creditor_agent_BIC": row["creditor_agent_BIC"],
-                "creditor_name": row["creditor_name"],
-                "creditor_street_name": row["creditor_street_name"],
-                "creditor_building_number": row["creditor_building_number"],
-                "creditor_postal_code": row["creditor_postal_code"],
-                "creditor_town_name": row["creditor_town_name"],
-                "creditor_country_code": row["creditor_country_code"],
-                "creditor_account_IBAN": row["creditor_account_IBAN"],
-                "purpose_code": row["purpose_code"],
-                "reference_number": row["reference_number"],
-                "reference_date": row["reference_date"],
-            }
-            for row in data[1:]
-        ],
-    }
-
-    # Render the XML content using the Jinja2 template and the prepared data
-    xml_content = template.render(**xml_data_pain001_001_03)
-
-    # Parse the rendered XML content into an ElementTree object
-    rendered_xml_tree = et.fromstring(xml_content)
-
-    # Append the rendered XML content as children to the "CstmrCdtTrfInitn"
-    # element
-    for child in rendered_xml_tree:
-        cstmr_cdt_trf_initn_element.append(child)
+    # Render the template and build its elements directly under the
+    # "CstmrCdtTrfInitn" element
+    append_rendered_template(
+        cstmr_cdt_trf_initn_element,
+        "pain001/templates/pain.001.001.03/template.xml",
+        xml_data_pain001_001_03,
+    )
 
     return root
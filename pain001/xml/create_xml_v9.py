@@ -26,7 +26,8 @@ returns the root element of the modified XML tree.
 # Import the ElementTree package
 import xml.etree.ElementTree as et
 
-from jinja2 import Environment, FileSystemLoader
+from pain001.xml.append_rendered_template import append_rendered_template
+from pain001.xml.message_field_specs import project_message_data
 
 
 def create_xml_v9(root, data):
@@ -46,57 +47,18 @@ def create_xml_v9(root, data):
     cstmr_cdt_trf_initn_element = et.Element("CstmrCdtTrfInitn")
     root.append(cstmr_cdt_trf_initn_element)
 
-    # Create a Jinja2 environment
-    env = Environment(loader=FileSystemLoader("."), autoescape=True)
-
-    # Load the Jinja2 template
-    template = env.get_template(
-        "pain001/templates/pain.001.001.09/template.xml"
+    # Project the rows onto the template variables; the first row holds
+    # the header fields and the subsequent rows the transactions
+    xml_data_pain001_001_09 = project_message_data(
+        "pain.001.001.09", data, data[1:], create_xml=True
     )
 
-    # Prepare the data
-    xml_data_pain001_001_09 = {
-        "id": data[0]["id"],
-        "date": data[0]["date"],
-        "nb_of_txs": data[0]["nb_of_txs"],
-        "initiator_name": data[0]["initiator_name"],
-        "transactions": [
-            {
-                "payment_id": row["payment_id"],
-                "payment_method": row["payment_method"],
-                "payment_nb_of_txs": row["nb_of_txs"],
-                "requested_execution_date": row["requested_execution_date"],
-                "debtor_name": row["debtor_name"],
-                "debtor_account_IBAN": row["debtor_account_IBAN"],
-                "debtor_agent_BIC": row["debtor_agent_BIC"],
-                "charge_bearer": row["charge_bearer"],
-                "transactions": [
-                    {
-                        "payment_id": row["payment_id"],
-                        "payment_amount": row["payment_amount"],
-                        "payment_currency": row["currency"],
-                        "cdtr_agent_BICFI": row["creditor_agent_BIC"],
-                        "creditor_name": row["creditor_name"],
-                        "cdtr_account_IBAN": row["creditor_account_IBAN"],
-                        "remittance_information": row[
-                            "remittance_information"
-                        ],
-                    }
-                ],
-            }
-            for row in data[1:]
-        ],
-    }
-
-    # Render the template
-    xml_content = template.render(**xml_data_pain001_001_09)
-
-    # Parse the rendered XML content and append its children to the root
-    rendered_xml_tree = et.fromstring(xml_content)
-
-    # Append the rendered XML content as children to the "CstmrCdtTrfInitn"
-    # element
-    for child in rendered_xml_tree:
-        cstmr_cdt_trf_initn_element.append(child)
+    # Render the template and build its elements directly under the
+    # "CstmrCdtTrfInitn" element
+    append_rendered_template(
+        cstmr_cdt_trf_initn_element,
+        "pain001/templates/pain.001.001.09/template.xml",
+        xml_data_pain001_001_09,
+    )
 
     return root
@@ -0,0 +1,305 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `FieldProjector` class, which turns input rows into
+the dictionaries of template variables described by a declarative field
+spec.
+
+A field spec is a sequence of entries in one of these forms:
+
+- ``"name"``: the variable is read from the column of the same name.
+- ``("name", "column")``: the variable is read from another column.
+- ``("name", ("column", "alias", ...))``: the variable is read from the first
+  of several columns present in the row.
+- ``("name", "column", default)``: the variable takes a default value when
+  the column is missing.
+
+The spec is compiled once into an `operator.itemgetter` over the first
+column of every field, so that a complete row is projected with a single
+call. Rows missing a column fall back to a lookup per field, which applies
+the aliases and defaults.
+
+`FieldProjector.views` projects rows lazily instead: it yields a `RowView`
+over each complete row, which reads the fields from the original row when
+they are rendered, so the rows are never copied before serialization.
+"""
+
+from collections.abc import Mapping
+from operator import itemgetter
+
+# Marks a field without a default value
+MISSING = object()
+
+
+def _compile_getter(columns):
+    """Returns a callable that reads a tuple of columns from a row."""
+    if not columns:
+        return lambda row: ()
+    if len(columns) == 1:
+        getter = itemgetter(columns[0])
+        return lambda row: (getter(row),)
+    return itemgetter(*columns)
+
+
+def _lookup(row, columns, default):
+    """Returns the value of the first column present in a row.
+
+    Raises:
+        KeyError: If no column is present and the field has no default.
+    """
+    for column in columns:
+        try:
+            return row[column]
+        except (KeyError, IndexError):
+            continue
+    if default is MISSING:
+        raise KeyError(columns[0])
+    return default
+
+
+class RowView(Mapping):
+    """A read-only mapping of field names onto the columns of a row.
+
+    Methods:
+        __init__(self, row, columns): Wraps a row.
+        get(self, name, default): Returns a field or a default value.
+    """
+
+    __slots__ = ("_row", "_columns")
+
+    def __init__(self, row, columns):
+        """Wraps a row.
+
+        Args:
+            row (dict): The input row, which must hold every column.
+            columns (dict): The column of each field, keyed by field name.
+        """
+        self._row = row
+        self._columns = columns
+
+    def __getitem__(self, name):
+        return self._row[self._columns[name]]
+
+    def get(self, name, default=None):
+        column = self._columns.get(name)
+        if column is None:
+            return default
+        return self._row[column]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __repr__(self):
+        return f"RowView({dict(self)!r})"
+
+
+class RowViews:
+    """A lazy iterable of the fields of every row.
+
+    Iterating over it again iterates over the rows again, so it can be
+    iterated several times if the rows are a list, and once if they are a
+    stream.
+    """
+
+    __slots__ = ("projector", "rows")
+
+    def __init__(self, projector, rows):
+        """Wraps the rows.
+
+        Args:
+            projector (FieldProjector): The projector of the fields.
+            rows (iterable): The input rows.
+        """
+        self.projector = projector
+        self.rows = rows
+
+    def __iter__(self):
+        return self.projector.iter_views(self.rows)
+
+
+class FieldProjector:
+    """A class that projects rows onto the fields of a field spec.
+
+    Methods:
+        __init__(self, fields, default): Compiles the field spec.
+        __call__(self, row): Returns the fields of a row.
+        key(self, row): Returns the values of the fields of a row.
+        view(self, row): Returns the fields of a row without copying it.
+        project(self, rows): Returns the fields of every row.
+        views(self, rows): Returns a lazy iterable of the fields of every
+            row.
+        iter_views(self, rows): Yields the fields of every row.
+
+    Raises:
+        KeyError: If a row misses a field without a default value.
+    """
+
+    def __init__(self, fields, default=MISSING):
+        """Compiles the field spec.
+
+        Args:
+            fields (iterable): The field spec entries.
+            default (optional): The default value of the fields that do not
+            define their own. Fields are required if it is omitted.
+
+        Raises:
+            ValueError: If an entry of the spec is malformed.
+        """
+        self.fields = tuple(
+            self._parse_field(field, default) for field in fields
+        )
+        self.names = tuple(name for name, _, _ in self.fields)
+        self._getter = _compile_getter(
+            [columns[0] for _, columns, _ in self.fields]
+        )
+        self._columns = {name: columns[0] for name, columns, _ in self.fields}
+        # Rows whose columns are named like the fields are rendered as is
+        self._identity = all(
+            name == column for name, column in self._columns.items()
+        )
+
+    @staticmethod
+    def _parse_field(field, default):
+        """Parses a spec entry into a (name, columns, default) field."""
+        if isinstance(field, str):
+            return (field, (field,), default)
+        if isinstance(field, tuple) and len(field) in (2, 3):
+            name, columns = field[0], field[1]
+            if isinstance(columns, str):
+                columns = (columns,)
+            if columns:
+                return (
+                    name,
+                    tuple(columns),
+                    field[2] if len(field) == 3 else default,
+                )
+        raise ValueError(f"Invalid field spec entry: {field!r}")
+
+    def _fallback(self, row):
+        """Returns the fields of a row that misses some columns."""
+        return dict(
+            zip(
+                self.names,
+                [
+                    _lookup(row, columns, default)
+                    for _, columns, default in self.fields
+                ],
+            )
+        )
+
+    def __call__(self, row):
+        """Returns the fields of a row.
+
+        Args:
+            row (dict): The input row.
+
+        Returns:
+            dict: The template variables, keyed by field name.
+        """
+        try:
+            return dict(zip(self.names, self._getter(row)))
+        except (KeyError, IndexError):
+            return self._fallback(row)
+
+    def key(self, row):
+        """Returns the values of the fields of a row, in spec order.
+
+        Args:
+            row (dict): The input row.
+
+        Returns:
+            tuple: The values, usable as a dictionary key.
+        """
+        try:
+            return tuple(self._getter(row))
+        except (KeyError, IndexError):
+            return tuple(self._fallback(row).values())
+
+    def view(self, row):
+        """Returns the fields of a row, see `iter_views`.
+
+        Args:
+            row (dict): The input row.
+
+        Returns:
+            Mapping: The fields of the row.
+        """
+        try:
+            self._getter(row)
+        except (KeyError, IndexError):
+            return self._fallback(row)
+        return row if self._identity else RowView(row, self._columns)
+
+    def project(self, rows):
+        """Returns the fields of every row.
+
+        Args:
+            rows (iterable): The input rows.
+
+        Returns:
+            list: The template variables of each row.
+        """
+        names = self.names
+        getter = self._getter
+        projected = []
+        append = projected.append
+        for row in rows:
+            try:
+                append(dict(zip(names, getter(row))))
+            except (KeyError, IndexError):
+                append(self._fallback(row))
+        return projected
+
+    def views(self, rows):
+        """Returns a lazy iterable of the fields of every row.
+
+        Args:
+            rows (iterable): The input rows, a list or a stream.
+
+        Returns:
+            RowViews: The iterable of the fields of each row.
+        """
+        return RowViews(self, rows)
+
+    def iter_views(self, rows):
+        """Yields the fields of every row without copying complete rows.
+
+        A row holding every column is yielded as is if its columns are named
+        like the fields, or wrapped in a `RowView` otherwise. Only a row
+        missing a column is projected into a new dictionary.
+
+        Args:
+            rows (iterable): The input rows.
+
+        Yields:
+            Mapping: The fields of the next row.
+
+        Raises:
+            KeyError: If a row misses a field without a default value.
+        """
+        getter = self._getter
+        columns = self._columns
+        identity = self._identity
+        for row in rows:
+            try:
+                getter(row)
+            except (KeyError, IndexError):
+                yield self._fallback(row)
+                continue
+            yield row if identity else RowView(row, columns)
@@ -0,0 +1,169 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `generate_xml_grouped`, which generates a
+pain.001 file holding one payment information block per debtor account,
+requested execution date and charge bearer found in the input rows.
+
+The rows are grouped in a single pass, see `pain001.xml.payment_groups`,
+and the template is split around its payment information block, see
+`pain001.xml.template_parts`. The part before the block is rendered with the
+header fields of the first row and the totals of the message, the block once
+per group with the fields of the first row of the group and the totals of
+the group, written to its optional NbOfTxs and CtrlSum elements, then the
+part after the block.
+"""
+
+import sys
+from decimal import InvalidOperation
+
+from pain001.constants.constants import valid_rendering_engines
+from pain001.xml.create_validation_report import create_validation_report
+from pain001.xml.generate_updated_xml_file_path import (
+    generate_updated_xml_file_path,
+)
+from pain001.xml.message_field_specs import get_field_projectors
+from pain001.xml.payment_groups import (
+    DEFAULT_MAX_ROWS_IN_MEMORY,
+    PaymentGroups,
+)
+from pain001.xml.template_registry import TemplateRegistry
+from pain001.xml.write_validated_xml import (
+    check_validation_report,
+    stream_template,
+)
+from pain001.xml.write_xml_atomically import open_xml_atomically
+
+
+def load_template_parts(xml_file_path, engine="jinja", compact=False):
+    """Loads the parts of a template split around its payment information
+    block from the shared template registry.
+
+    Exits the process if the engine is unknown or the template cannot be
+    split.
+
+    Args:
+        xml_file_path (str): The path to the XML template file.
+        engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+        compact (bool): Compile the parts without the whitespace between the
+            tags of the template.
+
+    Returns:
+        tuple: The compiled prologue, payment information block and
+        epilogue.
+    """
+    if engine not in valid_rendering_engines:
+        print("Error: Invalid rendering engine:", engine)
+        sys.exit(1)
+
+    try:
+        return TemplateRegistry.get_instance().get_template_parts(
+            xml_file_path, engine, compact
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def generate_xml_grouped(
+    rows,
+    payment_initiation_message_type,
+    xml_file_path,
+    xsd_file_path,
+    use_validation_cache=False,
+    engine="jinja",
+    max_rows_in_memory=None,
+    compact=False,
+):
+    """Generates a pain.001 file with a payment information block per group.
+
+    Args:
+        rows (iterable): The input rows, a list or a stream. The header
+            fields are read from the first row, except the number of
+            transactions and the control sums, which are computed for the
+            message and for each block.
+        payment_initiation_message_type (str): The message type, whose field
+            spec must define the "group_fields".
+        xml_file_path (str): The path to the XML template file.
+        xsd_file_path (str): The path to the XSD schema file.
+        use_validation_cache (bool): Reuse cached validation outcomes.
+        engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+        max_rows_in_memory (int, optional): The number of rows held in
+            memory before the groups are spilled to disk.
+        compact (bool): Write the file without whitespace between its tags.
+
+    Returns:
+        str: The path to the generated file.
+    """
+    message_type = payment_initiation_message_type
+    if max_rows_in_memory is None:
+        max_rows_in_memory = DEFAULT_MAX_ROWS_IN_MEMORY
+
+    try:
+        groups = PaymentGroups(message_type, max_rows_in_memory)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    prologue, block, epilogue = load_template_parts(
+        xml_file_path, engine, compact
+    )
+    header, transaction = get_field_projectors(message_type)
+
+    with groups:
+        try:
+            groups.extend(rows)
+        except InvalidOperation as e:
+            print(f"Error: Invalid amount: {e}")
+            sys.exit(1)
+        if groups.first_row is None:
+            print("Error: No data to process.")
+            sys.exit(1)
+
+        xml_data = header(groups.first_row)
+        xml_data.update(groups.totals.as_dict())
+
+        updated_xml_file_path = generate_updated_xml_file_path(
+            xml_file_path, message_type
+        )
+        with open_xml_atomically(updated_xml_file_path) as xml_file:
+            stream_template(prologue, xml_data, xml_file)
+            for group in groups:
+                block_data = header(group.first_row)
+                block_data.update(group.totals.as_dict())
+                # Writes the optional NbOfTxs and CtrlSum of the block
+                block_data["payment_information_totals"] = True
+                block_data["transactions"] = transaction.views(group)
+                stream_template(block, block_data, xml_file)
+            stream_template(epilogue, xml_data, xml_file)
+            xml_file.flush()
+
+            report = create_validation_report(
+                xml_file.name,
+                xsd_file_path,
+                max_errors=10,
+                lazy=True,
+                use_cache=use_validation_cache,
+            )
+            check_validation_report(report, xsd_file_path)
+
+    print(
+        f"A new XML file with {len(groups)} payment information blocks has "
+        f"been created at `{updated_xml_file_path}`"
+    )
+    return updated_xml_file_path
@@ -0,0 +1,463 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `generate_xml_shards`, which splits a large
+batch into several pain.001 files holding at most a number of transactions or
+bytes each, and renders and validates them in a process pool.
+
+Each file gets its own message identification, suffixed with the number of
+the file, and its own number of transactions and control sum. A JSON manifest
+listing the files is written next to them once every file is valid; if a
+file is invalid, the files already written are removed.
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from decimal import InvalidOperation
+from functools import partial
+from itertools import repeat
+
+from pain001.xml.generate_updated_xml_file_path import (
+    generate_updated_xml_file_path,
+)
+from pain001.xml.header_totals import HeaderTotals
+from pain001.xml.message_field_specs import (
+    MESSAGE_FIELD_SPECS,
+    get_field_projectors,
+    project_message_data,
+)
+from pain001.xml.template_registry import TemplateRegistry
+from pain001.xml.write_validated_xml import load_template, write_validated_xml
+from pain001.xml.write_xml_atomically import write_xml_atomically
+from pain001.xml.xml_byte_writer import XmlByteWriter
+from pain001.xml.xml_fragment_writer import XmlFragmentWriter
+
+# Maximum length of the message identification (ISO 20022 Max35Text)
+MESSAGE_ID_MAX_LENGTH = 35
+
+# Minimum number of digits of the file numbers
+MIN_SHARD_NUMBER_WIDTH = 3
+
+
+def get_shard_file_path(xml_file_path, message_type, number, width):
+    """Returns the path of a file of a split batch.
+
+    Args:
+        xml_file_path (str): The path to the XML template file.
+        message_type (str): The message type, such as "pain.001.001.03".
+        number (int): The number of the file, starting at 1.
+        width (int): The number of digits of the file numbers.
+
+    Returns:
+        str: The path, such as "pain.001.001.03-001.xml" next to the file
+        `generate_xml` writes.
+    """
+    base = os.path.splitext(
+        generate_updated_xml_file_path(xml_file_path, message_type)
+    )[0]
+    return f"{base}-{number:0{width}d}.xml"
+
+
+def get_manifest_file_path(xml_file_path, message_type):
+    """Returns the path of the manifest of a split batch.
+
+    Args:
+        xml_file_path (str): The path to the XML template file.
+        message_type (str): The message type, such as "pain.001.001.03".
+
+    Returns:
+        str: The path, such as "pain.001.001.03-manifest.json".
+    """
+    base = os.path.splitext(
+        generate_updated_xml_file_path(xml_file_path, message_type)
+    )[0]
+    return f"{base}-manifest.json"
+
+
+def get_shard_message_id(message_id, number, width):
+    """Returns the message identification of a file of a split batch.
+
+    The original identification is truncated if needed so that the suffixed
+    one still fits in 35 characters.
+
+    Args:
+        message_id (str): The message identification of the batch.
+        number (int): The number of the file, starting at 1.
+        width (int): The number of digits of the file numbers.
+
+    Returns:
+        str: The message identification suffixed with the file number.
+    """
+    suffix = f"-{number:0{width}d}"
+    return str(message_id)[: MESSAGE_ID_MAX_LENGTH - len(suffix)] + suffix
+
+
+def get_shard_totals(message_type, xml_data, rows, number, width):
+    """Returns the header fields recomputed for a file of a split batch.
+
+    Args:
+        message_type (str): The message type, such as "pain.001.001.03".
+        xml_data (dict): The template variables of the whole batch.
+        rows (list): The input rows of the file.
+        number (int): The number of the file, starting at 1.
+        width (int): The number of digits of the file numbers.
+
+    Returns:
+        dict: The message identification, number of transactions and sums
+        of the file, keyed by header field name.
+
+    Raises:
+        decimal.InvalidOperation: If a summed value is not a number.
+    """
+    spec = MESSAGE_FIELD_SPECS[message_type]
+    totals = HeaderTotals.of(message_type, rows).as_dict()
+    if "message_id" in spec:
+        totals[spec["message_id"]] = get_shard_message_id(
+            xml_data[spec["message_id"]], number, width
+        )
+    return totals
+
+
+def plan_shards(
+    transaction_sizes, header_size=0, max_transactions=None, max_bytes=None
+):
+    """Splits consecutive transactions into shards.
+
+    Args:
+        transaction_sizes (iterable of int): The size in bytes of each
+            transaction, only used if `max_bytes` is set.
+        header_size (int): The size in bytes of a file without transactions.
+        max_transactions (int, optional): The maximum number of transactions
+            of a shard.
+        max_bytes (int, optional): The maximum size in bytes of a shard.
+
+    Returns:
+        list of tuple: The (start, stop) indexes of the transactions of each
+        shard.
+
+    Raises:
+        ValueError: If a single transaction does not fit in `max_bytes`.
+    """
+    shards = []
+    start = count = 0
+    size = header_size
+    index = -1
+    for index, transaction_size in enumerate(transaction_sizes):
+        if (
+            max_bytes is not None
+            and header_size + transaction_size > max_bytes
+        ):
+            raise ValueError(
+                f"Transaction {index + 1} does not fit in a file of "
+                f"{max_bytes} bytes."
+            )
+        if count and (
+            (max_transactions is not None and count >= max_transactions)
+            or (max_bytes is not None and size + transaction_size > max_bytes)
+        ):
+            shards.append((start, index))
+            start, count, size = index, 0, header_size
+        count += 1
+        size += transaction_size
+    if count:
+        shards.append((start, index + 1))
+    return shards
+
+
+def _render_size(template, xml_data):
+    """Returns the size in bytes of a rendered template."""
+    if isinstance(template, (XmlByteWriter, XmlFragmentWriter)):
+        return len(template.render(xml_data))
+    return len(template.render(**xml_data).encode("utf-8"))
+
+
+def measure_transactions(xml_file_path, xml_data, compact=False):
+    """Returns the size of a file without transactions and of each one.
+
+    The sizes are measured with the "direct" engine, whose output is
+    identical to the Jinja2 output. Templates it cannot render are measured
+    with Jinja2 by rendering each transaction on its own.
+
+    Args:
+        xml_file_path (str): The path to the XML template file.
+        xml_data (dict): The template variables.
+        compact (bool): Measure the template without the whitespace between
+            its tags.
+
+    Returns:
+        tuple: The size in bytes of the file without transactions, and an
+        iterable of the size in bytes of each transaction.
+    """
+    registry = TemplateRegistry.get_instance()
+    empty_data = {**xml_data, "transactions": ()}
+    try:
+        writer = registry.get_byte_writer(xml_file_path, compact)
+        return (
+            _render_size(writer, empty_data),
+            writer.iter_item_sizes(xml_data),
+        )
+    except ValueError:
+        template = registry.get_template(xml_file_path, compact)
+        header_size = _render_size(template, empty_data)
+        return header_size, (
+            _render_size(template, {**xml_data, "transactions": (view,)})
+            - header_size
+            for view in xml_data["transactions"]
+        )
+
+
+def generate_xml_shard(
+    shard,
+    payment_initiation_message_type,
+    xml_file_path,
+    xsd_file_path,
+    header_row,
+    use_validation_cache=False,
+    streaming=False,
+    engine="jinja",
+    compact=False,
+):
+    """Renders, validates and writes one file of a split batch.
+
+    Args:
+        shard (tuple): The path of the file, its input rows and its
+            recomputed header fields, see `get_shard_totals`.
+        payment_initiation_message_type (str): The message type.
+        xml_file_path (str): The path to the XML template file.
+        xsd_file_path (str): The path to the XSD schema file.
+        header_row (dict): The input row holding the header fields.
+        use_validation_cache (bool): Reuse cached validation outcomes.
+        streaming (bool): Stream the rendered template to the file.
+        engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+        compact (bool): Write the file without whitespace between its tags.
+
+    Returns:
+        dict: The manifest entry of the file.
+
+    Raises:
+        ValueError: If the file is invalid. Nothing is written then.
+    """
+    shard_file_path, rows, totals = shard
+    template = load_template(xml_file_path, engine, compact)
+    xml_data = project_message_data(
+        payment_initiation_message_type, [header_row], rows
+    )
+    xml_data.update(totals)
+    write_validated_xml(
+        template,
+        xml_data,
+        shard_file_path,
+        xsd_file_path,
+        use_validation_cache=use_validation_cache,
+        streaming=streaming,
+        exit_on_error=False,
+    )
+
+    spec = MESSAGE_FIELD_SPECS[payment_initiation_message_type]
+    return {
+        "xml_file_path": shard_file_path,
+        "message_id": xml_data.get(spec.get("message_id")),
+        "nb_of_txs": len(rows),
+        **{name: xml_data[name] for name, _ in spec.get("sum_fields", ())},
+        "size": os.path.getsize(shard_file_path),
+    }
+
+
+def remove_shards(files, shard_file_path, error):
+    """Removes the files of a split batch and exits after a failed file.
+
+    Args:
+        files (list of dict): The manifest entries of the files already
+            written.
+        shard_file_path (str): The path of the file that failed.
+        error (Exception): The error of the file that failed.
+
+    Returns:
+        None
+    """
+    for entry in files:
+        try:
+            os.remove(entry["xml_file_path"])
+        except FileNotFoundError:
+            pass
+    print(f"Error: {error}")
+    print(
+        f"Error: Could not generate `{shard_file_path}`; removed the "
+        f"{len(files)} files of the batch already written."
+    )
+    sys.exit(1)
+
+
+def generate_xml_shards(
+    data,
+    payment_initiation_message_type,
+    xml_file_path,
+    xsd_file_path,
+    max_transactions=None,
+    max_bytes=None,
+    max_workers=None,
+    use_validation_cache=False,
+    streaming=False,
+    engine="jinja",
+    compact=False,
+):
+    """Generates a batch as several pain.001 files and a manifest.
+
+    The files are rendered and validated in a process pool. The manifest is
+    only written once every file is valid; as soon as a file is invalid,
+    the files already written are removed and the process exits.
+
+    Args:
+        data (list): The input rows. The header fields are read from the
+            first row.
+        payment_initiation_message_type (str): The message type, which must
+            have a template that loops over the transactions.
+        xml_file_path (str): The path to the XML template file.
+        xsd_file_path (str): The path to the XSD schema file.
+        max_transactions (int, optional): The maximum number of transactions
+            of a file.
+        max_bytes (int, optional): The maximum size in bytes of a file.
+        max_workers (int, optional): The number of worker processes.
+            Defaults to the number of CPUs; 1 generates the files in the
+            calling process.
+        use_validation_cache (bool): Reuse cached validation outcomes.
+        streaming (bool): Stream each rendered template to its file.
+        engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+        compact (bool): Write the files without whitespace between their
+            tags.
+
+    Returns:
+        str: The path to the manifest.
+    """
+    message_type = payment_initiation_message_type
+    if get_field_projectors(message_type)[1] is None:
+        print(
+            f"Error: The {message_type} template has a single transaction "
+            "and cannot be split into several files."
+        )
+        sys.exit(1)
+
+    xml_data = project_message_data(message_type, data)
+    try:
+        # The totals of the whole batch are at least as long as the totals
+        # of any file, so the header is measured with them
+        batch_totals = get_shard_totals(
+            message_type,
+            xml_data,
+            data,
+            len(data),
+            max(MIN_SHARD_NUMBER_WIDTH, len(str(len(data)))),
+        )
+        if max_bytes is None:
+            header_size, transaction_sizes = 0, repeat(0, len(data))
+        else:
+            header_size, transaction_sizes = measure_transactions(
+                xml_file_path, {**xml_data, **batch_totals}, compact
+            )
+        shards = plan_shards(
+            transaction_sizes, header_size, max_transactions, max_bytes
+        )
+
+        width = max(MIN_SHARD_NUMBER_WIDTH, len(str(len(shards))))
+        tasks = [
+            (
+                get_shard_file_path(
+                    xml_file_path, message_type, number, width
+                ),
+                data[start:stop],
+                get_shard_totals(
+                    message_type, xml_data, data[start:stop], number, width
+                ),
+            )
+            for number, (start, stop) in enumerate(shards, 1)
+        ]
+    except (ValueError, InvalidOperation) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    generate = partial(
+        generate_xml_shard,
+        payment_initiation_message_type=message_type,
+        xml_file_path=xml_file_path,
+        xsd_file_path=xsd_file_path,
+        header_row=data[0],
+        use_validation_cache=use_validation_cache,
+        streaming=streaming,
+        engine=engine,
+        compact=compact,
+    )
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(tasks))
+
+    if max_workers <= 1:
+        files = []
+        for task in tasks:
+            try:
+                files.append(generate(task))
+            except ValueError as e:
+                remove_shards(files, task[0], e)
+    else:
+        failure = None
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(generate, task) for task in tasks]
+            for task, future in zip(tasks, futures):
+                try:
+                    future.result()
+                except ValueError as e:
+                    failure = (task[0], e)
+                    executor.shutdown(cancel_futures=True)
+                    break
+        # Every running worker has finished by now, so the files written
+        # by the workers that succeeded are all known
+        if failure is not None:
+            remove_shards(
+                [
+                    future.result()
+                    for future in futures
+                    if future.done()
+                    and not future.cancelled()
+                    and future.exception() is None
+                ],
+                *failure,
+            )
+        files = [future.result() for future in futures]
+
+    for entry in files:
+        print(f"A new XML file has been created at `{entry['xml_file_path']}`")
+
+    spec = MESSAGE_FIELD_SPECS[message_type]
+    manifest = {
+        "message_type": message_type,
+        "message_id": xml_data.get(spec.get("message_id")),
+        "nb_of_txs": len(data),
+        **{name: batch_totals[name] for name, _ in spec.get("sum_fields", ())},
+        "files": files,
+    }
+    manifest_file_path = get_manifest_file_path(xml_file_path, message_type)
+    write_xml_atomically(
+        manifest_file_path, json.dumps(manifest, indent=2) + "\n"
+    )
+    print(
+        f"A manifest of {len(files)} XML files has been created at "
+        f"`{manifest_file_path}`"
+    )
+    return manifest_file_path
@@ -0,0 +1,128 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `generate_xml_single_pass`, which streams a
+pain.001 file from any iterable of input rows in a single pass, computing the
+number of transactions and the control sums of the header on the way.
+
+The header is written with placeholders, the transactions are counted and
+their amounts summed while they are rendered, and the placeholders are
+patched in the temporary file before it is validated and moved into place,
+see `pain001.xml.header_totals`. Memory use does not depend on the number of
+transactions.
+"""
+
+import sys
+from decimal import InvalidOperation
+from itertools import chain
+
+from pain001.xml.create_validation_report import create_validation_report
+from pain001.xml.generate_updated_xml_file_path import (
+    generate_updated_xml_file_path,
+)
+from pain001.xml.header_totals import HeaderTotals, PlaceholderScanner
+from pain001.xml.message_field_specs import (
+    get_field_projectors,
+    project_message_data,
+)
+from pain001.xml.write_validated_xml import (
+    check_validation_report,
+    load_template,
+    stream_template,
+)
+from pain001.xml.write_xml_atomically import open_xml_atomically
+
+
+def generate_xml_single_pass(
+    rows,
+    payment_initiation_message_type,
+    xml_file_path,
+    xsd_file_path,
+    use_validation_cache=False,
+    engine="jinja",
+    compact=False,
+):
+    """Generates a pain.001 file in a single pass over its input rows.
+
+    Args:
+        rows (iterable): The input rows, a list or a stream. The header
+            fields are read from the first row, except the number of
+            transactions and the control sums, which are computed.
+        payment_initiation_message_type (str): The message type, which must
+            have a template that loops over the transactions.
+        xml_file_path (str): The path to the XML template file.
+        xsd_file_path (str): The path to the XSD schema file.
+        use_validation_cache (bool): Reuse cached validation outcomes.
+        engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+        compact (bool): Write the file without whitespace between its tags.
+
+    Returns:
+        str: The path to the generated file.
+    """
+    message_type = payment_initiation_message_type
+    if get_field_projectors(message_type)[1] is None:
+        print(
+            f"Error: The {message_type} template has a single transaction "
+            "and has no totals to compute."
+        )
+        sys.exit(1)
+
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        print("Error: No data to process.")
+        sys.exit(1)
+
+    template = load_template(xml_file_path, engine, compact)
+    xml_data = project_message_data(
+        message_type, [first_row], chain([first_row], rows)
+    )
+
+    # Render placeholders in place of the totals and compute the totals
+    # while the transactions are rendered
+    totals = HeaderTotals(message_type)
+    xml_data.update(totals.placeholders())
+    xml_data["transactions"] = totals.accumulate(xml_data["transactions"])
+
+    updated_xml_file_path = generate_updated_xml_file_path(
+        xml_file_path, message_type
+    )
+    with open_xml_atomically(updated_xml_file_path) as xml_file:
+        scanner = PlaceholderScanner(xml_file, totals.placeholders())
+        try:
+            stream_template(template, xml_data, scanner)
+            xml_file.flush()
+        except InvalidOperation as e:
+            print(f"Error: Invalid amount: {e}")
+            sys.exit(1)
+        try:
+            totals.patch(xml_file.name, scanner.offsets)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+        report = create_validation_report(
+            xml_file.name,
+            xsd_file_path,
+            max_errors=10,
+            lazy=True,
+            use_cache=use_validation_cache,
+        )
+        check_validation_report(report, xsd_file_path)
+
+    print(f"A new XML file has been created at `{updated_xml_file_path}`")
+    return updated_xml_file_path
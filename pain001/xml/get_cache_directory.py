@@ -0,0 +1,79 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+import xmlschema
+
+from pain001 import __version__
+
+
+def get_cache_directory(name, environment_variable):
+    """Returns a versioned on-disk cache directory.
+
+    The base directory is read from the given environment variable and
+    defaults to ``$XDG_CACHE_HOME/pain001/<name>`` (``~/.cache/pain001/<name>``).
+    A sub-directory named after the pain001, xmlschema and Python versions is
+    appended, so that upgrading any of them never reuses stale entries.
+
+    Args:
+        name (str): The name of the cache, for example "schemas".
+        environment_variable (str): The environment variable overriding the
+            base directory.
+
+    Returns:
+        str: The path to the versioned cache directory.
+    """
+    base_directory = os.environ.get(environment_variable)
+    if not base_directory:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        base_directory = os.path.join(cache_home, "pain001", name)
+
+    version_tag = (
+        f"pain001-{__version__}-xmlschema-{xmlschema.__version__}"
+        f"-py{sys.version_info.major}{sys.version_info.minor}"
+    )
+    return os.path.join(base_directory, version_tag)
+
+
+def is_private_cache_file(file, cache_directory):
+    """Checks that a cache file can be trusted before it is deserialized.
+
+    The open file and its directory must belong to the current user and
+    must not be writable by the group or by other users, so that nobody
+    else can plant an entry that is unpickled or executed. The check is
+    skipped on platforms without POSIX user ids.
+
+    Args:
+        file: The open cache file, checked through its file descriptor.
+        cache_directory (str): The directory holding the cache file.
+
+    Returns:
+        bool: True if the file can be trusted, False otherwise.
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    user_id = os.getuid()
+    try:
+        statuses = (os.fstat(file.fileno()), os.stat(cache_directory))
+    except OSError:
+        return False
+    return all(
+        status.st_uid == user_id and not status.st_mode & 0o022
+        for status in statuses
+    )
@@ -0,0 +1,231 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `HeaderTotals` class, which computes the number of
+transactions and the control sums of a message from its transactions, and
+the `PlaceholderScanner` class, which lets a streamed document be written
+before the totals are known.
+
+The totals are rendered as fixed-width placeholders. The scanner records
+where each placeholder lands in the output, and `HeaderTotals.patch` then
+overwrites it in place with the final value followed by the closing tag of
+its element, padding with whitespace after the tag. This keeps the file the
+same size, so a document is generated in a single pass over its input.
+"""
+
+import uuid
+from decimal import Decimal
+
+from pain001.xml.message_field_specs import (
+    MESSAGE_FIELD_SPECS,
+    get_field_projectors,
+)
+
+# Width in bytes of a placeholder, and maximum width of a total
+PLACEHOLDER_WIDTH = 32
+
+# Maximum number of bytes read to find the closing tag after a placeholder
+CLOSING_TAG_MAX_LENGTH = 256
+
+
+class HeaderTotals:
+    """A class that computes the header totals of a message.
+
+    Methods:
+        __init__(self, payment_initiation_message_type): Starts the totals.
+        add(self, transaction): Counts a transaction and adds its amounts.
+        accumulate(self, transactions): Yields transactions while counting
+            them.
+        as_dict(self): Returns the totals keyed by header field name.
+        placeholders(self): Returns the placeholder of each total.
+        patch(self, xml_file_path, offsets): Replaces the placeholders.
+
+    Raises:
+        decimal.InvalidOperation: If a summed value is not a number.
+    """
+
+    def __init__(self, payment_initiation_message_type):
+        """Starts the totals of a message.
+
+        Args:
+            payment_initiation_message_type (str): The message type, such as
+                "pain.001.001.03", whose field spec names the count and sum
+                fields.
+        """
+        spec = MESSAGE_FIELD_SPECS[payment_initiation_message_type]
+        self.count_fields = spec.get("count_fields", ())
+        self.sum_fields = spec.get("sum_fields", ())
+        self.count = 0
+        self.sums = [Decimal(0)] * len(self.sum_fields)
+        self._placeholders = None
+
+    @classmethod
+    def of(cls, payment_initiation_message_type, rows):
+        """Returns the totals of the transactions of some input rows.
+
+        Args:
+            payment_initiation_message_type (str): The message type.
+            rows (iterable): The input rows.
+
+        Returns:
+            HeaderTotals: The totals.
+        """
+        totals = cls(payment_initiation_message_type)
+        _, transaction = get_field_projectors(payment_initiation_message_type)
+        for view in transaction.iter_views(rows):
+            totals.add(view)
+        return totals
+
+    def add(self, transaction):
+        """Counts a transaction and adds its amounts to the sums.
+
+        Args:
+            transaction (Mapping): The fields of the transaction.
+        """
+        self.count += 1
+        for index, (_, field) in enumerate(self.sum_fields):
+            self.sums[index] += Decimal(str(transaction[field]).strip())
+
+    def accumulate(self, transactions):
+        """Yields transactions while counting them and adding their amounts.
+
+        Args:
+            transactions (iterable): The fields of each transaction.
+
+        Yields:
+            Mapping: The next transaction.
+        """
+        add = self.add
+        for transaction in transactions:
+            add(transaction)
+            yield transaction
+
+    def as_dict(self):
+        """Returns the totals.
+
+        Returns:
+            dict: The number of transactions and sums as strings, keyed by
+            header field name.
+        """
+        totals = {name: str(self.count) for name in self.count_fields}
+        totals.update(
+            (name, format(total, "f"))
+            for (name, _), total in zip(self.sum_fields, self.sums)
+        )
+        return totals
+
+    def placeholders(self):
+        """Returns the placeholder rendered in place of each total.
+
+        The placeholders are random, so that they cannot be confused with
+        input values.
+
+        Returns:
+            dict: The placeholder of each total, keyed by header field name.
+        """
+        if self._placeholders is None:
+            names = list(self.count_fields)
+            names.extend(name for name, _ in self.sum_fields)
+            self._placeholders = {
+                name: uuid.uuid4().hex[:PLACEHOLDER_WIDTH] for name in names
+            }
+        return self._placeholders
+
+    def patch(self, xml_file_path, offsets):
+        """Replaces the placeholders of a written file with the totals.
+
+        Args:
+            xml_file_path (str): The path to the file.
+            offsets (list of tuple): The (offset, field name) of each
+                placeholder in the file, see `PlaceholderScanner`.
+
+        Raises:
+            ValueError: If a total is wider than a placeholder, or a
+            placeholder is not followed by the closing tag of an element.
+        """
+        totals = self.as_dict()
+        with open(xml_file_path, "r+b") as xml_file:
+            for offset, name in offsets:
+                value = totals[name].encode("utf-8")
+                if len(value) > PLACEHOLDER_WIDTH:
+                    raise ValueError(
+                        f"The {name} total {totals[name]} does not fit in "
+                        f"{PLACEHOLDER_WIDTH} characters."
+                    )
+                xml_file.seek(offset + PLACEHOLDER_WIDTH)
+                following = xml_file.read(CLOSING_TAG_MAX_LENGTH)
+                end = following.find(b">")
+                if not following.startswith(b"</") or end == -1:
+                    raise ValueError(
+                        f"The {name} total must be the content of an element."
+                    )
+                xml_file.seek(offset)
+                xml_file.write(
+                    value
+                    + following[: end + 1]
+                    + b" " * (PLACEHOLDER_WIDTH - len(value))
+                )
+
+
+class PlaceholderScanner:
+    """A class that records where placeholders are written to a file.
+
+    Methods:
+        __init__(self, xml_file, placeholders): Wraps a binary file.
+        write(self, data): Writes bytes and records the placeholders.
+    """
+
+    def __init__(self, xml_file, placeholders):
+        """Wraps a binary file.
+
+        Args:
+            xml_file (io.BufferedIOBase): The file written to.
+            placeholders (dict): The placeholder of each field, see
+                `HeaderTotals.placeholders`.
+        """
+        self.xml_file = xml_file
+        self.placeholders = [
+            (placeholder.encode("ascii"), name)
+            for name, placeholder in placeholders.items()
+        ]
+        self.position = 0
+        self.offsets = []
+        self._tail = b""
+
+    def write(self, data):
+        """Writes bytes and records the offsets of the placeholders.
+
+        Placeholders split across two writes are found too.
+
+        Args:
+            data (bytes): The bytes to write.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        buffer = self._tail + data
+        start = self.position - len(self._tail)
+        for placeholder, name in self.placeholders:
+            index = buffer.find(placeholder)
+            while index != -1:
+                self.offsets.append((start + index, name))
+                index = buffer.find(placeholder, index + PLACEHOLDER_WIDTH)
+        # Keep too few bytes to hold a whole placeholder, so that none is
+        # recorded twice
+        self._tail = buffer[-(PLACEHOLDER_WIDTH - 1) :]
+        self.xml_file.write(data)
+        self.position += len(data)
+        return len(data)
@@ -0,0 +1,421 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the field specs that map the input columns onto the
+template variables of each pain.001 message version.
+
+Each spec lists the header fields, read from the first row, and for the
+templates that loop over the transactions, the fields of each transaction.
+The entries use the forms documented in `pain001.xml.field_projector`; a
+spec-level "default" applies to every field that does not define its own.
+
+The specs of the templates that loop over the transactions also name the
+header fields holding the message identification ("message_id"), the number
+of transactions ("count_fields") and the sums of a transaction field
+("sum_fields"), which are recomputed for each file when a batch is split,
+see `pain001.xml.generate_xml_shards`, and the header fields whose values
+start a new payment information block when the transactions are grouped
+("group_fields"), see `pain001.xml.generate_xml_grouped`.
+
+The `create_xml_vN` functions read a few header fields from other columns
+than `generate_xml`; a spec lists them with their columns under
+"create_xml_columns", so that a row holding both columns renders as before
+with either function.
+
+Supporting a new message version only takes a new entry in
+`MESSAGE_FIELD_SPECS`.
+"""
+
+from functools import lru_cache
+
+from pain001.xml.field_projector import MISSING, FieldProjector
+
+# Header fields shared by the pain.001.001.06 to pain.001.001.08 templates
+PAIN001_001_06_HEADER_FIELDS = (
+    "id",
+    "date",
+    "nb_of_txs",
+    "ctrl_sum",
+    "initiator_name",
+    "initiator_street_name",
+    "initiator_building_number",
+    "initiator_postal_code",
+    ("initiator_town", ("initiator_town", "initiator_town_name")),
+    "initiator_country",
+    "payment_information_id",
+    "payment_method",
+    "batch_booking",
+    "requested_execution_date",
+    "debtor_name",
+    "debtor_street",
+    "debtor_building_number",
+    "debtor_postal_code",
+    "debtor_town",
+    "debtor_country",
+    "debtor_account_IBAN",
+    "debtor_agent_BIC",
+    "payment_instruction_id",
+    "payment_end_to_end_id",
+    "payment_currency",
+    "payment_amount",
+    "charge_bearer",
+    "creditor_name",
+    "creditor_street",
+    "creditor_building_number",
+    "creditor_postal_code",
+    "creditor_town",
+    "creditor_country",
+    "creditor_account_IBAN",
+    "creditor_agent_BICFI",
+    "purpose_code",
+    "reference_number",
+    "reference_date",
+)
+
+# Columns of the pain.001.001.06 to pain.001.001.08 header fields read by
+# the create_xml_vN functions
+PAIN001_001_06_CREATE_XML_COLUMNS = {
+    "initiator_town": ("initiator_town_name", "initiator_town"),
+}
+
+# Header fields shared by the transactions of a payment information block
+PAYMENT_GROUP_FIELDS = (
+    "debtor_account_IBAN",
+    "requested_execution_date",
+    "charge_bearer",
+)
+
+MESSAGE_FIELD_SPECS = {
+    "pain.001.001.03": {
+        "header": (
+            "id",
+            "date",
+            "nb_of_txs",
+            "initiator_name",
+            "initiator_street_name",
+            "initiator_building_number",
+            "initiator_postal_code",
+            "initiator_town_name",
+            "initiator_country_code",
+            "payment_id",
+            "payment_method",
+            "batch_booking",
+            "requested_execution_date",
+            "debtor_name",
+            "debtor_street_name",
+            "debtor_building_number",
+            "debtor_postal_code",
+            "debtor_town_name",
+            "debtor_country_code",
+            "debtor_account_IBAN",
+            "debtor_agent_BIC",
+            "charge_bearer",
+        ),
+        "transaction": (
+            "payment_id",
+            ("payment_amount", "payment_amount", ""),
+            ("payment_currency", "payment_currency", ""),
+            "charge_bearer",
+            "creditor_agent_BIC",
+            "creditor_name",
+            "creditor_street_name",
+            "creditor_building_number",
+            "creditor_postal_code",
+            "creditor_town_name",
+            "creditor_country_code",
+            "creditor_account_IBAN",
+            "purpose_code",
+            "reference_number",
+            "reference_date",
+        ),
+        "message_id": "id",
+        "count_fields": ("nb_of_txs",),
+        "sum_fields": (("ctrl_sum", "payment_amount"),),
+        "group_fields": PAYMENT_GROUP_FIELDS,
+    },
+    "pain.001.001.04": {
+        "default": "",
+        "header": (
+            "id",
+            "date",
+            "nb_of_txs",
+            "initiator_name",
+            (
+                "initiator_street",
+                ("initiator_street_name", "initiator_street"),
+            ),
+            "initiator_building_number",
+            "initiator_postal_code",
+            ("initiator_town", ("initiator_town_name", "initiator_town")),
+            (
+                "initiator_country",
+                ("initiator_country_code", "initiator_country"),
+            ),
+            (
+                "payment_information_id",
+                ("payment_id", "payment_information_id"),
+            ),
+            "payment_method",
+            "batch_booking",
+            "requested_execution_date",
+            "debtor_name",
+            ("debtor_street", ("debtor_street_name", "debtor_street")),
+            "debtor_building_number",
+            "debtor_postal_code",
+            ("debtor_town", ("debtor_town_name", "debtor_town")),
+            ("debtor_country", ("debtor_country_code", "debtor_country")),
+            "debtor_account_IBAN",
+            "debtor_agent_BIC",
+            "debtor_agent_account_IBAN",
+            "instruction_for_debtor_agent",
+            "charge_bearer",
+            "charge_account_IBAN",
+            "charge_agent_BICFI",
+            "payment_instruction_id",
+            "payment_end_to_end_id",
+            "payment_currency",
+            "payment_amount",
+            "creditor_agent_BIC",
+            "creditor_name",
+            "creditor_street",
+            "creditor_building_number",
+            "creditor_postal_code",
+            "creditor_town",
+            "creditor_account_IBAN",
+            "purpose_code",
+            "reference_number",
+            "reference_date",
+        ),
+        "create_xml_columns": {
+            "initiator_street": ("initiator_street", "initiator_street_name"),
+            "initiator_town": ("initiator_town", "initiator_town_name"),
+            "initiator_country": (
+                "initiator_country",
+                "initiator_country_code",
+            ),
+            "payment_information_id": ("payment_information_id", "payment_id"),
+            "debtor_street": ("debtor_street", "debtor_street_name"),
+            "debtor_town": ("debtor_town", "debtor_town_name"),
+            "debtor_country": ("debtor_country", "debtor_country_code"),
+        },
+    },
+    "pain.001.001.05": {
+        "header": (
+            "id",
+            "date",
+            "nb_of_txs",
+            "ctrl_sum",
+            "initiator_name",
+            "initiator_street_name",
+            "initiator_building_number",
+            "initiator_postal_code",
+            ("initiator_town", ("initiator_town_name", "initiator_town")),
+            "initiator_country",
+            "ultimate_debtor_name",
+            "service_level_code",
+            "requested_execution_date",
+            "payment_information_id",
+            "payment_method",
+            "batch_booking",
+            "debtor_name",
+            "debtor_street",
+            "debtor_building_number",
+            "debtor_postal_code",
+            "debtor_town",
+            "debtor_country",
+            "debtor_account_IBAN",
+            "debtor_agent_BIC",
+            "payment_instruction_id",
+            "payment_end_to_end_id",
+            "payment_currency",
+            "payment_amount",
+            "charge_bearer",
+            "creditor_name",
+            "creditor_street",
+            "creditor_building_number",
+            "creditor_postal_code",
+            "creditor_town",
+            "creditor_country",
+            "creditor_account_IBAN",
+            "creditor_agent_BICFI",
+            "purpose_code",
+            "reference_number",
+            "reference_date",
+        ),
+    },
+    "pain.001.001.06": {
+        "header": PAIN001_001_06_HEADER_FIELDS,
+        "create_xml_columns": PAIN001_001_06_CREATE_XML_COLUMNS,
+    },
+    "pain.001.001.07": {
+        "header": PAIN001_001_06_HEADER_FIELDS,
+        "create_xml_columns": PAIN001_001_06_CREATE_XML_COLUMNS,
+    },
+    "pain.001.001.08": {
+        "header": PAIN001_001_06_HEADER_FIELDS,
+        "create_xml_columns": PAIN001_001_06_CREATE_XML_COLUMNS,
+    },
+    "pain.001.001.09": {
+        "header": (
+            "id",
+            "date",
+            "nb_of_txs",
+            "initiator_name",
+            "payment_id",
+            "payment_method",
+            ("payment_nb_of_txs", "nb_of_txs"),
+            "requested_execution_date",
+            "debtor_name",
+            "debtor_account_IBAN",
+            "debtor_agent_BIC",
+            "charge_bearer",
+        ),
+        "transaction": (
+            "payment_id",
+            "payment_amount",
+            ("payment_currency", "payment_currency", ""),
+            "charge_bearer",
+            "creditor_agent_BIC",
+            "creditor_name",
+            "creditor_account_IBAN",
+            ("creditor_remittance_information", "remittance_information"),
+        ),
+        "message_id": "id",
+        "count_fields": ("nb_of_txs", "payment_nb_of_txs"),
+        "sum_fields": (("ctrl_sum", "payment_amount"),),
+        "group_fields": PAYMENT_GROUP_FIELDS,
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def get_field_projectors(payment_initiation_message_type, create_xml=False):
+    """Returns the projectors compiled from the spec of a message version.
+
+    Args:
+        payment_initiation_message_type (str): The message type, such as
+            "pain.001.001.03".
+        create_xml (bool, optional): Whether to read the header fields
+            from the columns of the `create_xml_vN` functions. Defaults
+            to False.
+
+    Returns:
+        tuple: The header `FieldProjector`, and the transaction
+        `FieldProjector` or None if the template has no transaction loop.
+
+    Raises:
+        KeyError: If the message type has no field spec.
+    """
+    spec = MESSAGE_FIELD_SPECS[payment_initiation_message_type]
+    default = spec.get("default", MISSING)
+    header = FieldProjector(spec["header"], default)
+    if create_xml and "create_xml_columns" in spec:
+        columns = spec["create_xml_columns"]
+        header = FieldProjector(
+            (name, columns.get(name, field_columns), field_default)
+            for name, field_columns, field_default in header.fields
+        )
+    transaction = None
+    if "transaction" in spec:
+        transaction = FieldProjector(spec["transaction"], default)
+    return header, transaction
+
+
+@lru_cache(maxsize=None)
+def get_group_key_projector(payment_initiation_message_type):
+    """Returns the projector of the fields grouping the transactions.
+
+    Args:
+        payment_initiation_message_type (str): The message type, such as
+            "pain.001.001.03".
+
+    Returns:
+        FieldProjector: The projector of the header fields named by the
+        "group_fields" of the spec, or None if the transactions of the
+        message type cannot be grouped.
+
+    Raises:
+        KeyError: If the message type has no field spec.
+    """
+    spec = MESSAGE_FIELD_SPECS[payment_initiation_message_type]
+    if "group_fields" not in spec:
+        return None
+    header, _ = get_field_projectors(payment_initiation_message_type)
+    fields = {field[0]: field for field in header.fields}
+    return FieldProjector(fields[name] for name in spec["group_fields"])
+
+
+@lru_cache(maxsize=None)
+def get_required_columns(payment_initiation_message_type):
+    """Returns the input columns read by the spec of a message version.
+
+    Args:
+        payment_initiation_message_type (str): The message type, such as
+            "pain.001.001.03".
+
+    Returns:
+        frozenset: The names of every column a field of the spec may be
+        read from, including the alternative columns of a field.
+
+    Raises:
+        KeyError: If the message type has no field spec.
+    """
+    columns = set()
+    for projector in get_field_projectors(payment_initiation_message_type):
+        if projector is not None:
+            for _, field_columns, _ in projector.fields:
+                columns.update(field_columns)
+    return frozenset(columns)
+
+
+def project_message_data(
+    payment_initiation_message_type,
+    data,
+    transaction_rows=None,
+    create_xml=False,
+):
+    """Returns the template variables of a message.
+
+    Args:
+        payment_initiation_message_type (str): The message type, such as
+            "pain.001.001.03".
+        data (list): The input rows. The header fields are read from the
+            first row.
+        transaction_rows (iterable, optional): The rows of the transactions,
+            a list or a stream. Defaults to every row of `data`.
+        create_xml (bool, optional): Whether to read the header fields
+            from the columns of the `create_xml_vN` functions. Defaults
+            to False.
+
+    Returns:
+        dict: The template variables, with a lazy iterable of the
+        transactions under "transactions" for the templates that loop over
+        them.
+
+    Raises:
+        KeyError: If the message type has no field spec, or the first row
+        misses a required column. A transaction missing a required column
+        raises it when the transactions are iterated.
+    """
+    header, transaction = get_field_projectors(
+        payment_initiation_message_type, create_xml
+    )
+    xml_data = header(data[0])
+    if transaction is not None:
+        xml_data["transactions"] = transaction.views(
+            data if transaction_rows is None else transaction_rows
+        )
+    return xml_data
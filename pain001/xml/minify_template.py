@@ -0,0 +1,61 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `minify_template_source`, which removes
+the indentation and line breaks of the static markup of a template for the
+compact output mode.
+
+Only whitespace between two tags, or between a tag and a Jinja2 block
+statement, is removed, so the text of every element is rendered as before
+and the compact document is the same document for its XSD schema. The
+whitespace is removed from the template source once, when it is compiled,
+rather than from every rendered document.
+"""
+
+import re
+
+# Whitespace that follows the end of a tag or of a block statement, and
+# precedes the start of a tag or of a block statement
+_MARKUP_WHITESPACE = re.compile(r"(>|%\})\s+(?=<|\{%)")
+
+
+def minify_template_source(source):
+    """Removes the whitespace between the tags of a template source.
+
+    Args:
+        source (str): The template source.
+
+    Returns:
+        str: The template source without whitespace between tags and block
+        statements.
+    """
+    return _MARKUP_WHITESPACE.sub(r"\1", source)
+
+
+def read_minified_template(template_path):
+    """Reads a template file and removes the whitespace between its tags.
+
+    Args:
+        template_path (str): The path to the template file.
+
+    Returns:
+        str: The minified template source.
+
+    Raises:
+        FileNotFoundError: If the template file does not exist.
+    """
+    with open(template_path, encoding="utf-8") as template_file:
+        return minify_template_source(template_file.read())
@@ -0,0 +1,199 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `PaymentGroups` class, which groups the input rows
+of a message into payment information blocks in a single pass.
+
+Rows are grouped in a dictionary keyed by the values of the "group_fields"
+of the message field spec (the debtor account, requested execution date and
+charge bearer), and the totals of the message and of each group are computed
+on the way. Groups keep the order in which they first appear, and rows keep
+their order within a group.
+
+When more rows than the memory budget are held, the rows of every group are
+appended to a spill file of that group in a temporary directory, so memory
+use does not depend on the size of the input.
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+
+from pain001.xml.header_totals import HeaderTotals
+from pain001.xml.message_field_specs import (
+    get_field_projectors,
+    get_group_key_projector,
+)
+
+# Default maximum number of grouped rows held in memory
+DEFAULT_MAX_ROWS_IN_MEMORY = 100_000
+
+
+class PaymentGroup:
+    """A group of rows sharing the same payment information block.
+
+    Attributes:
+        first_row (dict): The first row of the group, holding the fields of
+            its payment information block.
+        totals (HeaderTotals): The totals of the transactions of the group.
+        rows (list): The rows of the group held in memory.
+        spill_file_path (str): The file holding the rows spilled to disk, or
+            None.
+    """
+
+    __slots__ = ("first_row", "totals", "rows", "spill_file_path")
+
+    def __init__(self, first_row, totals):
+        self.first_row = first_row
+        self.totals = totals
+        self.rows = []
+        self.spill_file_path = None
+
+    def __iter__(self):
+        """Yields the rows of the group, the spilled ones first."""
+        if self.spill_file_path is not None:
+            with open(self.spill_file_path, "rb") as spill_file:
+                while True:
+                    try:
+                        # The spill files are private temporary files
+                        # written by this process
+                        chunk = pickle.load(spill_file)  # nosec B301
+                    except EOFError:
+                        break
+                    yield from chunk
+        yield from self.rows
+
+
+class PaymentGroups:
+    """A class that groups the rows of a message into payment blocks.
+
+    Use it as a context manager so that its spill files are removed.
+
+    Methods:
+        __init__(self, payment_initiation_message_type, max_rows_in_memory):
+            Starts empty groups.
+        add(self, row): Adds a row to its group.
+        extend(self, rows): Adds every row to its group.
+        spill(self): Moves the rows held in memory to the spill files.
+        close(self): Removes the spill files.
+
+    Raises:
+        ValueError: If the transactions of the message type cannot be
+            grouped.
+        KeyError: If a row misses a required column.
+        decimal.InvalidOperation: If a summed value is not a number.
+    """
+
+    def __init__(
+        self,
+        payment_initiation_message_type,
+        max_rows_in_memory=DEFAULT_MAX_ROWS_IN_MEMORY,
+    ):
+        """Starts empty groups.
+
+        Args:
+            payment_initiation_message_type (str): The message type, such as
+                "pain.001.001.03".
+            max_rows_in_memory (int): The number of rows held in memory
+                before they are spilled to disk.
+        """
+        self.message_type = payment_initiation_message_type
+        self.key_projector = get_group_key_projector(self.message_type)
+        if self.key_projector is None:
+            raise ValueError(
+                f"The transactions of {self.message_type} cannot be grouped."
+            )
+        _, self.transaction_projector = get_field_projectors(self.message_type)
+        self.max_rows_in_memory = max_rows_in_memory
+        self.totals = HeaderTotals(self.message_type)
+        self.groups = {}
+        self.first_row = None
+        self.rows_in_memory = 0
+        self.spill_directory = None
+        self.spill_file_count = 0
+        # The groups holding rows in memory
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        """Yields the groups in the order in which they first appeared."""
+        return iter(self.groups.values())
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add(self, row):
+        """Adds a row to its group and to the totals.
+
+        Args:
+            row (dict): The input row.
+        """
+        key = self.key_projector.key(row)
+        group = self.groups.get(key)
+        if group is None:
+            group = PaymentGroup(row, HeaderTotals(self.message_type))
+            self.groups[key] = group
+            if self.first_row is None:
+                self.first_row = row
+        transaction = self.transaction_projector.view(row)
+        group.totals.add(transaction)
+        self.totals.add(transaction)
+        if not group.rows:
+            self._pending.append(group)
+        group.rows.append(row)
+        self.rows_in_memory += 1
+        if self.rows_in_memory >= self.max_rows_in_memory:
+            self.spill()
+
+    def extend(self, rows):
+        """Adds every row to its group and to the totals.
+
+        Args:
+            rows (iterable): The input rows, a list or a stream.
+        """
+        add = self.add
+        for row in rows:
+            add(row)
+
+    def spill(self):
+        """Appends the rows held in memory to the spill file of each group."""
+        if self.spill_directory is None:
+            self.spill_directory = tempfile.mkdtemp(prefix="pain001-groups-")
+        for group in self._pending:
+            if group.spill_file_path is None:
+                self.spill_file_count += 1
+                group.spill_file_path = os.path.join(
+                    self.spill_directory, f"{self.spill_file_count}.pickle"
+                )
+            with open(group.spill_file_path, "ab") as spill_file:
+                pickle.dump(
+                    group.rows, spill_file, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            group.rows = []
+        self._pending = []
+        self.rows_in_memory = 0
+
+    def close(self):
+        """Removes the spill files."""
+        if self.spill_directory is not None:
+            shutil.rmtree(self.spill_directory, ignore_errors=True)
+            self.spill_directory = None
@@ -0,0 +1,193 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module persists the compiled bytecode of the Jinja2 templates to a
+versioned on-disk cache, so that a cold process renders its first message
+without parsing and compiling its template.
+
+Each template is stored under a key derived from its absolute path, and the
+stored bytecode carries the hash of the template source it was compiled from.
+A changed template therefore never matches its stale bytecode and is
+recompiled on first use. Bytecode is only loaded from files that belong to
+the current user and cannot be written by anyone else, see
+`is_private_cache_file`.
+
+Run ``python -m pain001.xml.template_bytecode_cache`` to prebuild the
+bytecode of every bundled template, for example while building a container
+image.
+"""
+
+import logging
+import os
+import sys
+from hashlib import sha1
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from pain001.constants.constants import TEMPLATES_DIRECTORY, valid_xml_types
+from pain001.xml.get_cache_directory import (
+    get_cache_directory,
+    is_private_cache_file,
+)
+
+logger = logging.getLogger(__name__)
+
+# Directory the bundled template names, such as
+# "pain001/templates/pain.001.001.03/template.xml", are relative to
+PACKAGE_PARENT_DIRECTORY = os.path.dirname(
+    os.path.dirname(TEMPLATES_DIRECTORY)
+)
+
+
+def get_template_cache_directory():
+    """Returns the versioned directory holding the template bytecode.
+
+    The base directory is read from the ``PAIN001_TEMPLATE_CACHE_DIR``
+    environment variable and defaults to ``$XDG_CACHE_HOME/pain001/templates``
+    (``~/.cache/pain001/templates``).
+
+    Returns:
+        str: The path to the versioned bytecode directory.
+    """
+    return get_cache_directory("templates", "PAIN001_TEMPLATE_CACHE_DIR")
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """A Jinja2 bytecode cache keyed by the absolute template path.
+
+    Jinja2 keys its bytecode by the template name, which is relative to the
+    working directory here, so the same template would be cached once per
+    working directory. Keying by the absolute path lets the bytecode built by
+    `build_template_bytecode` serve every process.
+    """
+
+    def __init__(self, directory):
+        """Initializes the cache, creating its directory.
+
+        Args:
+            directory (str): The versioned bytecode directory.
+        """
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        super().__init__(directory)
+
+    def load_bytecode(self, bucket):
+        """Loads the bytecode of a bucket if its file can be trusted.
+
+        Args:
+            bucket (jinja2.bccache.Bucket): The bucket to fill.
+        """
+        filename = self._get_cache_filename(bucket)
+        try:
+            file = open(filename, "rb")
+        except OSError:
+            return
+
+        with file:
+            if is_private_cache_file(file, self.directory):
+                bucket.load_bytecode(file)
+            else:
+                logger.warning(
+                    "Ignoring bytecode '%s' writable by other users", filename
+                )
+
+    def get_cache_key(self, name, filename=None):
+        """Returns the cache key of a template.
+
+        Args:
+            name (str): The template name.
+            filename (str, optional): The template file path.
+
+        Returns:
+            str: The cache key.
+        """
+        path = os.path.abspath(filename) if filename else name
+        return sha1(path.encode("utf-8")).hexdigest()  # nosec B324
+
+
+def create_template_bytecode_cache(cache_directory=None):
+    """Creates the bytecode cache, or returns None if it is unusable.
+
+    Args:
+        cache_directory (str, optional): The versioned bytecode directory.
+        Defaults to the directory returned by `get_template_cache_directory`.
+
+    Returns:
+        TemplateBytecodeCache: The bytecode cache, or None if its directory
+        cannot be created.
+    """
+    if cache_directory is None:
+        cache_directory = get_template_cache_directory()
+    try:
+        return TemplateBytecodeCache(cache_directory)
+    except OSError as e:
+        logger.debug("Bytecode cache '%s' disabled: %s", cache_directory, e)
+        return None
+
+
+def get_bundled_template_names():
+    """Returns the names of the templates bundled with the library.
+
+    Returns:
+        list: The template names, relative to `PACKAGE_PARENT_DIRECTORY`.
+    """
+    template_names = []
+    for message_type in valid_xml_types:
+        template_path = os.path.join(
+            TEMPLATES_DIRECTORY, message_type, "template.xml"
+        )
+        if os.path.isfile(template_path):
+            template_names.append(
+                os.path.relpath(template_path, PACKAGE_PARENT_DIRECTORY)
+            )
+    return template_names
+
+
+def build_template_bytecode(cache_directory=None):
+    """Prebuilds the bytecode of every bundled template.
+
+    Args:
+        cache_directory (str, optional): The versioned bytecode directory.
+        Defaults to the directory returned by `get_template_cache_directory`.
+
+    Returns:
+        list: The paths to the bytecode files that were built or reused.
+    """
+    bytecode_cache = TemplateBytecodeCache(
+        cache_directory or get_template_cache_directory()
+    )
+    environment = Environment(
+        loader=FileSystemLoader(PACKAGE_PARENT_DIRECTORY),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+    )
+
+    bytecode_paths = []
+    for template_name in get_bundled_template_names():
+        environment.get_template(template_name)
+        template_path = os.path.join(PACKAGE_PARENT_DIRECTORY, template_name)
+        cache_key = bytecode_cache.get_cache_key(template_name, template_path)
+        bytecode_paths.append(
+            os.path.join(
+                bytecode_cache.directory, bytecode_cache.pattern % cache_key
+            )
+        )
+    return bytecode_paths
+
+
+if __name__ == "__main__":
+    target_directory = sys.argv[1] if len(sys.argv) > 1 else None
+    for path in build_template_bytecode(target_directory):
+        print(f"Built template bytecode `{path}`")
@@ -0,0 +1,119 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the functions that split a template into the part
+before an element, the element itself and the part after it, and compile
+each part on its own, so that a document can be written as a prologue, any
+number of renderings of the element and an epilogue.
+
+Rendering the three parts in turn produces the same bytes as rendering the
+whole template, with either rendering engine.
+"""
+
+from jinja2 import TemplateSyntaxError
+
+from pain001.xml.minify_template import minify_template_source
+from pain001.xml.xml_byte_writer import XmlByteWriter
+from pain001.xml.xml_fragment_writer import XmlFragmentWriter
+
+# The payment information block repeated for each group of transactions
+PAYMENT_INFORMATION_ELEMENT = "PmtInf"
+
+
+def split_template_source(source, element=PAYMENT_INFORMATION_ELEMENT):
+    """Splits a template source around an element.
+
+    Args:
+        source (str): The template source.
+        element (str): The name of the element, which must appear once.
+
+    Returns:
+        tuple: The source before the element, the source of the element from
+        its start tag to its end tag, and the source after it.
+
+    Raises:
+        ValueError: If the template does not hold exactly one element of
+        that name.
+    """
+    start_tag = f"<{element}>"
+    end_tag = f"</{element}>"
+    start = source.find(start_tag)
+    end = source.rfind(end_tag)
+    if (
+        start == -1
+        or end < start
+        or source.find(start_tag, start + 1) != -1
+        or source.find(end_tag) != end
+    ):
+        raise ValueError(
+            f"The template must hold a single {start_tag} element."
+        )
+    end += len(end_tag)
+    return source[:start], source[start:end], source[end:]
+
+
+def compile_template_parts(
+    template_path,
+    environment,
+    engine="jinja",
+    element=PAYMENT_INFORMATION_ELEMENT,
+    compact=False,
+):
+    """Compiles the parts of a template split around an element.
+
+    Every engine removes a single trailing newline from a template, so the
+    prologue and the element are compiled with an extra newline that is
+    removed instead of their own; only the epilogue ends like the template.
+
+    Args:
+        template_path (str): The path to the template file.
+        environment (jinja2.Environment): The environment compiling the
+            parts with the "jinja" engine, and the parts the "fragment"
+            engine renders with Jinja2.
+        engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+        element (str): The name of the element to split around.
+        compact (bool): Remove the whitespace between the tags of the
+            template, see `minify_template_source`.
+
+    Returns:
+        tuple: The compiled prologue, element and epilogue, as
+        `jinja2.Template`, `XmlByteWriter` or `XmlFragmentWriter` objects.
+
+    Raises:
+        ValueError: If the template cannot be split around the element, a
+        Jinja2 block spans several parts, or the "direct" or "fragment"
+        engine does not support a part.
+    """
+    with open(template_path, encoding="utf-8") as template_file:
+        source = template_file.read()
+    if compact:
+        source = minify_template_source(source)
+    prologue, block, epilogue = split_template_source(source, element)
+    sources = (prologue + "\n", block + "\n", epilogue)
+    if engine == "direct":
+        return tuple(XmlByteWriter(source) for source in sources)
+    if engine == "fragment":
+        return tuple(
+            XmlFragmentWriter(source, environment) for source in sources
+        )
+    try:
+        return tuple(environment.from_string(source) for source in sources)
+    except TemplateSyntaxError as e:
+        raise ValueError(
+            f"The {element} element of {template_path} cannot be rendered "
+            f"on its own: {e.message}"
+        ) from e
@@ -0,0 +1,325 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `TemplateRegistry` class, a process-wide cache of
+compiled Jinja2 templates.
+
+A single `jinja2.Environment` is shared by `generate_xml` and the
+`create_xml_v3` ... `create_xml_v9` functions, and every compiled template is
+kept keyed by its absolute path and modification time. In production mode
+(`auto_reload` off) templates are never checked for changes once compiled, so
+repeated generation in a long-running worker never re-parses them.
+
+Compiled templates are also persisted to the on-disk bytecode cache managed
+by `pain001.xml.template_bytecode_cache`, so a fresh process loads them
+instead of parsing and compiling them again.
+
+The registry also caches the `XmlByteWriter` compiled from each template for
+the "direct" rendering engine, the `XmlFragmentWriter` for the "fragment"
+rendering engine, and the parts of each template split around
+its payment information block (see `pain001.xml.template_parts`), under the
+same invalidation rules. Each of them can also be compiled from the template
+without the whitespace between its tags, for the compact output mode (see
+`pain001.xml.minify_template`).
+
+Set the ``PAIN001_TEMPLATE_AUTO_RELOAD`` environment variable to ``0`` to
+start the process-wide registry in production mode.
+"""
+
+import os
+import threading
+from functools import partial
+
+from jinja2 import Environment, FileSystemLoader
+
+from pain001.xml.template_bytecode_cache import (
+    create_template_bytecode_cache,
+)
+from pain001.xml.minify_template import read_minified_template
+from pain001.xml.template_parts import compile_template_parts
+from pain001.xml.xml_byte_writer import XmlByteWriter
+from pain001.xml.xml_fragment_writer import XmlFragmentWriter
+
+
+class TemplateRegistry:
+    """A class that caches compiled Jinja2 templates for the whole process.
+
+    Methods:
+        __init__(self, auto_reload, bytecode_cache_directory): Initializes
+            an empty registry.
+        get_instance(): Returns the singleton instance of the class.
+        get_template(self, template_path, compact): Returns the compiled
+            template.
+        get_byte_writer(self, template_path, compact): Returns the compiled
+            writer.
+        get_fragment_writer(self, template_path, compact): Returns the
+            compiled fragment writer.
+        get_template_parts(self, template_path, engine, compact): Returns the
+            compiled parts of the template.
+        cache_info(self): Returns the cache counters.
+        clear(self): Drops every cached template and resets the counters.
+    """
+
+    instance = None
+
+    def __init__(self, auto_reload=True, bytecode_cache_directory=""):
+        """Initializes an empty registry.
+
+        Args:
+            auto_reload (bool): Recompile a template when its modification
+            time changes. Turn it off in production to skip the check.
+            bytecode_cache_directory (str, optional): The on-disk bytecode
+            cache. Defaults to the directory returned by
+            `get_template_cache_directory`; None disables the on-disk cache.
+        """
+        self.auto_reload = auto_reload
+        self.bytecode_cache = None
+        if bytecode_cache_directory is not None:
+            self.bytecode_cache = create_template_bytecode_cache(
+                bytecode_cache_directory or None
+            )
+        # Templates are cached by the registry rather than by Jinja2, whose
+        # cache is keyed by the name relative to the working directory.
+        self.environment = Environment(
+            loader=FileSystemLoader("."),
+            autoescape=True,
+            auto_reload=auto_reload,
+            cache_size=0,
+            bytecode_cache=self.bytecode_cache,
+        )
+        self.hits = 0
+        self.misses = 0
+        self._templates = {}
+        self._writers = {}
+        self._compact_templates = {}
+        self._compact_writers = {}
+        self._fragment_writers = {}
+        self._compact_fragment_writers = {}
+        self._parts = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def get_instance():
+        """Returns the singleton instance of the class.
+
+        Returns:
+            A TemplateRegistry instance.
+        """
+        if TemplateRegistry.instance is None:
+            auto_reload = os.environ.get(
+                "PAIN001_TEMPLATE_AUTO_RELOAD", "1"
+            ).lower() not in ("0", "false", "no", "off")
+            TemplateRegistry.instance = TemplateRegistry(auto_reload)
+        return TemplateRegistry.instance
+
+    def _lookup(self, cache, template_path, build):
+        """Returns the up-to-date compiled form of a template.
+
+        Args:
+            cache (dict): The cache holding the compiled forms.
+            template_path (str): The path to the template file.
+            build (callable): Compiles the template from its path.
+
+        Returns:
+            The compiled template.
+        """
+        path = os.path.abspath(template_path)
+
+        with self._lock:
+            entry = cache.get(path)
+            if entry is not None and not self.auto_reload:
+                self.hits += 1
+                return entry[1]
+
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if entry is not None and entry[0] == mtime:
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            compiled = build(template_path)
+            cache[path] = (mtime, compiled)
+            return compiled
+
+    def _compile_compact_template(self, template_path):
+        """Compiles a template without the whitespace between its tags."""
+        return self.environment.from_string(
+            read_minified_template(template_path)
+        )
+
+    @staticmethod
+    def _compile_compact_byte_writer(template_path):
+        """Compiles a writer without the whitespace between its tags."""
+        return XmlByteWriter(read_minified_template(template_path))
+
+    def _compile_fragment_writer(self, template_path, compact=False):
+        """Compiles a fragment writer, without the whitespace between the
+        tags of the template if `compact` is set."""
+        if compact:
+            source = read_minified_template(template_path)
+        else:
+            with open(template_path, encoding="utf-8") as template_file:
+                source = template_file.read()
+        return XmlFragmentWriter(source, self.environment)
+
+    def get_template(self, template_path, compact=False):
+        """Returns the compiled template for a template file.
+
+        Args:
+            template_path (str): The path to the template file, relative to
+            the current working directory.
+            compact (bool): Compile the template without the whitespace
+            between its tags.
+
+        Returns:
+            jinja2.Template: The compiled template.
+
+        Raises:
+            jinja2.TemplateNotFound: If the template file does not exist.
+            FileNotFoundError: If the compact template file does not exist.
+        """
+        if compact:
+            return self._lookup(
+                self._compact_templates,
+                template_path,
+                self._compile_compact_template,
+            )
+        return self._lookup(
+            self._templates, template_path, self.environment.get_template
+        )
+
+    def get_byte_writer(self, template_path, compact=False):
+        """Returns the byte writer compiled from a template file.
+
+        Args:
+            template_path (str): The path to the template file.
+            compact (bool): Compile the writer without the whitespace between
+            the tags of the template.
+
+        Returns:
+            XmlByteWriter: The compiled writer.
+
+        Raises:
+            FileNotFoundError: If the template file does not exist.
+            ValueError: If the template uses a construct the writer does not
+            support.
+        """
+        if compact:
+            return self._lookup(
+                self._compact_writers,
+                template_path,
+                self._compile_compact_byte_writer,
+            )
+        return self._lookup(
+            self._writers, template_path, XmlByteWriter.from_file
+        )
+
+    def get_fragment_writer(self, template_path, compact=False):
+        """Returns the fragment writer compiled from a template file.
+
+        Args:
+            template_path (str): The path to the template file.
+            compact (bool): Compile the writer without the whitespace between
+            the tags of the template.
+
+        Returns:
+            XmlFragmentWriter: The compiled writer.
+
+        Raises:
+            FileNotFoundError: If the template file does not exist.
+            ValueError: If the template uses a construct the writer does not
+            support.
+        """
+        if compact:
+            return self._lookup(
+                self._compact_fragment_writers,
+                template_path,
+                partial(self._compile_fragment_writer, compact=True),
+            )
+        return self._lookup(
+            self._fragment_writers,
+            template_path,
+            self._compile_fragment_writer,
+        )
+
+    def get_template_parts(self, template_path, engine="jinja", compact=False):
+        """Returns the parts of a template split around its payment
+        information block.
+
+        Args:
+            template_path (str): The path to the template file.
+            engine (str): The rendering engine, "jinja", "direct" or
+            "fragment".
+            compact (bool): Compile the parts without the whitespace between
+            the tags of the template.
+
+        Returns:
+            tuple: The compiled prologue, payment information block and
+            epilogue, see `compile_template_parts`.
+
+        Raises:
+            FileNotFoundError: If the template file does not exist.
+            ValueError: If the template cannot be split.
+        """
+        with self._lock:
+            cache = self._parts.setdefault((engine, compact), {})
+        return self._lookup(
+            cache,
+            template_path,
+            partial(
+                compile_template_parts,
+                environment=self.environment,
+                engine=engine,
+                compact=compact,
+            ),
+        )
+
+    def cache_info(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached templates, and
+            whether auto reload is enabled.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "templates": len(self._templates)
+                + len(self._compact_templates),
+                "writers": len(self._writers)
+                + len(self._compact_writers)
+                + len(self._fragment_writers)
+                + len(self._compact_fragment_writers),
+                "parts": sum(len(cache) for cache in self._parts.values()),
+                "auto_reload": self.auto_reload,
+            }
+
+    def clear(self):
+        """Drops every cached template and resets the counters."""
+        with self._lock:
+            self._templates.clear()
+            self._writers.clear()
+            self._compact_templates.clear()
+            self._compact_writers.clear()
+            self._fragment_writers.clear()
+            self._compact_fragment_writers.clear()
+            self._parts.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,185 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the function `validate_files_via_xsd`, which re-checks
+many existing pain.001 files against their XSD schemas in a process pool.
+
+Each worker process keeps its own `XsdSchemaRegistry`, so every schema is
+compiled (or loaded from the on-disk artifact cache) at most once per worker.
+Results are yielded in input order as soon as they are available.
+"""
+
+import os
+import xml.etree.ElementTree as et
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from pain001.constants.constants import TEMPLATES_DIRECTORY, valid_xml_types
+from pain001.xml.create_validation_report import create_validation_report
+
+# Namespace prefix of the ISO 20022 message definitions
+NAMESPACE = "urn:iso:std:iso:20022:tech:xsd:"
+
+
+def collect_xml_files(paths):
+    """Expands files and directories into a sorted list of XML files.
+
+    Args:
+        paths (list of str): XML file paths and directories. Directories are
+            searched recursively for files with an ".xml" extension.
+
+    Returns:
+        list of str: The XML file paths.
+    """
+    xml_file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directories, file_names in os.walk(path):
+                directories.sort()
+                xml_file_paths.extend(
+                    os.path.join(directory, file_name)
+                    for file_name in sorted(file_names)
+                    if file_name.lower().endswith(".xml")
+                )
+        else:
+            xml_file_paths.append(path)
+    return xml_file_paths
+
+
+def detect_message_type(xml_file_path):
+    """Detects the pain.001 message type of an XML file from its namespace.
+
+    Only the start of the document is parsed.
+
+    Args:
+        xml_file_path (str): The path to the XML file.
+
+    Returns:
+        str: The message type, for example "pain.001.001.03", or None if the
+        root element is not in a supported ISO 20022 namespace.
+    """
+    with open(xml_file_path, "rb") as xml_file:
+        _, root = next(et.iterparse(xml_file, events=("start",)))
+
+    if root.tag.startswith("{" + NAMESPACE):
+        message_type = root.tag[len(NAMESPACE) + 1 :].split("}")[0]
+        if message_type in valid_xml_types:
+            return message_type
+    return None
+
+
+def get_bundled_xsd_file_path(message_type):
+    """Returns the path to the bundled XSD schema of a message type.
+
+    Args:
+        message_type (str): The message type, for example "pain.001.001.03".
+
+    Returns:
+        str: The path to the bundled XSD schema file.
+    """
+    return os.path.join(
+        TEMPLATES_DIRECTORY, message_type, f"{message_type}.xsd"
+    )
+
+
+def validate_file_via_xsd(
+    xml_file_path, xsd_file_path=None, max_errors=10, lazy=False
+):
+    """Validates a single XML file and returns its result as a dictionary.
+
+    Args:
+        xml_file_path (str): The path to the XML file.
+        xsd_file_path (str, optional): The path to the XSD schema file.
+            Defaults to the bundled schema matching the document namespace.
+        max_errors (int, optional): The maximum number of errors to collect.
+        lazy (bool): Stream the file instead of loading it into memory.
+
+    Returns:
+        dict: The validation report of the file, see
+        `ValidationReport.as_dict`, with the "xml_file_path" and
+        "message_type" keys added.
+    """
+    message_type = None
+    try:
+        if xsd_file_path is None:
+            message_type = detect_message_type(xml_file_path)
+            if message_type is None:
+                raise ValueError(
+                    "Unable to determine the pain.001 message type."
+                )
+            xsd_file_path = get_bundled_xsd_file_path(message_type)
+        result = create_validation_report(
+            xml_file_path, xsd_file_path, max_errors=max_errors, lazy=lazy
+        ).as_dict()
+    except Exception as e:
+        result = {
+            "xsd_file_path": xsd_file_path,
+            "is_valid": False,
+            "error_count": 1,
+            "truncated": False,
+            "errors": [
+                {"reason": str(e), "path": None, "transaction_index": None}
+            ],
+        }
+
+    return {
+        "xml_file_path": xml_file_path,
+        "message_type": message_type,
+        **result,
+    }
+
+
+def validate_files_via_xsd(
+    paths, xsd_file_path=None, max_workers=None, max_errors=10, lazy=False
+):
+    """Validates many XML files in parallel.
+
+    Args:
+        paths (list of str): XML file paths and directories, see
+            `collect_xml_files`.
+        xsd_file_path (str, optional): The XSD schema used for every file.
+            Defaults to the bundled schema matching each document namespace.
+        max_workers (int, optional): The number of worker processes. Defaults
+            to the number of CPUs; 1 validates in the calling process.
+        max_errors (int, optional): The maximum number of errors collected
+            per file.
+        lazy (bool): Stream each file instead of loading it into memory.
+
+    Yields:
+        dict: The result of each file, in input order, see
+        `validate_file_via_xsd`.
+    """
+    xml_file_paths = collect_xml_files(paths)
+    validate = partial(
+        validate_file_via_xsd,
+        xsd_file_path=xsd_file_path,
+        max_errors=max_errors,
+        lazy=lazy,
+    )
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(xml_file_paths))
+
+    if max_workers <= 1:
+        yield from map(validate, xml_file_paths)
+        return
+
+    # Batch the files so that each worker reuses its compiled schemas across
+    # many files while keeping the results streaming.
+    chunksize = max(1, min(64, len(xml_file_paths) // (max_workers * 4)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(validate, xml_file_paths, chunksize=chunksize)
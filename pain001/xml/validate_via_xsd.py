@@ -1,5 +1,3 @@
-import xmlschema
-
 # Copyright (C) 2023-2024 Sebastien Rousseau.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
@@ -17,35 +15,117 @@ import xmlschema
 
 import xml.etree.ElementTree as et
 
+import xmlschema
+
+from pain001.constants.constants import LAZY_VALIDATION_DEPTH
+from pain001.xml.create_validation_report import create_validation_report
+from pain001.xml.xsd_schema_registry import XsdSchemaRegistry
 
-def validate_via_xsd(xml_file_path, xsd_file_path):
+
+def validate_via_xsd(
+    xml_file_path, xsd_file_path, lazy=False, use_cache=False
+):
     """
     Validates an XML file against an XSD schema.
 
     Args:
         xml_file_path (str): Path to the XML file to validate.
         xsd_file_path (str): Path to the XSD schema file.
+        lazy (bool or int): Stream the XML file instead of loading it fully
+            into memory. Transactions are validated one subtree at a time and
+            released once validated, so peak memory stays constant as the
+            transaction count grows. An integer sets the pruning depth,
+            True uses `LAZY_VALIDATION_DEPTH`.
+        use_cache (bool): Reuse the outcome stored in the on-disk
+            `ValidationResultCache` when the XML file and the XSD schema are
+            unchanged since they were last validated.
 
     Returns:
         bool: True if the XML file is valid, False otherwise.
     """
 
-    # Load XML file into an ElementTree object.
+    # Look the outcome up by content hash and only validate on a miss.
+    if use_cache:
+        report = create_validation_report(
+            xml_file_path,
+            xsd_file_path,
+            max_errors=1,
+            lazy=lazy,
+            use_cache=True,
+        )
+        for error in report.errors:
+            if error.path is None:
+                print(f"Error: {error.reason}")
+        return report.is_valid
+
+    # Load XML file into an ElementTree object, or open it as a lazy
+    # resource that is parsed incrementally during validation.
     try:
-        xml_tree = et.parse(xml_file_path)
+        if lazy:
+            xml_tree = xmlschema.XMLResource(
+                xml_file_path,
+                lazy=LAZY_VALIDATION_DEPTH if lazy is True else lazy,
+                thin_lazy=True,
+            )
+        else:
+            xml_tree = et.parse(xml_file_path)
     except Exception as e:
         print(f"Error: {e}")
         return False
 
-    # Load XSD schema into an XMLSchema object.
-    xsd = xmlschema.XMLSchema(xsd_file_path)
+    return _is_valid(xml_tree, xsd_file_path)
+
+
+def validate_content_via_xsd(xml_content, xsd_file_path):
+    """
+    Validates in-memory XML content against an XSD schema.
+
+    This avoids writing a rendered document to disk only to parse it back
+    for validation.
+
+    Args:
+        xml_content (str, bytes, xml.etree.ElementTree.Element or
+            xml.etree.ElementTree.ElementTree): The rendered XML document or
+            an already built element tree.
+        xsd_file_path (str): Path to the XSD schema file.
+
+    Returns:
+        bool: True if the XML content is valid, False otherwise.
+    """
+
+    # Parse serialized XML content into an Element object.
+    if isinstance(xml_content, (str, bytes, bytearray)):
+        try:
+            xml_content = et.fromstring(xml_content)
+        except Exception as e:
+            print(f"Error: {e}")
+            return False
+
+    return _is_valid(xml_content, xsd_file_path)
+
+
+def _is_valid(xml_tree, xsd_file_path):
+    """
+    Validates a parsed XML tree against an XSD schema.
+
+    Args:
+        xml_tree (xml.etree.ElementTree.Element or
+            xml.etree.ElementTree.ElementTree): The XML tree to validate.
+        xsd_file_path (str): Path to the XSD schema file.
+
+    Returns:
+        bool: True if the XML tree is valid, False otherwise.
+    """
+
+    # Fetch the compiled XSD schema from the process-wide registry.
+    xsd = XsdSchemaRegistry.get_instance().get_schema(xsd_file_path)
 
-    # Validate XML file against XSD schema.
+    # Validate XML tree against XSD schema.
     try:
         is_valid = xsd.is_valid(xml_tree)
     except Exception as e:
         print(f"Error: {e}")
         return False
 
-    # Return True if XML file is valid, False otherwise.
+    # Return True if XML tree is valid, False otherwise.
     return is_valid
@@ -0,0 +1,257 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `ValidationResultCache` class, an on-disk cache of
+XSD validation outcomes.
+
+Each outcome is stored as a small JSON file keyed by the SHA-256 digest of
+the validated document and the SHA-256 digest of the XSD schema. Re-running
+the library on an unchanged template, or regenerating byte-identical output,
+therefore skips the XSD validation pass entirely, while any change to either
+the document or the schema produces a new key.
+
+Freshly generated documents rarely repeat, so the number of stored results
+is capped and the least recently used results are evicted once the cap is
+exceeded.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from pain001.xml.get_cache_directory import get_cache_directory
+
+logger = logging.getLogger(__name__)
+
+# Default maximum number of results kept in the cache directory
+DEFAULT_MAX_VALIDATION_RESULTS = 10_000
+
+
+def get_validation_cache_directory():
+    """Returns the versioned directory holding the validation results.
+
+    The base directory is read from the ``PAIN001_VALIDATION_CACHE_DIR``
+    environment variable and defaults to
+    ``$XDG_CACHE_HOME/pain001/validation`` (``~/.cache/pain001/validation``).
+
+    Returns:
+        str: The path to the versioned validation cache directory.
+    """
+    return get_cache_directory("validation", "PAIN001_VALIDATION_CACHE_DIR")
+
+
+class ValidationResultCache:
+    """A class that persists validation outcomes keyed by content hashes.
+
+    Methods:
+        __init__(self, cache_directory): Initializes the cache.
+        get_instance(): Returns the singleton instance of the class.
+        get(self, document_digest, schema_digest): Returns a cached result.
+        put(self, document_digest, schema_digest, result): Stores a result.
+        prune(self): Evicts the least recently used results.
+        cache_info(self): Returns the cache counters.
+    """
+
+    instance = None
+
+    def __init__(
+        self, cache_directory=None, max_entries=DEFAULT_MAX_VALIDATION_RESULTS
+    ):
+        """Initializes the cache.
+
+        Args:
+            cache_directory (str, optional): The directory holding the
+            results. Defaults to the directory returned by
+            `get_validation_cache_directory`.
+            max_entries (int, optional): The maximum number of results kept
+            in the directory, or None for no limit.
+        """
+        if cache_directory is None:
+            cache_directory = get_validation_cache_directory()
+        self.cache_directory = cache_directory
+        self.max_entries = max_entries
+        self._entry_count = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_instance():
+        """Returns the singleton instance of the class.
+
+        Returns:
+            A ValidationResultCache instance.
+        """
+        if ValidationResultCache.instance is None:
+            ValidationResultCache.instance = ValidationResultCache()
+        return ValidationResultCache.instance
+
+    def get_result_path(self, document_digest, schema_digest):
+        """Returns the file path of a cached result.
+
+        Results are spread over sub-directories named after the first two
+        characters of the document digest.
+
+        Args:
+            document_digest (str): The SHA-256 digest of the document.
+            schema_digest (str): The SHA-256 digest of the XSD schema.
+
+        Returns:
+            str: The path to the result file.
+        """
+        return os.path.join(
+            self.cache_directory,
+            document_digest[:2],
+            f"{document_digest}-{schema_digest}.json",
+        )
+
+    def get(self, document_digest, schema_digest):
+        """Returns the cached result of a document and schema pair.
+
+        Args:
+            document_digest (str): The SHA-256 digest of the document.
+            schema_digest (str): The SHA-256 digest of the XSD schema.
+
+        Returns:
+            dict: The cached result, or None if none is available.
+        """
+        result_path = self.get_result_path(document_digest, schema_digest)
+        try:
+            with open(result_path, encoding="utf-8") as file:
+                result = json.load(file)
+        except FileNotFoundError:
+            result = None
+        except Exception as e:
+            logger.debug("Ignoring unreadable result '%s': %s", result_path, e)
+            result = None
+
+        if not isinstance(result, dict):
+            result = None
+        else:
+            # Mark the result as recently used for the eviction
+            try:
+                os.utime(result_path)
+            except OSError:
+                pass
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, document_digest, schema_digest, result):
+        """Stores the result of a document and schema pair.
+
+        The result is written to a temporary file and atomically moved into
+        place, and the least recently used results are evicted when the
+        cache holds more than `max_entries` results. Failures are logged and
+        otherwise ignored, as the cache is only an optimisation.
+
+        Args:
+            document_digest (str): The SHA-256 digest of the document.
+            schema_digest (str): The SHA-256 digest of the XSD schema.
+            result (dict): The JSON serializable validation result.
+
+        Returns:
+            str: The path to the result file, or None if it was not written.
+        """
+        result_path = self.get_result_path(document_digest, schema_digest)
+        result_directory = os.path.dirname(result_path)
+        try:
+            os.makedirs(result_directory, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=result_directory, suffix=".tmp"
+            )
+            try:
+                with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                    json.dump(result, file)
+                os.replace(temp_path, result_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except Exception as e:
+            logger.debug("Could not write result '%s': %s", result_path, e)
+            return None
+
+        if self.max_entries is not None:
+            with self._lock:
+                if self._entry_count is None:
+                    self._entry_count = len(self._list_results())
+                else:
+                    self._entry_count += 1
+                if self._entry_count > self.max_entries:
+                    self.prune()
+        return result_path
+
+    def _list_results(self):
+        """Returns the paths of the stored results.
+
+        Returns:
+            list: The paths to the result files.
+        """
+        result_paths = []
+        for directory, _, file_names in os.walk(self.cache_directory):
+            result_paths.extend(
+                os.path.join(directory, file_name)
+                for file_name in file_names
+                if file_name.endswith(".json")
+            )
+        return result_paths
+
+    def prune(self):
+        """Evicts the least recently used results.
+
+        A tenth of `max_entries` is freed below the cap, so that the
+        directory is not scanned again on the next write.
+
+        Returns:
+            int: The number of results evicted.
+        """
+        results = []
+        for result_path in self._list_results():
+            try:
+                results.append((os.path.getmtime(result_path), result_path))
+            except OSError:
+                pass
+        results.sort()
+
+        keep = self.max_entries - self.max_entries // 10
+        evicted = 0
+        for _, result_path in results[: max(len(results) - keep, 0)]:
+            try:
+                os.remove(result_path)
+                evicted += 1
+            except OSError:
+                pass
+        self._entry_count = len(results) - evicted
+        return evicted
+
+    def cache_info(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: The number of hits and misses and the cache directory.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cache_directory": self.cache_directory,
+            }
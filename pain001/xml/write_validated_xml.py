@@ -0,0 +1,187 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the functions that load a compiled template, render it,
+validate the result against its XSD schema and write it atomically. They are
+shared by `generate_xml` and by the workers of `generate_xml_shards`.
+"""
+
+import sys
+
+from pain001.constants.constants import valid_rendering_engines
+from pain001.xml.create_validation_report import create_validation_report
+from pain001.xml.template_registry import TemplateRegistry
+from pain001.xml.xml_byte_writer import XmlByteWriter
+from pain001.xml.xml_fragment_writer import XmlFragmentWriter
+from pain001.xml.write_xml_atomically import (
+    open_xml_atomically,
+    write_xml_atomically,
+)
+
+# Number of rendered template chunks joined before each streamed write
+STREAM_BUFFER_CHUNKS = 64
+
+
+def check_validation_report(report, xsd_file_path, exit_on_error=True):
+    """Prints the outcome of validating a generated document.
+
+    Exits the process if the document is invalid, or raises a ValueError
+    if `exit_on_error` is False.
+
+    Args:
+        report: The ValidationReport of the generated document
+        xsd_file_path: Path to the XML schema file used for validation
+        exit_on_error: Exit the process if the document is invalid
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the document is invalid and `exit_on_error` is
+        False.
+    """
+    if not report.is_valid:
+        if not exit_on_error:
+            raise ValueError(
+                "Invalid XML data: "
+                + "; ".join(str(error) for error in report.errors)
+            )
+        for error in report.errors:
+            print(f"Error: {error}")
+        print("Error: Invalid XML data.")
+        sys.exit(1)
+
+    print(f"The XML has been validated against `{xsd_file_path}`")
+
+
+def load_template(xml_file_path, engine="jinja", compact=False):
+    """Loads a compiled template from the shared template registry.
+
+    Exits the process if the engine is unknown or cannot render the
+    template.
+
+    Args:
+        xml_file_path: Path to the XML template file
+        engine: The rendering engine, "jinja", "direct" or "fragment"
+        compact: Compile the template without the whitespace between its
+        tags, see `minify_template_source`
+
+    Returns:
+        The jinja2.Template, XmlByteWriter or XmlFragmentWriter compiled
+        from the template
+    """
+    if engine not in valid_rendering_engines:
+        print("Error: Invalid rendering engine:", engine)
+        sys.exit(1)
+
+    registry = TemplateRegistry.get_instance()
+    try:
+        if engine == "direct":
+            return registry.get_byte_writer(xml_file_path, compact)
+        if engine == "fragment":
+            return registry.get_fragment_writer(xml_file_path, compact)
+        return registry.get_template(xml_file_path, compact)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def stream_template(template, xml_data, xml_file):
+    """Renders a template chunk by chunk into a binary file.
+
+    Args:
+        template: The jinja2.Template, XmlByteWriter or XmlFragmentWriter
+        to render
+        xml_data: Dictionary of the template variables
+        xml_file: The binary file, or any object with a `write` method
+        accepting bytes
+
+    Returns:
+        None
+    """
+    if isinstance(template, (XmlByteWriter, XmlFragmentWriter)):
+        template.write(xml_file, xml_data)
+    else:
+        stream = template.stream(**xml_data)
+        stream.enable_buffering(STREAM_BUFFER_CHUNKS)
+        stream.dump(xml_file, encoding="utf-8")
+
+
+def write_validated_xml(
+    template,
+    xml_data,
+    xml_file_path,
+    xsd_file_path,
+    use_validation_cache=False,
+    streaming=False,
+    exit_on_error=True,
+):
+    """Renders a template, validates the result and writes it atomically.
+
+    Exits the process without writing anything if the result is invalid,
+    or raises a ValueError if `exit_on_error` is False.
+
+    Args:
+        template: The jinja2.Template, XmlByteWriter or XmlFragmentWriter
+        to render
+        xml_data: Dictionary of the template variables
+        xml_file_path: Path to write the generated XML file to
+        xsd_file_path: Path to XML schema file for validation
+        use_validation_cache: Reuse cached validation outcomes
+        streaming: Stream the rendered template to the file instead of
+        building the whole document in memory
+        exit_on_error: Exit the process if the result is invalid
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the result is invalid and `exit_on_error` is False.
+    """
+    if streaming:
+        # Stream the rendered chunks through a buffered writer into a
+        # temporary file, validate it lazily and only then move it into
+        # place, so the document is never held in memory as a whole
+        with open_xml_atomically(xml_file_path) as xml_file:
+            stream_template(template, xml_data, xml_file)
+            xml_file.flush()
+            report = create_validation_report(
+                xml_file.name,
+                xsd_file_path,
+                max_errors=10,
+                lazy=True,
+                use_cache=use_validation_cache,
+            )
+            check_validation_report(report, xsd_file_path, exit_on_error)
+    else:
+        # Render the template
+        if isinstance(template, (XmlByteWriter, XmlFragmentWriter)):
+            xml_content = template.render(xml_data)
+        else:
+            xml_content = template.render(**xml_data).encode("utf-8")
+
+        # Validate the rendered XML content against the XSD schema before
+        # anything is written to disk
+        report = create_validation_report(
+            xml_content,
+            xsd_file_path,
+            max_errors=10,
+            use_cache=use_validation_cache,
+        )
+        check_validation_report(report, xsd_file_path, exit_on_error)
+
+        # Write the validated XML content to the file atomically
+        write_xml_atomically(xml_file_path, xml_content)
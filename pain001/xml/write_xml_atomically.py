@@ -0,0 +1,112 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import secrets
+import stat
+from contextlib import contextmanager
+
+# Default size of the write buffer used when streaming XML content to a file
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# Number of attempts at finding an unused temporary file name
+TEMP_NAME_ATTEMPTS = 100
+
+
+def _create_temp_file(xml_file_path):
+    """Creates an empty temporary file next to a file.
+
+    The file is created exclusively with mode 0o666, like `open` does, so
+    the process umask applies without being read or changed. If the target
+    file exists, its permissions are copied instead.
+
+    Args:
+        xml_file_path (str): The path to the file to replace.
+
+    Returns:
+        str: The path to the temporary file.
+
+    Raises:
+        FileExistsError: If no unused temporary file name was found.
+    """
+    directory = os.path.dirname(os.path.abspath(xml_file_path))
+    for _ in range(TEMP_NAME_ATTEMPTS):
+        temp_path = os.path.join(directory, f".{secrets.token_hex(8)}.tmp")
+        try:
+            file_descriptor = os.open(
+                temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666
+            )
+        except FileExistsError:
+            continue
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(xml_file_path).st_mode))
+        except OSError:
+            pass
+        finally:
+            os.close(file_descriptor)
+        return temp_path
+    raise FileExistsError(f"No unused temporary file name in '{directory}'")
+
+
+@contextmanager
+def open_xml_atomically(xml_file_path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Opens a buffered binary writer that replaces a file atomically.
+
+    The content is written to a temporary file in the same directory, whose
+    path is available as the `name` of the yielded file. The temporary file
+    replaces the target file in a single step when the block exits normally,
+    and is removed if the block raises, so readers never observe a partially
+    written file and an existing file is left untouched on failure.
+    The file keeps the permissions of the file it replaces, or gets those
+    of a file created with `open`.
+
+    Args:
+        xml_file_path (str): The path to the XML file to write.
+        buffer_size (int, optional): The size of the write buffer in bytes.
+
+    Yields:
+        io.BufferedWriter: The temporary file, opened for binary writing.
+    """
+    temp_path = _create_temp_file(xml_file_path)
+    try:
+        with open(temp_path, "wb", buffering=buffer_size) as xml_file:
+            yield xml_file
+        os.replace(temp_path, xml_file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def write_xml_atomically(xml_file_path, xml_content):
+    """Writes XML content to a file atomically.
+
+    The content is written to a temporary file in the same directory, which
+    then replaces the target file in a single step. Readers never observe a
+    partially written file, and an existing file is left untouched if the
+    write fails.
+
+    Args:
+        xml_file_path (str): The path to the XML file to write.
+        xml_content (str or bytes): The XML content. Strings are encoded as
+            UTF-8.
+
+    Returns:
+        None
+    """
+    if isinstance(xml_content, str):
+        xml_content = xml_content.encode("utf-8")
+
+    with open_xml_atomically(xml_file_path) as xml_file:
+        xml_file.write(xml_content)
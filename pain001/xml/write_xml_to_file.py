@@ -16,23 +16,67 @@
 """
 This module contains a utility function for writing XML content to a file.
 The XML content is pretty-formatted with proper indentation for better
-readability.
+readability, or written without any whitespace between elements in compact
+mode.
+
+The tree is indented in place with `xml.etree.ElementTree.indent` and
+serialized straight to a buffered file, so the document is never held as a
+string nor parsed again.
 """
 
 import xml.etree.ElementTree as et
-from defusedxml.minidom import parseString
+
+from pain001.xml.write_xml_atomically import open_xml_atomically
+
+# The XML declaration written at the start of the file
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>\n'
 
 
-def write_xml_to_file(xml_file_path, root):
+def strip_whitespace(root):
+    """
+    Remove the whitespace between the elements of a tree.
+
+    The whitespace-only text of the elements with children and the
+    whitespace-only tails are removed, while the values of the leaf
+    elements, such as ``<Nm> </Nm>``, are kept.
+
+    Parameters
+    ----------
+    root : xml.etree.ElementTree.Element
+        The root element of the XML tree, modified in place.
+
+    Returns
+    -------
+    None
+    """
+    for element in root.iter():
+        if (
+            len(element)
+            and element.text is not None
+            and not element.text.strip()
+        ):
+            element.text = None
+        if element.tail is not None and not element.tail.strip():
+            element.tail = None
+
+
+def write_xml_to_file(xml_file_path, root, compact=False, indent="\t"):
     """
     Write the XML tree to a file, with pretty formatting (indentation).
 
+    The whitespace between the elements of the tree is replaced in place.
+    The file is replaced atomically.
+
     Parameters
     ----------
     xml_file_path : str
         The file path where the XML content will be written.
     root : xml.etree.ElementTree.Element
         The root element of the XML tree.
+    compact : bool, optional
+        Write the elements without any whitespace between them.
+    indent : str, optional
+        The whitespace added for each level of indentation.
 
     Returns
     -------
@@ -41,11 +85,13 @@ def write_xml_to_file(xml_file_path, root):
         value.
     """
 
-    with open(xml_file_path, "w") as f:
-        xml_string = et.tostring(root, encoding="utf-8")
-        xml_declaration = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        xml_string = xml_declaration + xml_string.decode("utf-8")
+    if compact:
+        strip_whitespace(root)
+    else:
+        et.indent(root, space=indent)
 
-        # Pretty-format the XML string using minidom
-        dom = parseString(xml_string)
-        f.write(dom.toprettyxml())
+    with open_xml_atomically(xml_file_path) as xml_file:
+        xml_file.write(XML_DECLARATION)
+        et.ElementTree(root).write(xml_file, encoding="utf-8")
+        if not compact:
+            xml_file.write(b"\n")
@@ -0,0 +1,365 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `XmlFragmentWriter` class, the "fragment" rendering
+engine, which splits a template into a prologue, a per-transaction fragment
+and an epilogue.
+
+The prologue and the epilogue, everything outside the
+``{% for tx in transactions %}`` loop, are rendered once per message. Parts
+without any template tag, such as the closing tags of the document, are
+encoded to bytes once when the template is compiled. The other parts may use
+any Jinja2 syntax; they are written with an `XmlByteWriter` when it supports
+them and with Jinja2 otherwise.
+
+The loop body is compiled by the `XmlByteWriter` into one %-format string
+for each combination of its ``{% if %}`` conditions. Before the transactions
+are written, the values read from the message (rather than from the
+transaction) are substituted into the format strings, so each transaction
+costs a single formatting operation over its own escaped values. The output
+is byte-identical to the output of the Jinja2 template.
+"""
+
+import re
+from functools import partial
+from itertools import product
+
+from jinja2 import TemplateSyntaxError
+
+from pain001.xml.xml_byte_writer import (
+    BLOCK_SIZE,
+    CONTEXT,
+    FOR_PATTERN,
+    TAG_PATTERN,
+    XmlByteWriter,
+    _get,
+    escape_xml_value,
+)
+
+# Name of the template variable holding the transactions
+TRANSACTIONS = "transactions"
+
+# Maximum number of {% if %} conditions of the loop body; the body is
+# compiled into one format string per combination of their values
+MAX_FRAGMENT_CONDITIONS = 6
+
+# Matches the escaped percent signs and the value slots of a format string
+FORMAT_TOKEN_PATTERN = re.compile(r"%%|%s")
+
+
+def split_transaction_loop(source):
+    """Splits a template source around its transaction loop.
+
+    Args:
+        source (str): The template source.
+
+    Returns:
+        tuple: The source before the ``{% for ... in transactions %}`` tag,
+        the source of the loop from that tag to its ``{% endfor %}`` tag,
+        and the source after it.
+
+    Raises:
+        ValueError: If the template has no transaction loop.
+    """
+    start = None
+    depth = 0
+    for match in TAG_PATTERN.finditer(source):
+        statement = match.group(2)
+        if statement is None:
+            continue
+        statement = statement.strip()
+        for_match = FOR_PATTERN.match(statement)
+        if for_match:
+            if start is None and for_match.group(2) == TRANSACTIONS:
+                start = match.start()
+            elif start is not None:
+                depth += 1
+        elif statement == "endfor" and start is not None:
+            if depth == 0:
+                return (
+                    source[:start],
+                    source[start : match.end()],
+                    source[match.end() :],
+                )
+            depth -= 1
+    raise ValueError(
+        f"The template has no {{% for ... in {TRANSACTIONS} %}} loop"
+    )
+
+
+def _split_format(format_string):
+    """Returns the literal texts around the value slots of a format string."""
+    texts = []
+    text = []
+    position = 0
+    for match in FORMAT_TOKEN_PATTERN.finditer(format_string):
+        text.append(format_string[position : match.start()])
+        position = match.end()
+        if match.group() == "%%":
+            text.append("%")
+        else:
+            texts.append("".join(text))
+            text = []
+    text.append(format_string[position:])
+    texts.append("".join(text))
+    return texts
+
+
+class XmlFragmentWriter:
+    """A class that renders a template as a prologue, a per-transaction
+    fragment and an epilogue.
+
+    A template without a transaction loop, such as the templates of the
+    messages holding a single transaction, is rendered as a prologue only.
+
+    Methods:
+        __init__(self, source, environment): Compiles the template source.
+        iter_bytes(self, context): Yields the rendered document in blocks.
+        render(self, context): Returns the rendered document.
+        write(self, xml_file, context): Writes the rendered document.
+
+    Raises:
+        ValueError: If the transaction loop uses a construct the
+        `XmlByteWriter` does not support.
+    """
+
+    def __init__(self, source, environment):
+        """Compiles the template source.
+
+        Args:
+            source (str): The template source.
+            environment (jinja2.Environment): The environment compiling the
+                parts the `XmlByteWriter` does not support.
+
+        Raises:
+            ValueError: If the transaction loop or a part cannot be
+            compiled.
+        """
+        # Jinja2 removes a single trailing newline from templates
+        if source.endswith("\n"):
+            source = source[:-1]
+        try:
+            prologue, loop, epilogue = split_transaction_loop(source)
+        except ValueError:
+            # A template without a transaction loop is a single part
+            prologue, loop, epilogue = source, None, ""
+        self.prologue = self._compile_part(prologue, environment)
+        self.epilogue = self._compile_part(epilogue, environment)
+        self.conditions = []
+        self.variants = {}
+        if loop is None:
+            return
+
+        steps = XmlByteWriter(loop + "\n").steps
+        if len(steps) != 1 or steps[0][0] != "for":
+            raise ValueError("The transaction loop must be a single loop")
+        self._collect_conditions(steps[0][3])
+        if len(self.conditions) > MAX_FRAGMENT_CONDITIONS:
+            raise ValueError(
+                f"The transaction loop has more than {MAX_FRAGMENT_CONDITIONS}"
+                " {% if %} conditions"
+            )
+        # The pieces of the loop body for each combination of conditions
+        self.variants = {
+            values: self._flatten(steps[0][3], values)
+            for values in product((False, True), repeat=len(self.conditions))
+        }
+
+    @staticmethod
+    def _compile_part(source, environment):
+        """Compiles the prologue or the epilogue.
+
+        Returns:
+            The encoded part if it has no template tag, or an `XmlByteWriter`
+            or `jinja2.Template` rendering it.
+        """
+        if TAG_PATTERN.search(source) is None:
+            return source.encode("utf-8")
+        try:
+            return XmlByteWriter(source + "\n")
+        except ValueError:
+            pass
+        try:
+            return environment.from_string(source + "\n")
+        except TemplateSyntaxError as e:
+            raise ValueError(
+                f"The template part cannot be compiled: {e.message}"
+            ) from e
+
+    def _collect_conditions(self, steps):
+        """Lists the {% if %} conditions of the loop body, in order."""
+        for step in steps:
+            if step[0] == "if":
+                self.conditions.append(step[1])
+                self._collect_conditions(step[2])
+            elif step[0] == "for":
+                raise ValueError(
+                    "Nested loops are not supported in the transaction loop"
+                )
+
+    def _flatten(self, steps, values, pieces=None, conditions=None):
+        """Returns the pieces of the loop body for some condition values.
+
+        The pieces are literal texts and (source, name) fields, in order.
+        """
+        if pieces is None:
+            pieces = []
+            conditions = iter(values)
+        for step in steps:
+            if step[0] == "format":
+                texts = _split_format(step[1])
+                pieces.append(texts[0])
+                for field, text in zip(step[2], texts[1:]):
+                    pieces.append(field)
+                    pieces.append(text)
+            elif next(conditions):
+                self._flatten(step[2], values, pieces, conditions)
+            else:
+                # Skip the values of the conditions nested in the block
+                for _ in range(self._count_conditions(step[2])):
+                    next(conditions)
+        return pieces
+
+    @classmethod
+    def _count_conditions(cls, steps):
+        return sum(
+            1 + cls._count_conditions(step[2])
+            for step in steps
+            if step[0] == "if"
+        )
+
+    @staticmethod
+    def _bind(pieces, context):
+        """Substitutes the message values into the pieces of the body.
+
+        Returns:
+            tuple: The format string of a transaction, and the item field
+            names of its value slots, None standing for the loop index.
+        """
+        format_parts = []
+        names = []
+        for piece in pieces:
+            if piece.__class__ is str:
+                format_parts.append(piece.replace("%", "%%"))
+            elif piece[0] == CONTEXT:
+                value = escape_xml_value(_get(context, piece[1]))
+                format_parts.append(value.replace("%", "%%"))
+            else:
+                format_parts.append("%s")
+                names.append(piece[1])
+        return "".join(format_parts), names
+
+    def _render_part(self, part, context):
+        """Renders the prologue or the epilogue to bytes."""
+        if part.__class__ is bytes:
+            return part
+        if isinstance(part, XmlByteWriter):
+            return part.render(context)
+        return part.render(**context).encode("utf-8")
+
+    def _iter_fragments(self, context):
+        """Renders the loop body for each transaction.
+
+        Yields:
+            str: The rendered body of each transaction.
+        """
+        if not self.variants:
+            return
+        # Conditions on message values are evaluated once per message
+        fixed = {}
+        item_conditions = []
+        for position, (source, name) in enumerate(self.conditions):
+            if source == CONTEXT:
+                fixed[position] = bool(_get(context, name))
+            else:
+                item_conditions.append((position, name))
+
+        # Bind the format string of each combination of item conditions
+        table = {}
+        for item_values in product((False, True), repeat=len(item_conditions)):
+            values = dict(fixed)
+            for (position, _), value in zip(item_conditions, item_values):
+                values[position] = value
+            table[item_values] = self._bind(
+                self.variants[tuple(values[i] for i in sorted(values))],
+                context,
+            )
+
+        condition_names = [name for _, name in item_conditions]
+        format_string, names = table[(False,) * len(item_conditions)]
+        items = _get(context, TRANSACTIONS) or ()
+        for index, item in enumerate(items, 1):
+            get = item.get if item.__class__ is dict else partial(_get, item)
+            if condition_names:
+                format_string, names = table[
+                    tuple(
+                        [
+                            bool(index if name is None else get(name, ""))
+                            for name in condition_names
+                        ]
+                    )
+                ]
+            yield format_string % tuple(
+                [
+                    escape_xml_value(index if name is None else get(name, ""))
+                    for name in names
+                ]
+            )
+
+    def iter_bytes(self, context):
+        """Renders a document and yields it as UTF-8 encoded blocks.
+
+        Args:
+            context (dict): The template variables.
+
+        Yields:
+            bytes: The prologue, the transactions `BLOCK_SIZE` at a time and
+            the epilogue.
+        """
+        yield self._render_part(self.prologue, context)
+        fragments = []
+        for fragment in self._iter_fragments(context):
+            fragments.append(fragment)
+            if len(fragments) >= BLOCK_SIZE:
+                yield "".join(fragments).encode("utf-8")
+                fragments.clear()
+        if fragments:
+            yield "".join(fragments).encode("utf-8")
+        yield self._render_part(self.epilogue, context)
+
+    def render(self, context):
+        """Renders a document.
+
+        Args:
+            context (dict): The template variables.
+
+        Returns:
+            bytes: The UTF-8 encoded document.
+        """
+        return b"".join(self.iter_bytes(context))
+
+    def write(self, xml_file, context):
+        """Renders a document into a binary file.
+
+        Args:
+            xml_file (io.BufferedIOBase): The file to write to.
+            context (dict): The template variables.
+
+        Returns:
+            None
+        """
+        for block in self.iter_bytes(context):
+            xml_file.write(block)
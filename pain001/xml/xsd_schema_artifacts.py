@@ -0,0 +1,221 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module persists compiled `xmlschema.XMLSchema` objects for the bundled
+pain.001 schemas to a versioned on-disk cache, so that short-lived processes
+can skip the XSD compilation step.
+
+Artifacts are pickled into a directory named after the pain001, xmlschema
+and Python versions, and each artifact file name embeds the SHA-256 hash of
+the XSD it was built from. A changed XSD therefore never matches a stale
+artifact and is rebuilt on first use. An artifact is only unpickled if it
+and its directory belong to the current user and cannot be written by
+anyone else, see `is_private_cache_file`; otherwise the schema is compiled.
+
+Run ``python -m pain001.xml.xsd_schema_artifacts`` to prebuild every bundled
+schema, for example while building a container image.
+"""
+
+import glob
+import logging
+import os
+import pickle  # nosec B403 - artifacts are written by this module only
+import sys
+import tempfile
+
+import xmlschema
+
+from pain001.constants.constants import TEMPLATES_DIRECTORY, valid_xml_types
+from pain001.xml.compute_file_digest import compute_file_digest
+from pain001.xml.get_cache_directory import (
+    get_cache_directory,
+    is_private_cache_file,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_schema_cache_directory():
+    """Returns the versioned directory holding the schema artifacts.
+
+    The base directory is read from the ``PAIN001_SCHEMA_CACHE_DIR``
+    environment variable and defaults to ``$XDG_CACHE_HOME/pain001/schemas``
+    (``~/.cache/pain001/schemas``).
+
+    Returns:
+        str: The path to the versioned artifact directory.
+    """
+    return get_cache_directory("schemas", "PAIN001_SCHEMA_CACHE_DIR")
+
+
+def get_artifact_path(xsd_file_path, digest, cache_directory):
+    """Returns the artifact file path for a schema and its content hash.
+
+    Args:
+        xsd_file_path (str): The path to the XSD schema file.
+        digest (str): The SHA-256 digest of the XSD schema file.
+        cache_directory (str): The versioned artifact directory.
+
+    Returns:
+        str: The path to the artifact file.
+    """
+    base_name = os.path.splitext(os.path.basename(xsd_file_path))[0]
+    return os.path.join(cache_directory, f"{base_name}-{digest}.pickle")
+
+
+def load_schema_artifact(xsd_file_path, digest, cache_directory):
+    """Loads a compiled schema from the artifact cache.
+
+    Args:
+        xsd_file_path (str): The path to the XSD schema file.
+        digest (str): The SHA-256 digest of the XSD schema file.
+        cache_directory (str): The versioned artifact directory.
+
+    Returns:
+        xmlschema.XMLSchema: The compiled schema, or None if no usable
+        artifact exists, or if the artifact could have been written by
+        another user.
+    """
+    artifact_path = get_artifact_path(xsd_file_path, digest, cache_directory)
+    try:
+        with open(artifact_path, "rb") as file:
+            if not is_private_cache_file(file, cache_directory):
+                logger.warning(
+                    "Ignoring artifact '%s' writable by other users",
+                    artifact_path,
+                )
+                return None
+            # The artifact was written by the current user only
+            payload = pickle.load(file)  # nosec B301
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug("Ignoring unreadable artifact '%s': %s", artifact_path, e)
+        return None
+
+    if not isinstance(payload, dict) or payload.get("digest") != digest:
+        logger.debug("Ignoring mismatched artifact '%s'", artifact_path)
+        return None
+
+    return payload["schema"]
+
+
+def save_schema_artifact(xsd_file_path, digest, schema, cache_directory):
+    """Saves a compiled schema to the artifact cache.
+
+    The artifact is written to a temporary file and atomically moved into
+    place, and older artifacts built from a previous version of the same XSD
+    are removed. Failures are logged and otherwise ignored, as the cache is
+    only an optimisation.
+
+    Args:
+        xsd_file_path (str): The path to the XSD schema file.
+        digest (str): The SHA-256 digest of the XSD schema file.
+        schema (xmlschema.XMLSchema): The compiled schema.
+        cache_directory (str): The versioned artifact directory.
+
+    Returns:
+        str: The path to the artifact file, or None if it was not written.
+    """
+    artifact_path = get_artifact_path(xsd_file_path, digest, cache_directory)
+    try:
+        os.makedirs(cache_directory, mode=0o700, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=cache_directory, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump(
+                    {"digest": digest, "schema": schema},
+                    file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_path, artifact_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except Exception as e:
+        logger.debug("Could not write artifact '%s': %s", artifact_path, e)
+        return None
+
+    # Remove the artifacts built from older versions of this XSD
+    stale_pattern = get_artifact_path(xsd_file_path, "*", cache_directory)
+    for stale_path in glob.glob(stale_pattern):
+        if stale_path != artifact_path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+    return artifact_path
+
+
+def get_bundled_xsd_file_paths():
+    """Returns the paths to the XSD schemas bundled with the library.
+
+    Returns:
+        list: The paths to the bundled XSD schema files.
+    """
+    xsd_file_paths = []
+    for message_type in valid_xml_types:
+        xsd_file_path = os.path.join(
+            TEMPLATES_DIRECTORY, message_type, f"{message_type}.xsd"
+        )
+        if os.path.isfile(xsd_file_path):
+            xsd_file_paths.append(xsd_file_path)
+    return xsd_file_paths
+
+
+def build_schema_artifacts(cache_directory=None, force=False):
+    """Prebuilds the artifacts for every bundled pain.001 schema.
+
+    Args:
+        cache_directory (str, optional): The versioned artifact directory.
+        Defaults to the directory returned by `get_schema_cache_directory`.
+        force (bool): Rebuild artifacts that are already up to date.
+
+    Returns:
+        list: The paths to the artifact files that were built or reused.
+    """
+    if cache_directory is None:
+        cache_directory = get_schema_cache_directory()
+
+    artifact_paths = []
+    for xsd_file_path in get_bundled_xsd_file_paths():
+        digest = compute_file_digest(xsd_file_path)
+        artifact_path = get_artifact_path(
+            xsd_file_path, digest, cache_directory
+        )
+        if not force and (
+            load_schema_artifact(xsd_file_path, digest, cache_directory)
+            is not None
+        ):
+            artifact_paths.append(artifact_path)
+            continue
+
+        schema = xmlschema.XMLSchema(xsd_file_path)
+        if save_schema_artifact(
+            xsd_file_path, digest, schema, cache_directory
+        ):
+            artifact_paths.append(artifact_path)
+
+    return artifact_paths
+
+
+if __name__ == "__main__":
+    target_directory = sys.argv[1] if len(sys.argv) > 1 else None
+    for path in build_schema_artifacts(target_directory, force=True):
+        print(f"Built schema artifact `{path}`")
@@ -0,0 +1,232 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains the `XsdSchemaRegistry` class, a process-wide cache of
+compiled `xmlschema.XMLSchema` objects.
+
+Compiling one of the pain.001 XSD schemas takes hundreds of milliseconds, so
+the registry keeps every compiled schema keyed by its absolute path,
+modification time and SHA-256 content hash. The schemas bundled with the
+library are always kept, while custom schemas are held in a bounded LRU.
+
+Bundled schemas are also persisted to the on-disk artifact cache managed by
+`pain001.xml.xsd_schema_artifacts`, so a fresh process loads them instead of
+compiling them again.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import xmlschema
+
+from pain001.constants.constants import TEMPLATES_DIRECTORY
+from pain001.xml.compute_file_digest import compute_file_digest
+from pain001.xml.xsd_schema_artifacts import (
+    get_schema_cache_directory,
+    load_schema_artifact,
+    save_schema_artifact,
+)
+
+
+class XsdSchemaRegistry:
+    """A class that caches compiled XSD schemas for the whole process.
+
+    Methods:
+        __init__(self, max_custom_schemas, artifact_directory): Initializes
+            an empty registry.
+        get_instance(): Returns the singleton instance of the class.
+        get_schema(self, xsd_file_path): Returns the compiled schema.
+        get_digest(self, xsd_file_path): Returns the schema content hash.
+        cache_info(self): Returns the cache counters.
+        clear(self): Drops every cached schema and resets the counters.
+    """
+
+    instance = None
+
+    def __init__(self, max_custom_schemas=16, artifact_directory=""):
+        """Initializes an empty registry.
+
+        Args:
+            max_custom_schemas (int): The maximum number of custom (not
+            bundled) schemas kept in the LRU cache.
+            artifact_directory (str, optional): The on-disk artifact cache
+            for the bundled schemas. Defaults to the directory returned by
+            `get_schema_cache_directory`; None disables the on-disk cache.
+
+        Raises:
+            ValueError: If max_custom_schemas is lower than 1.
+        """
+        if max_custom_schemas < 1:
+            raise ValueError("max_custom_schemas must be at least 1.")
+        if artifact_directory == "":
+            artifact_directory = get_schema_cache_directory()
+        self.max_custom_schemas = max_custom_schemas
+        self.artifact_directory = artifact_directory
+        self.hits = 0
+        self.misses = 0
+        self.artifact_hits = 0
+        self._bundled = {}
+        self._custom = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def get_instance():
+        """Returns the singleton instance of the class.
+
+        Returns:
+            An XsdSchemaRegistry instance.
+        """
+        if XsdSchemaRegistry.instance is None:
+            XsdSchemaRegistry.instance = XsdSchemaRegistry()
+        return XsdSchemaRegistry.instance
+
+    @staticmethod
+    def is_bundled(xsd_file_path):
+        """Checks whether a schema is one of the bundled pain.001 schemas.
+
+        Args:
+            xsd_file_path (str): The path to the XSD schema file.
+
+        Returns:
+            bool: True if the schema lives in the bundled templates directory.
+        """
+        path = os.path.abspath(xsd_file_path)
+        return os.path.commonpath([path, TEMPLATES_DIRECTORY]) == (
+            TEMPLATES_DIRECTORY
+        )
+
+    def _lookup(self, xsd_file_path):
+        """Returns the up-to-date cache entry for a schema.
+
+        The schema is only hashed when its modification time or size changed
+        since the last lookup, and only recompiled when its content changed.
+
+        Args:
+            xsd_file_path (str): The path to the XSD schema file.
+
+        Returns:
+            dict: The cache entry holding the stat signature, the digest and
+            the compiled schema.
+        """
+        path = os.path.abspath(xsd_file_path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        bundled = self.is_bundled(path)
+        cache = self._bundled if bundled else self._custom
+
+        with self._lock:
+            entry = cache.get(path)
+            if entry is not None and entry["signature"] == signature:
+                self.hits += 1
+            else:
+                digest = compute_file_digest(path)
+                if entry is not None and entry["digest"] == digest:
+                    entry["signature"] = signature
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    entry = {
+                        "signature": signature,
+                        "digest": digest,
+                        "schema": self._load(path, digest, bundled),
+                    }
+                    cache[path] = entry
+
+            if not bundled:
+                cache.move_to_end(path)
+                while len(cache) > self.max_custom_schemas:
+                    cache.popitem(last=False)
+
+            return entry
+
+    def _load(self, path, digest, bundled):
+        """Loads a schema from the artifact cache or compiles it.
+
+        Args:
+            path (str): The absolute path to the XSD schema file.
+            digest (str): The SHA-256 digest of the XSD schema file.
+            bundled (bool): Whether the schema is a bundled schema.
+
+        Returns:
+            xmlschema.XMLSchema: The compiled schema.
+        """
+        use_artifacts = bundled and self.artifact_directory is not None
+        if use_artifacts:
+            schema = load_schema_artifact(
+                path, digest, self.artifact_directory
+            )
+            if schema is not None:
+                self.artifact_hits += 1
+                return schema
+
+        schema = xmlschema.XMLSchema(path)
+        if use_artifacts:
+            save_schema_artifact(path, digest, schema, self.artifact_directory)
+        return schema
+
+    def get_schema(self, xsd_file_path):
+        """Returns the compiled schema for an XSD file.
+
+        Args:
+            xsd_file_path (str): The path to the XSD schema file.
+
+        Returns:
+            xmlschema.XMLSchema: The compiled schema.
+
+        Raises:
+            FileNotFoundError: If the XSD schema file does not exist.
+            xmlschema.XMLSchemaException: If the XSD schema is invalid.
+        """
+        return self._lookup(xsd_file_path)["schema"]
+
+    def get_digest(self, xsd_file_path):
+        """Returns the SHA-256 content hash of a cached XSD file.
+
+        Args:
+            xsd_file_path (str): The path to the XSD schema file.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the schema.
+        """
+        return self._lookup(xsd_file_path)["digest"]
+
+    def cache_info(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and misses served from the
+            artifact cache, and the number of bundled and custom schemas
+            currently cached.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "artifact_hits": self.artifact_hits,
+                "bundled": len(self._bundled),
+                "custom": len(self._custom),
+                "max_custom_schemas": self.max_custom_schemas,
+            }
+
+    def clear(self):
+        """Drops every cached schema and resets the counters."""
+        with self._lock:
+            self._bundled.clear()
+            self._custom.clear()
+            self.hits = 0
+            self.misses = 0
+            self.artifact_hits = 0
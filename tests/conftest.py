@@ -0,0 +1,49 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pain001.xml.template_registry import TemplateRegistry
+from pain001.xml.validation_result_cache import ValidationResultCache
+from pain001.xml.xsd_schema_registry import XsdSchemaRegistry
+
+CACHE_DIRECTORY_VARIABLES = (
+    "PAIN001_SCHEMA_CACHE_DIR",
+    "PAIN001_TEMPLATE_CACHE_DIR",
+    "PAIN001_VALIDATION_CACHE_DIR",
+)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_home(tmp_path_factory):
+    """Points the on-disk caches to a temporary directory, so that the
+    tests never write to the cache directories of the user.
+
+    The singletons are created again on first use, inside the temporary
+    directory, and worker processes inherit the environment.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv(
+            "XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache"))
+        )
+        for variable in CACHE_DIRECTORY_VARIABLES:
+            monkeypatch.delenv(variable, raising=False)
+        for singleton in (
+            TemplateRegistry,
+            ValidationResultCache,
+            XsdSchemaRegistry,
+        ):
+            monkeypatch.setattr(singleton, "instance", None)
+        yield
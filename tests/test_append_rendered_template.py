@@ -0,0 +1,52 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import xml.etree.ElementTree as et
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.append_rendered_template import append_rendered_template
+from pain001.xml.message_field_specs import project_message_data
+from pain001.xml.template_registry import TemplateRegistry
+
+
+class TestAppendRenderedTemplate(unittest.TestCase):
+    def test_children_match_the_rendered_document(self):
+        """
+        Test that the appended children are those of the rendered document.
+        """
+        path = "pain001/templates/pain.001.001.03/template.xml"
+        rows = load_csv_data("pain001/templates/pain.001.001.03/template.csv")
+        xml_data = project_message_data("pain.001.001.03", rows)
+
+        parent = et.Element("CstmrCdtTrfInitn", {"a": "1"})
+        parent.text = "kept"
+        self.assertIs(append_rendered_template(parent, path, xml_data), parent)
+
+        document = et.fromstring(
+            TemplateRegistry.get_instance()
+            .get_template(path)
+            .render(**xml_data)
+        )
+        self.assertEqual(parent.text, "kept")
+        self.assertEqual(parent.attrib, {"a": "1"})
+        self.assertEqual(
+            [et.tostring(child) for child in parent],
+            [et.tostring(child) for child in document],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
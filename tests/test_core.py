@@ -14,7 +14,10 @@
 # limitations under the License.
 
 
+import csv
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch
 from io import StringIO
@@ -246,6 +249,89 @@ class TestProcessFiles(unittest.TestCase):
             )
             mock_generate_xml.assert_called_once()
 
+    def test_valid_csv_data_is_streamed(self):
+        with patch("pain001.core.core.generate_xml") as mock_generate_xml:
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.csv_file_path,
+                single_pass=True,
+            )
+        rows = mock_generate_xml.call_args[0][0]
+        self.assertNotIsInstance(rows, list)
+        self.assertTrue(list(rows))
+
+    def test_invalid_csv_data_is_streamed(self):
+        with patch("pain001.core.core.generate_xml") as mock_generate_xml:
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.invalid_csv_file_path,
+                group_payments=True,
+            )
+        with patch("sys.stdout", new_callable=StringIO):
+            with self.assertRaises(ValueError):
+                list(mock_generate_xml.call_args[0][0])
+
+    def test_invalid_streamed_row_writes_nothing(self):
+        template_directory = "pain001/templates/pain.001.001.03"
+        temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+        self.addCleanup(shutil.rmtree, temp_dir)
+        xml_file_path = os.path.join(temp_dir, "template.xml")
+        csv_file_path = os.path.join(temp_dir, "data.csv")
+        shutil.copy(
+            os.path.join(template_directory, "template.xml"), xml_file_path
+        )
+        with open(os.path.join(template_directory, "template.csv")) as f:
+            rows = list(csv.DictReader(f))
+        rows.insert(2, {**rows[0], "payment_amount": "invalid"})
+        with open(csv_file_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                with self.assertRaises(ValueError):
+                    with self.assertLogs(level="ERROR") as log:
+                        process_files(
+                            self.xml_message_type,
+                            xml_file_path,
+                            os.path.join(
+                                template_directory, "pain.001.001.03.xsd"
+                            ),
+                            csv_file_path,
+                            streaming=streaming,
+                        )
+                self.assertIn("Error: Invalid CSV data.", log.output[0])
+                self.assertEqual(
+                    sorted(os.listdir(temp_dir)),
+                    ["data.csv", "template.xml"],
+                )
+
+    def test_csv_data_is_parsed_in_parallel(self):
+        with patch("pain001.core.core.generate_xml") as mock_generate_xml:
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.csv_file_path,
+                csv_workers=2,
+            )
+        rows = mock_generate_xml.call_args[0][0]
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual(next(rows)["id"], "1")
+        with self.assertRaises(ValueError):
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.invalid_csv_file_path,
+                csv_workers=2,
+            )
+
     def test_valid_sqlite_data(self):
         with (
             patch("pain001.core.core.load_db_data", return_value=[{}]),
@@ -257,9 +343,56 @@ class TestProcessFiles(unittest.TestCase):
                 self.xml_template_file_path,
                 self.xsd_schema_file_path,
                 self.sqlite_file_path,
+                max_transactions=1,
             )
             mock_generate_xml.assert_called_once()
 
+    def test_sqlite_data_is_streamed(self):
+        with (
+            patch(
+                "pain001.core.core.iter_db_data", return_value=iter([{}])
+            ) as mock_iter_db_data,
+            patch("pain001.core.core.generate_xml") as mock_generate_xml,
+        ):
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.sqlite_file_path,
+            )
+        mock_iter_db_data.assert_called_once()
+        with self.assertRaises(ValueError):
+            list(mock_generate_xml.call_args[0][0])
+
+    def test_sqlite_columns_and_filters(self):
+        with (
+            patch(
+                "pain001.core.core.iter_db_data", return_value=iter([{}])
+            ) as mock_iter_db_data,
+            patch("pain001.core.core.generate_xml"),
+        ):
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.sqlite_file_path,
+                db_filters={"batch_id": "B1"},
+            )
+        kwargs = mock_iter_db_data.call_args[1]
+        self.assertEqual(kwargs["filters"], {"batch_id": "B1"})
+        self.assertIn("creditor_name", kwargs["columns"])
+        self.assertNotIn("charge_account_IBAN", kwargs["columns"])
+
+    def test_filters_on_csv_data(self):
+        with self.assertRaises(ValueError):
+            process_files(
+                self.xml_message_type,
+                self.xml_template_file_path,
+                self.xsd_schema_file_path,
+                self.csv_file_path,
+                db_filters={"batch_id": "B1"},
+            )
+
     def test_invalid_sqlite_data(self):
         with (
             patch("pain001.core.core.load_db_data", return_value=[{}]),
@@ -271,6 +404,7 @@ class TestProcessFiles(unittest.TestCase):
                     self.xml_template_file_path,
                     self.xsd_schema_file_path,
                     self.sqlite_file_path,
+                    max_transactions=1,
                 )
 
     def test_unsupported_data_file_type(self):
@@ -0,0 +1,143 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import unittest
+import xml.etree.ElementTree as et
+
+from pain001.xml.create_validation_report import (
+    ValidationError,
+    create_validation_report,
+)
+
+DIRECTORY = "pain001/templates/pain.001.001.03/"
+XML_FILE = DIRECTORY + "pain.001.001.03.xml"
+XSD_FILE = DIRECTORY + "pain.001.001.03.xsd"
+
+
+class TestCreateValidationReport(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method. Builds a message whose second and fourth
+        transactions are invalid.
+        """
+        with open(XML_FILE) as f:
+            content = f.read()
+        start = content.index("<CdtTrfTxInf>")
+        end = content.index("</CdtTrfTxInf>") + len("</CdtTrfTxInf>")
+        transaction = content[start:end]
+        invalid = transaction.replace("<ChrgBr>", "<Bogus/><ChrgBr>")
+        self.invalid_content = (
+            content[:start]
+            + transaction
+            + invalid
+            + transaction
+            + invalid
+            + content[end:]
+        ).encode("utf-8")
+
+    def test_valid_file(self):
+        """
+        Test that a valid file produces an empty report.
+        """
+        report = create_validation_report(XML_FILE, XSD_FILE)
+        self.assertTrue(report.is_valid)
+        self.assertFalse(report.truncated)
+        self.assertEqual(report.as_dict()["error_count"], 0)
+
+    def test_errors_carry_path_and_transaction_index(self):
+        """
+        Test that every error is collected with its XPath and transaction.
+        """
+        report = create_validation_report(self.invalid_content, XSD_FILE)
+        self.assertFalse(report.is_valid)
+        self.assertFalse(report.truncated)
+        self.assertEqual(
+            [error.transaction_index for error in report.errors], [2, 4]
+        )
+        self.assertEqual(
+            report.errors[0].path,
+            "/Document/CstmrCdtTrfInitn/PmtInf/CdtTrfTxInf[2]",
+        )
+        self.assertIn("Bogus", report.errors[0].reason)
+        self.assertIn("(transaction 2)", str(report.errors[0]))
+
+    def test_max_errors(self):
+        """
+        Test that validation stops once the maximum is reached.
+        """
+        report = create_validation_report(
+            self.invalid_content, XSD_FILE, max_errors=1
+        )
+        self.assertEqual(len(report.errors), 1)
+        self.assertTrue(report.truncated)
+
+    def test_fail_fast(self):
+        """
+        Test that fail-fast stops at the first error.
+        """
+        tree = et.fromstring(self.invalid_content)
+        report = create_validation_report(
+            tree, XSD_FILE, max_errors=None, fail_fast=True
+        )
+        self.assertEqual(len(report.errors), 1)
+        self.assertTrue(report.as_dict()["truncated"])
+
+    def test_lazy_file(self):
+        """
+        Test that lazy validation reports the same transactions.
+        """
+        with open("invalid_report_test.xml", "wb") as f:
+            f.write(self.invalid_content)
+        try:
+            report = create_validation_report(
+                "invalid_report_test.xml", XSD_FILE, lazy=True
+            )
+        finally:
+            os.remove("invalid_report_test.xml")
+        self.assertEqual(
+            [error.transaction_index for error in report.errors], [2, 4]
+        )
+
+    def test_malformed_content(self):
+        """
+        Test that a parse error is reported as a document level error.
+        """
+        report = create_validation_report("<Document>", XSD_FILE)
+        self.assertFalse(report.is_valid)
+        self.assertIsNone(report.errors[0].path)
+        self.assertTrue(str(report.errors[0]).startswith("document: "))
+
+    def test_invalid_max_errors(self):
+        """
+        Test that max_errors must be positive.
+        """
+        with self.assertRaises(ValueError):
+            create_validation_report(XML_FILE, XSD_FILE, max_errors=0)
+
+    def test_error_outside_transaction(self):
+        """
+        Test that errors outside CdtTrfTxInf have no transaction index.
+        """
+        error = ValidationError("reason", "/{urn:x}Document/{urn:x}GrpHdr")
+        self.assertEqual(error.path, "/Document/GrpHdr")
+        self.assertIsNone(error.transaction_index)
+        single = ValidationError("reason", "/Document/PmtInf/CdtTrfTxInf/Amt")
+        self.assertEqual(single.transaction_index, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
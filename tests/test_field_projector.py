@@ -0,0 +1,145 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from pain001.constants.constants import valid_xml_types
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.field_projector import FieldProjector, RowView
+from pain001.xml.message_field_specs import (
+    MESSAGE_FIELD_SPECS,
+    get_field_projectors,
+    get_required_columns,
+    project_message_data,
+)
+
+
+class TestFieldProjector(unittest.TestCase):
+    def test_projects_renamed_fields(self):
+        """
+        Test that fields are read from their columns and renamed.
+        """
+        projector = FieldProjector(["id", ("town", "town_name")])
+        self.assertEqual(
+            projector({"id": "1", "town_name": "Paris", "other": "x"}),
+            {"id": "1", "town": "Paris"},
+        )
+
+    def test_missing_columns_use_aliases_and_defaults(self):
+        """
+        Test that rows missing a column fall back to aliases and defaults.
+        """
+        projector = FieldProjector(
+            [("town", ("town", "town_name")), ("currency", "currency", "EUR")]
+        )
+        self.assertEqual(
+            projector.project([{"town_name": "Paris"}, {"town": "Rome"}]),
+            [
+                {"town": "Paris", "currency": "EUR"},
+                {"town": "Rome", "currency": "EUR"},
+            ],
+        )
+
+    def test_missing_required_column_raises(self):
+        """
+        Test that a missing column without a default raises a KeyError.
+        """
+        projector = FieldProjector(["id", "name"])
+        with self.assertRaises(KeyError):
+            projector({"id": "1"})
+        self.assertEqual(
+            FieldProjector(["id", "name"], default="")({"id": "1"}),
+            {"id": "1", "name": ""},
+        )
+
+    def test_views_do_not_copy_complete_rows(self):
+        """
+        Test that complete rows are wrapped in views instead of being copied.
+        """
+        rows = [{"id": "1", "town_name": "Paris"}, {"id": "2"}]
+        views = list(
+            FieldProjector(["id", ("town", "town_name", "")]).views(rows)
+        )
+        self.assertIsInstance(views[0], RowView)
+        self.assertEqual(dict(views[0]), {"id": "1", "town": "Paris"})
+        self.assertEqual(views[0].get("other", "x"), "x")
+        self.assertEqual(views[1], {"id": "2", "town": ""})
+
+        rows[0]["town_name"] = "Rome"
+        self.assertEqual(views[0]["town"], "Rome")
+
+        identity = FieldProjector(["id"]).views(rows)
+        self.assertIs(next(iter(identity)), rows[0])
+
+    def test_views_are_lazy(self):
+        """
+        Test that views are built while iterating over a stream of rows.
+        """
+        projector = FieldProjector(["id", "name"])
+        views = iter(projector.views(iter([{"id": "1", "name": "a"}, {}])))
+        self.assertEqual(next(views)["name"], "a")
+        with self.assertRaises(KeyError):
+            next(views)
+
+    def test_invalid_entry_raises(self):
+        """
+        Test that a malformed spec entry raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            FieldProjector([("id",)])
+
+    def test_every_message_type_has_a_spec(self):
+        """
+        Test that the bundled templates of every message type are projected.
+        """
+        for message_type in valid_xml_types[:7]:
+            with self.subTest(message_type=message_type):
+                self.assertIn(message_type, MESSAGE_FIELD_SPECS)
+                data = load_csv_data(
+                    f"pain001/templates/{message_type}/template.csv"
+                )
+                xml_data = project_message_data(message_type, data)
+                self.assertEqual(xml_data["id"], data[0]["id"])
+                if get_field_projectors(message_type)[1] is not None:
+                    transactions = list(xml_data["transactions"])
+                    self.assertEqual(len(transactions), len(data))
+
+    def test_required_columns_project_the_message(self):
+        """
+        Test that rows holding only the required columns of a message type
+        are projected like the complete rows.
+        """
+        for message_type in valid_xml_types[:7]:
+            with self.subTest(message_type=message_type):
+                columns = get_required_columns(message_type)
+                self.assertIn("id", columns)
+                data = load_csv_data(
+                    f"pain001/templates/{message_type}/template.csv"
+                )
+                projected = [
+                    {k: v for k, v in row.items() if k in columns}
+                    for row in data
+                ]
+                for projector in get_field_projectors(message_type):
+                    if projector is not None:
+                        self.assertEqual(
+                            projector.project(projected),
+                            projector.project(data),
+                        )
+
+
+if __name__ == "__main__":
+    unittest.main()
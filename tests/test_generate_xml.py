@@ -467,6 +467,33 @@ class TestXMLCreation(unittest.TestCase):
         cstmr_cdt_trf_initn_element = self.root[0]
         self.assertEqual(cstmr_cdt_trf_initn_element.tag, "CstmrCdtTrfInitn")
 
+    def test_create_xml_reads_its_own_columns(self):
+        """
+        Test that create_xml_v4 and create_xml_v6 keep reading their own
+        columns when a row also holds the columns read by generate_xml.
+        """
+        row_v4 = {
+            **self.row_v4,
+            "initiator_street_name": "Other Street",
+            "initiator_town_name": "Other Town",
+            "initiator_country_code": "FR",
+            "payment_id": "Other PID",
+            "debtor_street_name": "Other Street",
+            "debtor_town_name": "Other Town",
+            "debtor_country_code": "FR",
+        }
+        create_xml_v4(self.root, [row_v4])
+        self.assertEqual(self.root.find(".//{*}PmtInfId").text, "PI001")
+        address = self.root.find(".//{*}InitgPty/{*}PstlAdr")
+        self.assertEqual(address.find("{*}StrtNm").text, "Main Street")
+        self.assertEqual(address.find("{*}TwnNm").text, "Anytown")
+        self.assertEqual(address.find("{*}Ctry").text, "US")
+
+        root = ET.Element("Root")
+        create_xml_v6(root, [{**self.row_v6, "initiator_town": "Other"}])
+        address = root.find(".//{*}InitgPty/{*}PstlAdr")
+        self.assertEqual(address.find("{*}TwnNm").text, "Town 6")
+
     def test_create_xml_v7(self):
         """
         Test create_xml_v7
@@ -0,0 +1,175 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as et
+from contextlib import redirect_stdout
+from decimal import Decimal
+from io import StringIO
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.generate_xml import generate_xml
+
+TEMPLATES = "pain001/templates"
+
+
+class TestGenerateXmlGrouped(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.temp_dir)
+
+    def generate(self, message_type, rows, **kwargs):
+        """Generates a grouped file and returns its content."""
+        template_directory = os.path.join(TEMPLATES, message_type)
+        xml_file_path = os.path.join(self.temp_dir, "template.xml")
+        shutil.copy(
+            os.path.join(template_directory, "template.xml"), xml_file_path
+        )
+        with redirect_stdout(StringIO()):
+            generate_xml(
+                rows,
+                message_type,
+                xml_file_path,
+                os.path.join(template_directory, f"{message_type}.xsd"),
+                **kwargs,
+            )
+        with open(
+            os.path.join(self.temp_dir, f"{message_type}.xml"), "rb"
+        ) as xml_file:
+            return xml_file.read()
+
+    def test_a_block_per_group(self):
+        """
+        Test that mixed rows give one PmtInf block per debtor account,
+        execution date and charge bearer, with every engine.
+        """
+        rows = load_csv_data(f"{TEMPLATES}/pain.001.001.03/template.csv")
+        namespace = {"p": "urn:iso:std:iso:20022:tech:xsd:pain.001.001.03"}
+        for engine in ("jinja", "direct", "fragment"):
+            with self.subTest(engine=engine):
+                stream = (
+                    dict(rows[index % len(rows)], payment_id=f"P{index}")
+                    for index in range(10)
+                )
+                root = et.fromstring(
+                    self.generate(
+                        "pain.001.001.03",
+                        stream,
+                        engine=engine,
+                        group_payments=True,
+                        max_rows_in_memory=3,
+                    )
+                )
+                self.assertEqual(
+                    root.find(".//p:GrpHdr/p:NbOfTxs", namespace).text, "10"
+                )
+                blocks = root.findall(".//p:PmtInf", namespace)
+                self.assertEqual(len(blocks), len(rows))
+                for block in blocks:
+                    transactions = block.findall("p:CdtTrfTxInf", namespace)
+                    self.assertEqual(
+                        block.find("p:NbOfTxs", namespace).text,
+                        str(len(transactions)),
+                    )
+                    self.assertEqual(
+                        Decimal(block.find("p:CtrlSum", namespace).text),
+                        sum(
+                            Decimal(
+                                transaction.find(
+                                    ".//p:InstdAmt", namespace
+                                ).text
+                            )
+                            for transaction in transactions
+                        ),
+                    )
+                    account = block.find(
+                        "p:DbtrAcct/p:Id/p:Othr/p:Id", namespace
+                    )
+                    row = next(
+                        row
+                        for row in rows
+                        if row["debtor_account_IBAN"] == account.text
+                    )
+                    self.assertEqual(
+                        block.find("p:ReqdExctnDt", namespace).text,
+                        row["requested_execution_date"],
+                    )
+                    for charge_bearer in block.iterfind(
+                        ".//p:ChrgBr", namespace
+                    ):
+                        self.assertEqual(
+                            charge_bearer.text, row["charge_bearer"]
+                        )
+
+    def test_single_group_matches_ungrouped_output(self):
+        """
+        Test that rows of a single group give the ungrouped document with
+        the totals of its payment information block.
+        """
+        rows = load_csv_data(f"{TEMPLATES}/pain.001.001.09/template.csv")
+        data = [
+            dict(rows[0], payment_id=f"P{index}", nb_of_txs="3")
+            for index in range(3)
+        ]
+        ctrl_sum = format(Decimal(rows[0]["payment_amount"]) * 3, "f")
+        for compact in (False, True):
+            with self.subTest(compact=compact):
+                totals = (
+                    f"<NbOfTxs>3</NbOfTxs><CtrlSum>{ctrl_sum}</CtrlSum>"
+                    if compact
+                    else f"\n\t\t\t<NbOfTxs>3</NbOfTxs>"
+                    f"\n\t\t\t<CtrlSum>{ctrl_sum}</CtrlSum>"
+                )
+                self.assertEqual(
+                    self.generate(
+                        "pain.001.001.09",
+                        data,
+                        group_payments=True,
+                        compact=compact,
+                    ),
+                    self.generate(
+                        "pain.001.001.09", data, compact=compact
+                    ).replace(
+                        b"</PmtMtd>", b"</PmtMtd>" + totals.encode("utf-8")
+                    ),
+                )
+
+    def test_grouping_cannot_be_split(self):
+        """
+        Test that grouping and splitting into files are exclusive.
+        """
+        rows = load_csv_data(f"{TEMPLATES}/pain.001.001.09/template.csv")
+        with self.assertRaises(SystemExit):
+            self.generate(
+                "pain.001.001.09",
+                rows,
+                group_payments=True,
+                max_transactions=1,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as et
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.generate_xml import generate_xml
+from pain001.xml.generate_xml_shards import (
+    get_shard_message_id,
+    plan_shards,
+)
+
+TEMPLATES = "pain001/templates"
+
+
+class TestPlanShards(unittest.TestCase):
+    def test_split_by_transaction_count(self):
+        """
+        Test that shards hold at most the maximum number of transactions.
+        """
+        self.assertEqual(
+            plan_shards([0] * 5, max_transactions=2),
+            [(0, 2), (2, 4), (4, 5)],
+        )
+
+    def test_split_by_size(self):
+        """
+        Test that shards, header included, hold at most the maximum size.
+        """
+        self.assertEqual(
+            plan_shards([30, 30, 50, 10], header_size=20, max_bytes=100),
+            [(0, 2), (2, 4)],
+        )
+
+    def test_oversized_transaction_raises(self):
+        """
+        Test that a transaction larger than a whole file raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            plan_shards([10, 90], header_size=20, max_bytes=100)
+
+    def test_message_id_fits_in_35_characters(self):
+        """
+        Test that suffixed message identifications are truncated to fit.
+        """
+        self.assertEqual(get_shard_message_id("MSG", 7, 3), "MSG-007")
+        message_id = get_shard_message_id("M" * 35, 12, 3)
+        self.assertEqual(len(message_id), 35)
+        self.assertTrue(message_id.endswith("-012"))
+
+
+class TestGenerateXmlShards(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.temp_dir)
+
+    def generate(self, message_type, count, invalid=(), output=None, **kwargs):
+        """Generates a split batch of `count` transactions, with an invalid
+        creditor BIC in the transactions whose indexes are in `invalid`."""
+        template_directory = os.path.join(TEMPLATES, message_type)
+        xml_file_path = os.path.join(self.temp_dir, "template.xml")
+        shutil.copy(
+            os.path.join(template_directory, "template.xml"), xml_file_path
+        )
+        rows = load_csv_data(os.path.join(template_directory, "template.csv"))
+        data = [
+            dict(rows[index % len(rows)], payment_id=f"P{index}")
+            for index in range(count)
+        ]
+        for index in invalid:
+            data[index]["creditor_agent_BIC"] = "INVALID"
+        kwargs.setdefault("max_workers", 1)
+        with redirect_stdout(output or StringIO()):
+            generate_xml(
+                data,
+                message_type,
+                xml_file_path,
+                os.path.join(template_directory, f"{message_type}.xsd"),
+                **kwargs,
+            )
+        manifest_path = os.path.join(
+            self.temp_dir, f"{message_type}-manifest.json"
+        )
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    def test_shards_have_their_own_totals(self):
+        """
+        Test that each file gets its own MsgId, NbOfTxs and control sum.
+        """
+        manifest = self.generate("pain.001.001.03", 5, max_transactions=2)
+        self.assertEqual(manifest["nb_of_txs"], 5)
+        self.assertEqual(
+            [entry["nb_of_txs"] for entry in manifest["files"]], [2, 2, 1]
+        )
+
+        namespace = {"p": "urn:iso:std:iso:20022:tech:xsd:pain.001.001.03"}
+        for number, entry in enumerate(manifest["files"], 1):
+            root = et.parse(entry["xml_file_path"]).getroot()
+            header = root.find("p:CstmrCdtTrfInitn/p:GrpHdr", namespace)
+            self.assertEqual(
+                header.find("p:MsgId", namespace).text, f"1-{number:03d}"
+            )
+            self.assertEqual(
+                header.find("p:NbOfTxs", namespace).text,
+                str(entry["nb_of_txs"]),
+            )
+            self.assertEqual(
+                len(root.findall(".//p:CdtTrfTxInf", namespace)),
+                entry["nb_of_txs"],
+            )
+
+    def test_shards_fit_in_max_bytes(self):
+        """
+        Test that no file is larger than the maximum size.
+        """
+        manifest = self.generate(
+            "pain.001.001.09", 20, max_bytes=6000, engine="direct"
+        )
+        self.assertGreater(len(manifest["files"]), 1)
+        self.assertEqual(
+            sum(entry["nb_of_txs"] for entry in manifest["files"]), 20
+        )
+        for entry in manifest["files"]:
+            self.assertLessEqual(entry["size"], 6000)
+            self.assertEqual(
+                os.path.getsize(entry["xml_file_path"]), entry["size"]
+            )
+
+    def test_invalid_shard_removes_the_batch(self):
+        """
+        Test that an invalid file removes the files already written and
+        leaves no manifest.
+        """
+        for max_workers in (1, 2):
+            with self.subTest(max_workers=max_workers):
+                output = StringIO()
+                with self.assertRaises(SystemExit):
+                    self.generate(
+                        "pain.001.001.03",
+                        6,
+                        invalid=(2,),
+                        output=output,
+                        max_transactions=2,
+                        max_workers=max_workers,
+                    )
+                self.assertEqual(os.listdir(self.temp_dir), ["template.xml"])
+                self.assertIn(
+                    "Could not generate `"
+                    + os.path.join(self.temp_dir, "pain.001.001.03-002.xml"),
+                    output.getvalue(),
+                )
+
+    def test_single_transaction_template_cannot_be_split(self):
+        """
+        Test that a template without a transaction loop is not split.
+        """
+        with self.assertRaises(SystemExit):
+            self.generate("pain.001.001.05", 3, max_transactions=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
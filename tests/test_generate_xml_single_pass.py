@@ -0,0 +1,95 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as et
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.generate_xml import generate_xml
+
+TEMPLATES = "pain001/templates"
+
+
+class TestGenerateXmlSinglePass(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.temp_dir)
+
+    def generate(self, message_type, rows, engine="jinja"):
+        """Generates a file in a single pass and returns its root."""
+        template_directory = os.path.join(TEMPLATES, message_type)
+        xml_file_path = os.path.join(self.temp_dir, "template.xml")
+        shutil.copy(
+            os.path.join(template_directory, "template.xml"), xml_file_path
+        )
+        with redirect_stdout(StringIO()):
+            generate_xml(
+                rows,
+                message_type,
+                xml_file_path,
+                os.path.join(template_directory, f"{message_type}.xsd"),
+                engine=engine,
+                single_pass=True,
+            )
+        return et.parse(
+            os.path.join(self.temp_dir, f"{message_type}.xml")
+        ).getroot()
+
+    def test_number_of_transactions_is_computed(self):
+        """
+        Test that NbOfTxs counts the streamed transactions instead of being
+        read from the first row.
+        """
+        rows = load_csv_data(f"{TEMPLATES}/pain.001.001.09/template.csv")
+        namespace = {"p": "urn:iso:std:iso:20022:tech:xsd:pain.001.001.09"}
+        for engine in ("jinja", "direct", "fragment"):
+            with self.subTest(engine=engine):
+                stream = (
+                    dict(rows[index % len(rows)], nb_of_txs="1")
+                    for index in range(7)
+                )
+                root = self.generate("pain.001.001.09", stream, engine)
+                self.assertEqual(
+                    root.find(".//p:GrpHdr/p:NbOfTxs", namespace).text, "7"
+                )
+                self.assertEqual(
+                    len(root.findall(".//p:CdtTrfTxInf", namespace)), 7
+                )
+
+    def test_single_transaction_template_is_rejected(self):
+        """
+        Test that a template without a transaction loop is rejected.
+        """
+        rows = load_csv_data(f"{TEMPLATES}/pain.001.001.05/template.csv")
+        with self.assertRaises(SystemExit):
+            self.generate("pain.001.001.05", rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
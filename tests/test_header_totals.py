@@ -0,0 +1,99 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import tempfile
+import unittest
+from decimal import InvalidOperation
+
+from pain001.xml.header_totals import (
+    PLACEHOLDER_WIDTH,
+    HeaderTotals,
+    PlaceholderScanner,
+)
+
+
+class TestHeaderTotals(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        file_descriptor, self.path = tempfile.mkstemp()
+        os.close(file_descriptor)
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        os.remove(self.path)
+
+    def test_totals(self):
+        """
+        Test that transactions are counted and their amounts summed.
+        """
+        totals = HeaderTotals("pain.001.001.09")
+        for transaction in [
+            {"payment_amount": "10.5"},
+            {"payment_amount": " 0.25"},
+        ]:
+            totals.add(transaction)
+        self.assertEqual(
+            totals.as_dict(),
+            {"nb_of_txs": "2", "payment_nb_of_txs": "2", "ctrl_sum": "10.75"},
+        )
+        with self.assertRaises(InvalidOperation):
+            HeaderTotals("pain.001.001.09").add({"payment_amount": "x"})
+
+    def test_placeholders_are_patched(self):
+        """
+        Test that placeholders split across writes are found and patched.
+        """
+        totals = HeaderTotals("pain.001.001.03")
+        placeholder = totals.placeholders()["nb_of_txs"].encode()
+        self.assertEqual(len(placeholder), PLACEHOLDER_WIDTH)
+        document = b"<a><n>" + placeholder + b"</n><t>1</t><t>2</t></a>"
+
+        with open(self.path, "wb") as xml_file:
+            scanner = PlaceholderScanner(xml_file, totals.placeholders())
+            for start in range(0, len(document), 5):
+                scanner.write(document[start : start + 5])
+        for transaction in totals.accumulate(
+            [{"payment_amount": "1"}, {"payment_amount": "2"}]
+        ):
+            pass
+        totals.patch(self.path, scanner.offsets)
+
+        with open(self.path, "rb") as xml_file:
+            patched = xml_file.read()
+        self.assertEqual(len(patched), len(document))
+        self.assertTrue(patched.startswith(b"<a><n>2</n>" + b" " * 31))
+        self.assertTrue(patched.endswith(b"<t>1</t><t>2</t></a>"))
+
+    def test_placeholder_outside_element_raises(self):
+        """
+        Test that a placeholder not followed by a closing tag is rejected.
+        """
+        totals = HeaderTotals("pain.001.001.03")
+        placeholder = totals.placeholders()["nb_of_txs"].encode()
+        with open(self.path, "wb") as xml_file:
+            scanner = PlaceholderScanner(xml_file, totals.placeholders())
+            scanner.write(b'<a n="' + placeholder + b'"/>')
+        with self.assertRaises(ValueError):
+            totals.patch(self.path, scanner.offsets)
+
+
+if __name__ == "__main__":
+    unittest.main()
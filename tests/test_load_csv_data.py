@@ -17,7 +17,11 @@
 import unittest
 import os
 import csv
-from pain001.csv.load_csv_data import load_csv_data
+from pain001.csv.load_csv_data import (
+    iter_csv_chunks,
+    iter_csv_data,
+    load_csv_data,
+)
 from pain001.csv.validate_csv_data import validate_csv_data
 
 
@@ -491,6 +495,24 @@ class TestLoadCsvData(unittest.TestCase):
         data = load_csv_data(file_path)
         self.assertEqual(len(data), 1)
 
+    def test_iter_csv_data(self):
+        file_path = "tests/data/valid_data.csv"
+        rows = iter_csv_data(file_path)
+        self.assertEqual(next(rows)["id"], "1")
+        self.assertEqual([row["id"] for row in rows], ["2", "3", "4"])
+
+    def test_iter_empty_csv(self):
+        with self.assertRaises(ValueError):
+            list(iter_csv_data("tests/data/empty.csv"))
+
+    def test_iter_csv_chunks(self):
+        file_path = "tests/data/valid_data.csv"
+        chunks = list(iter_csv_chunks(file_path, chunk_size=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+        self.assertEqual(sum(chunks, []), load_csv_data(file_path))
+        with self.assertRaises(ValueError):
+            next(iter_csv_chunks(file_path, chunk_size=0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,170 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import csv
+import os
+import unittest
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.csv.load_csv_data_parallel import (
+    find_record_end,
+    iter_csv_data_parallel,
+    split_csv_ranges,
+)
+
+
+class TestLoadCsvDataParallel(unittest.TestCase):
+    def setUp(self):
+        """Create test files before each test."""
+        os.makedirs("tests/data", exist_ok=True)
+        self.csv_file_path = "tests/data/parallel_data.csv"
+        self.invalid_csv_file_path = "tests/data/parallel_invalid_data.csv"
+        self.empty_csv_file_path = "tests/data/parallel_empty.csv"
+
+        rows = load_csv_data("pain001/templates/pain.001.001.03/template.csv")
+        fieldnames = list(rows[0])
+        self.rows = []
+        for index in range(200):
+            row = dict(rows[index % len(rows)])
+            row["payment_id"] = f"Payment-{index}"
+            # Quoted fields with line breaks, commas, quotes and accents
+            row["remittance_information"] = f'Line "{index}",\nnext é'
+            self.rows.append(row)
+
+        with open(self.csv_file_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+        with open(self.invalid_csv_file_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames)
+            writer.writeheader()
+            writer.writerows(self.rows)
+            writer.writerow({**self.rows[0], "payment_amount": "invalid"})
+
+        with open(self.empty_csv_file_path, "w") as f:
+            f.write("")
+
+    def tearDown(self):
+        """Remove test files after each test."""
+        for file_path in (
+            self.csv_file_path,
+            self.invalid_csv_file_path,
+            self.empty_csv_file_path,
+        ):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_rows_are_loaded_in_order(self):
+        """
+        Test that the rows are the rows of `load_csv_data`, in order, for
+        ranges splitting the file between quoted line breaks.
+        """
+        expected = load_csv_data(self.csv_file_path)
+        self.assertEqual(expected, self.rows)
+        for max_workers in (1, 2):
+            for range_size in (1, 700, 1 << 20):
+                with self.subTest(
+                    max_workers=max_workers, range_size=range_size
+                ):
+                    self.assertEqual(
+                        list(
+                            iter_csv_data_parallel(
+                                self.csv_file_path,
+                                max_workers=max_workers,
+                                range_size=range_size,
+                            )
+                        ),
+                        expected,
+                    )
+
+    def test_line_breaks_are_normalized(self):
+        """
+        Test that "\r\n" line breaks, inside and outside quoted fields, are
+        read like `load_csv_data` reads them.
+        """
+        with open(self.csv_file_path, "w", newline="\r\n") as f:
+            writer = csv.DictWriter(f, list(self.rows[0]), lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+        expected = load_csv_data(self.csv_file_path)
+        self.assertEqual(
+            expected[0]["remittance_information"], 'Line "0",\nnext é'
+        )
+        for range_size in (1, 700):
+            with self.subTest(range_size=range_size):
+                self.assertEqual(
+                    list(
+                        iter_csv_data_parallel(
+                            self.csv_file_path,
+                            max_workers=2,
+                            range_size=range_size,
+                        )
+                    ),
+                    expected,
+                )
+
+    def test_invalid_csv_data(self):
+        """
+        Test that an invalid row raises a ValueError.
+        """
+        for max_workers in (1, 2):
+            with self.subTest(max_workers=max_workers):
+                with self.assertRaises(ValueError):
+                    list(
+                        iter_csv_data_parallel(
+                            self.invalid_csv_file_path,
+                            max_workers=max_workers,
+                            range_size=4096,
+                        )
+                    )
+
+    def test_empty_csv_file(self):
+        """
+        Test that an empty file or a file with only a header raises a
+        ValueError.
+        """
+        with self.assertRaises(ValueError):
+            list(iter_csv_data_parallel(self.empty_csv_file_path))
+        with open(self.empty_csv_file_path, "w") as f:
+            f.write("id,date\n")
+        with self.assertRaises(ValueError):
+            list(iter_csv_data_parallel(self.empty_csv_file_path))
+
+    def test_missing_csv_file(self):
+        """
+        Test that a missing file raises a FileNotFoundError.
+        """
+        with self.assertRaises(FileNotFoundError):
+            list(iter_csv_data_parallel("tests/data/missing.csv"))
+
+    def test_split_csv_ranges(self):
+        """
+        Test that the ranges end after newlines outside quoted fields.
+        """
+        buffer = b'a,b\n1,"x\ny"\n2,"""z\n"""\n3,4'
+        self.assertEqual(find_record_end(buffer, 0, 0), 4)
+        self.assertEqual(find_record_end(buffer, 4, 8), 12)
+        self.assertEqual(
+            split_csv_ranges(buffer, 4, 1),
+            [(4, 12), (12, 23), (23, 26)],
+        )
+        self.assertEqual(split_csv_ranges(buffer, 4, 100), [(4, 26)])
+
+
+if __name__ == "__main__":
+    unittest.main()
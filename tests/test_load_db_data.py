@@ -14,9 +14,21 @@
 # limitations under the License.
 
 
+import logging
 import pytest
 import sqlite3
-from pain001.db.load_db_data import sanitize_table_name, load_db_data
+from pain001.db.load_db_data import (
+    DB_READ_PRAGMAS,
+    build_select_query,
+    connect_read_only,
+    is_wal_database,
+    dict_row_factory,
+    iter_db_chunks,
+    iter_db_data,
+    load_db_data,
+    parse_db_filters,
+    sanitize_table_name,
+)
 
 
 # Test sanitize_table_name function
@@ -58,6 +70,234 @@ def test_load_db_data(tmp_path):
         load_db_data(db_file, "non_existent_table")
 
 
+# Test iter_db_chunks and iter_db_data functions
+def test_iter_db_chunks(tmp_path):
+    db_file = tmp_path / "test.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany(
+        "INSERT INTO test_table (name) VALUES (?)",
+        [(f"name{index}",) for index in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+    chunks = list(iter_db_chunks(db_file, "test_table", chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[2][0] == {"id": 5, "name": "name4"}
+    assert [row["id"] for row in iter_db_data(db_file, "test_table")] == [
+        1,
+        2,
+        3,
+        4,
+        5,
+    ]
+    assert load_db_data(db_file, "test_table") == sum(chunks, [])
+
+    with pytest.raises(ValueError):
+        next(iter_db_chunks(db_file, "test_table", chunk_size=0))
+    with pytest.raises(FileNotFoundError):
+        next(iter_db_data("non_existent.db", "test_table"))
+
+
+# Test dict_row_factory function
+def test_dict_row_factory():
+    row_factory = dict_row_factory(("id", "name"))
+    assert row_factory(None, (1, "Alice")) == {"id": 1, "name": "Alice"}
+
+
+# Test build_select_query function
+def test_build_select_query():
+    table_columns = ["id", "batch_id", "status", "date"]
+    assert build_select_query("t", table_columns) == ("SELECT * FROM t", [])
+    assert build_select_query(
+        "t",
+        table_columns,
+        columns={"date", "id", "missing"},
+        filters={
+            "batch_id": "B1",
+            "status": ["NEW", "READY"],
+            "date": ("2024-01-01", None),
+        },
+    ) == (
+        'SELECT "id", "date" FROM t WHERE "batch_id" = ? AND '
+        '"status" IN (?, ?) AND "date" >= ? ORDER BY rowid',
+        ["B1", "NEW", "READY", "2024-01-01"],
+    )
+    assert build_select_query(
+        "t", table_columns, filters={"id": 1}, keep_order=False
+    ) == ('SELECT * FROM t WHERE "id" = ?', [1])
+    with pytest.raises(ValueError):
+        build_select_query("t", table_columns, columns={"missing"})
+    with pytest.raises(ValueError):
+        build_select_query("t", table_columns, filters={"id; --": 1})
+
+
+# Test parse_db_filters function
+def test_parse_db_filters():
+    assert parse_db_filters(
+        ["batch_id=B1", "status=NEW", "status=READY", "date=..2024-01-31"]
+    ) == {
+        "batch_id": "B1",
+        "status": ["NEW", "READY"],
+        "date": (None, "2024-01-31"),
+    }
+    with pytest.raises(ValueError):
+        parse_db_filters(["batch_id"])
+
+
+# Test load_db_data function with columns and filters
+def test_load_db_data_with_columns_and_filters(tmp_path):
+    db_file = tmp_path / "test.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE pain001 (id INTEGER, date TEXT, note TEXT)")
+    conn.executemany(
+        "INSERT INTO pain001 VALUES (?, ?, ?)",
+        [(index, f"2024-01-0{index}", "x" * 100) for index in range(1, 6)],
+    )
+    conn.commit()
+    conn.close()
+
+    data = load_db_data(
+        db_file,
+        "pain001",
+        columns={"id", "date", "other"},
+        filters={"date": ("2024-01-02", "2024-01-04")},
+    )
+    assert data == [
+        {"id": 2, "date": "2024-01-02"},
+        {"id": 3, "date": "2024-01-03"},
+        {"id": 4, "date": "2024-01-04"},
+    ]
+    with pytest.raises(sqlite3.OperationalError):
+        load_db_data(db_file, "non_existent_table", columns={"id"})
+
+
+# Test load_db_data function with filters on a table without rowid
+def test_load_db_data_without_rowid(tmp_path):
+    db_file = tmp_path / "test.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE pain001 (id TEXT PRIMARY KEY, date TEXT) WITHOUT ROWID"
+    )
+    conn.executemany(
+        "INSERT INTO pain001 VALUES (?, ?)",
+        [(f"P{index}", f"2024-01-0{index}") for index in range(1, 6)],
+    )
+    conn.commit()
+    conn.close()
+
+    data = load_db_data(
+        db_file, "pain001", filters={"date": ("2024-01-02", "2024-01-03")}
+    )
+    assert data == [
+        {"id": "P2", "date": "2024-01-02"},
+        {"id": "P3", "date": "2024-01-03"},
+    ]
+
+
+# Test connect_read_only function
+def test_connect_read_only(tmp_path, monkeypatch, caplog):
+    db_file = tmp_path / "test db%.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE pain001 (id INTEGER)")
+    conn.commit()
+    conn.close()
+
+    with caplog.at_level(logging.DEBUG, logger="pain001.db.load_db_data"):
+        conn = connect_read_only(db_file)
+    try:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert (
+            conn.execute("PRAGMA cache_size").fetchone()[0]
+            == DB_READ_PRAGMAS["cache_size"]
+        )
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO pain001 VALUES (1)")
+    finally:
+        conn.close()
+    assert "read-only (mode=ro)" in caplog.text
+    assert "'mmap_size'" in caplog.text
+
+    # The environment variable opens the database as immutable
+    monkeypatch.setenv("PAIN001_SQLITE_IMMUTABLE", "1")
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger="pain001.db.load_db_data"):
+        assert load_db_data(db_file, "pain001") == []
+    assert "immutable=1" in caplog.text
+
+    # The loaders never create a missing database
+    with pytest.raises(sqlite3.OperationalError):
+        connect_read_only(tmp_path / "missing.db")
+
+
+def test_connect_read_only_wal_database(tmp_path, monkeypatch):
+    db_file = tmp_path / "wal.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE pain001 (id INTEGER)")
+    conn.execute("INSERT INTO pain001 VALUES (1)")
+    conn.commit()
+    conn.close()
+    assert is_wal_database(db_file)
+    assert not is_wal_database(tmp_path / "missing.db")
+
+    # No -shm or -wal file is left next to the database
+    for immutable in ("0", "1"):
+        monkeypatch.setenv("PAIN001_SQLITE_IMMUTABLE", immutable)
+        assert load_db_data(db_file, "pain001") == [{"id": 1}]
+        assert [path.name for path in tmp_path.iterdir()] == ["wal.db"]
+
+    monkeypatch.delenv("PAIN001_SQLITE_IMMUTABLE")
+    conn = connect_read_only(db_file)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO pain001 VALUES (2)")
+    finally:
+        conn.close()
+    with pytest.raises(sqlite3.OperationalError):
+        connect_read_only(tmp_path / "missing.db")
+    assert [path.name for path in tmp_path.iterdir()] == ["wal.db"]
+
+
+def test_connect_read_only_wal_frames(tmp_path):
+    db_file = tmp_path / "wal.db"
+    writer = sqlite3.connect(db_file)
+    writer.execute("PRAGMA journal_mode = WAL")
+    writer.execute("PRAGMA wal_autocheckpoint = 0")
+    writer.execute("CREATE TABLE pain001 (id INTEGER)")
+    writer.commit()
+    writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    # The row is only in the -wal file, which is never checkpointed
+    writer.execute("INSERT INTO pain001 VALUES (1)")
+    writer.commit()
+    db_bytes = db_file.read_bytes()
+    wal_bytes = (tmp_path / "wal.db-wal").read_bytes()
+    try:
+        assert load_db_data(db_file, "pain001") == [{"id": 1}]
+        assert db_file.read_bytes() == db_bytes
+    finally:
+        writer.close()
+
+    # After a crash of the writer, the -wal file is still read
+    crash_directory = tmp_path / "crash"
+    crash_directory.mkdir()
+    crash_file = crash_directory / "wal.db"
+    crash_file.write_bytes(db_bytes)
+    (crash_directory / "wal.db-wal").write_bytes(wal_bytes)
+    assert load_db_data(crash_file, "pain001") == [{"id": 1}]
+    assert crash_file.read_bytes() == db_bytes
+    assert (crash_directory / "wal.db-wal").read_bytes() == wal_bytes
+
+    # A -wal file that cannot be read raises a clear error
+    (crash_directory / "wal.db-wal").unlink()
+    (crash_directory / "wal.db-wal").mkdir()
+    with pytest.raises(sqlite3.OperationalError, match="WAL journal mode"):
+        connect_read_only(crash_file)
+    assert crash_file.read_bytes() == db_bytes
+
+
 # If the script is executed directly, run the tests
 if __name__ == "__main__":
     pytest.main()
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from unittest.mock import patch
+
 from click.testing import CliRunner
 from pain001.__main__ import cli
 
@@ -161,3 +163,65 @@ class TestMain:
         )
         assert result.exit_code == 1
         assert "The data file 'invalid' does not exist." in result.output
+
+    def test_validate_with_valid_files(self):
+        result = self.runner.invoke(
+            cli,
+            [
+                "validate",
+                "--workers",
+                "1",
+                "pain001/templates/pain.001.001.03/pain.001.001.03.xml",
+                "pain001/templates/pain.001.001.09/pain.001.001.09.xml",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "VALID" in result.output
+        assert "INVALID" not in result.output
+        assert "Validation summary" in result.output
+
+    def test_validate_with_invalid_file_as_json(self):
+        result = self.runner.invoke(
+            cli,
+            [
+                "validate",
+                "--json",
+                "--workers",
+                "1",
+                "--xsd_schema_file_path",
+                "tests/data/invalid.xsd",
+                "pain001/templates/pain.001.001.03/pain.001.001.03.xml",
+            ],
+        )
+        assert result.exit_code == 1
+        lines = result.output.strip().splitlines()
+        assert len(lines) == 1
+        assert '"is_valid": false' in lines[0]
+
+    def test_help_lists_subcommands(self):
+        for option in ("--help", "-h"):
+            result = self.runner.invoke(cli, [option])
+            assert result.exit_code == 0
+            assert "generate" in result.output
+            assert "validate" in result.output
+        result = self.runner.invoke(cli, ["generate", "--help"])
+        assert result.exit_code == 0
+        assert "--xml_message_type" in result.output
+
+    def test_main_cache_flags(self):
+        options = [
+            "--xml_message_type",
+            self.xml_message_type,
+            "--xml_template_file_path",
+            self.xml_file,
+            "--xsd_schema_file_path",
+            self.xsd_file,
+            "--data_file_path",
+            self.csv_file,
+        ]
+        for flags, expected in (([], True), (["--no_cache"], False)):
+            with patch("pain001.__main__.process_files") as process_files:
+                result = self.runner.invoke(cli, [*options, *flags])
+            assert result.exit_code == 0
+            kwargs = process_files.call_args[1]
+            assert kwargs["use_validation_cache"] is expected
@@ -0,0 +1,100 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as et
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.generate_xml import generate_xml
+from pain001.xml.minify_template import minify_template_source
+
+
+def strip_whitespace(xml_content):
+    """Returns a document without its whitespace-only text and tails."""
+    root = et.fromstring(xml_content)
+    for element in root.iter():
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        if element.tail is not None and not element.tail.strip():
+            element.tail = None
+    return et.tostring(root)
+
+
+class TestMinifyTemplate(unittest.TestCase):
+    def test_whitespace_between_tags_is_removed(self):
+        """
+        Test that only the whitespace between tags and block statements is
+        removed.
+        """
+        self.assertEqual(
+            minify_template_source(
+                "<?xml version='1.0'?>\n<a>\n\t<b>\n\t\t{{ v }} x</b>\n"
+                "\t{% for i in t %}\n\t<c> </c>\n\t{% endfor %}\n</a>\n"
+            ),
+            "<?xml version='1.0'?><a><b>\n\t\t{{ v }} x</b>"
+            "{% for i in t %}<c></c>{% endfor %}</a>\n",
+        )
+
+    def test_compact_output_is_the_same_document(self):
+        """
+        Test that compact output is smaller, identical with both engines,
+        and the same document as the indented output.
+        """
+        temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+        self.addCleanup(shutil.rmtree, temp_dir)
+        template_directory = "pain001/templates/pain.001.001.03"
+        xml_file_path = os.path.join(temp_dir, "template.xml")
+        shutil.copy(
+            os.path.join(template_directory, "template.xml"), xml_file_path
+        )
+        rows = load_csv_data(os.path.join(template_directory, "template.csv"))
+
+        outputs = {}
+        for engine, compact in (
+            ("jinja", False),
+            ("jinja", True),
+            ("direct", True),
+        ):
+            with redirect_stdout(StringIO()):
+                generate_xml(
+                    rows,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    os.path.join(template_directory, "pain.001.001.03.xsd"),
+                    engine=engine,
+                    compact=compact,
+                )
+            with open(
+                os.path.join(temp_dir, "pain.001.001.03.xml"), "rb"
+            ) as xml_file:
+                outputs[engine, compact] = xml_file.read()
+
+        self.assertEqual(outputs["jinja", True], outputs["direct", True])
+        self.assertLess(
+            len(outputs["jinja", True]), len(outputs["jinja", False]) // 2
+        )
+        self.assertEqual(
+            strip_whitespace(outputs["jinja", True]),
+            strip_whitespace(outputs["jinja", False]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.payment_groups import PaymentGroups
+
+
+class TestPaymentGroups(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        rows = load_csv_data("pain001/templates/pain.001.001.09/template.csv")
+        self.rows = [
+            dict(rows[index % 2], payment_id=str(index), payment_amount="1.5")
+            for index in range(9)
+        ]
+
+    def test_rows_are_grouped_in_order(self):
+        """
+        Test that groups keep their first appearance order and their rows
+        keep the input order, whether or not they were spilled to disk.
+        """
+        for max_rows_in_memory in (100, 2):
+            with self.subTest(max_rows_in_memory=max_rows_in_memory):
+                with PaymentGroups(
+                    "pain.001.001.09", max_rows_in_memory
+                ) as groups:
+                    groups.extend(iter(self.rows))
+                    self.assertEqual(len(groups), 2)
+                    self.assertEqual(
+                        [
+                            [row["payment_id"] for row in group]
+                            for group in groups
+                        ],
+                        [["0", "2", "4", "6", "8"], ["1", "3", "5", "7"]],
+                    )
+                    self.assertEqual(
+                        [
+                            group.totals.as_dict()["ctrl_sum"]
+                            for group in groups
+                        ],
+                        ["7.5", "6.0"],
+                    )
+                    self.assertEqual(groups.totals.as_dict()["nb_of_txs"], "9")
+                    spill_directory = groups.spill_directory
+                if spill_directory is not None:
+                    self.assertFalse(os.path.exists(spill_directory))
+                self.assertEqual(
+                    max_rows_in_memory == 2, bool(spill_directory)
+                )
+
+    def test_single_transaction_templates_cannot_be_grouped(self):
+        """
+        Test that message types without group fields are rejected.
+        """
+        with self.assertRaises(ValueError):
+            PaymentGroups("pain.001.001.05")
+
+
+if __name__ == "__main__":
+    unittest.main()
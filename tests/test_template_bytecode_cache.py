@@ -0,0 +1,117 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jinja2 import Environment
+
+from pain001.xml.template_bytecode_cache import (
+    build_template_bytecode,
+    get_bundled_template_names,
+    get_template_cache_directory,
+)
+from pain001.xml.template_registry import TemplateRegistry
+
+TEMPLATE = "pain001/templates/pain.001.001.03/template.xml"
+
+
+class TestTemplateBytecodeCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.cache_dir)
+
+    def test_cache_directory_is_versioned(self):
+        """
+        Test that the cache directory honours the environment variable.
+        """
+        with patch.dict(
+            os.environ, {"PAIN001_TEMPLATE_CACHE_DIR": self.cache_dir}
+        ):
+            cache_directory = get_template_cache_directory()
+        self.assertEqual(os.path.dirname(cache_directory), self.cache_dir)
+
+    def test_build_template_bytecode(self):
+        """
+        Test that the bytecode of every bundled template is built.
+        """
+        paths = build_template_bytecode(self.cache_dir)
+        self.assertEqual(len(paths), len(get_bundled_template_names()))
+        self.assertIn(TEMPLATE, get_bundled_template_names())
+        for path in paths:
+            self.assertTrue(os.path.isfile(path))
+
+    def test_registry_uses_prebuilt_bytecode(self):
+        """
+        Test that a fresh registry loads prebuilt templates without compiling
+        them.
+        """
+        build_template_bytecode(self.cache_dir)
+        registry = TemplateRegistry(bytecode_cache_directory=self.cache_dir)
+        with patch.object(Environment, "compile") as compile_template:
+            template = registry.get_template(TEMPLATE)
+            compile_template.assert_not_called()
+        self.assertIn("<CdtTrfTxInf>", template.render(transactions=[{}]))
+
+    def test_bytecode_writable_by_others_is_ignored(self):
+        """
+        Test that bytecode writable by other users is compiled again.
+        """
+        for path in build_template_bytecode(self.cache_dir):
+            os.chmod(path, 0o666)
+        registry = TemplateRegistry(bytecode_cache_directory=self.cache_dir)
+        with patch.object(
+            Environment, "compile", wraps=registry.environment.compile
+        ) as compile_template:
+            registry.get_template(TEMPLATE)
+            compile_template.assert_called_once()
+
+    def test_changed_template_is_recompiled(self):
+        """
+        Test that bytecode built from other template source is not reused.
+        """
+        temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+        try:
+            path = os.path.join(temp_dir, "template.xml")
+            with open(path, "w") as f:
+                f.write("<a>{{ value }}</a>")
+            TemplateRegistry(
+                bytecode_cache_directory=self.cache_dir
+            ).get_template(path)
+
+            with open(path, "w") as f:
+                f.write("<b>{{ value }}</b>")
+            template = TemplateRegistry(
+                bytecode_cache_directory=self.cache_dir
+            ).get_template(path)
+            self.assertEqual(template.render(value="x"), "<b>x</b>")
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
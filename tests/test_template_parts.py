@@ -0,0 +1,100 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from pain001.constants.constants import valid_xml_types
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.template_parts import (
+    compile_template_parts,
+    split_template_source,
+)
+from pain001.xml.template_registry import TemplateRegistry
+
+
+def render(template, context):
+    """Renders a jinja2.Template or a byte or fragment writer to bytes."""
+    if hasattr(template, "iter_bytes"):
+        return template.render(context)
+    return template.render(**context).encode("utf-8")
+
+
+class TestTemplateParts(unittest.TestCase):
+    def test_parts_render_like_the_template(self):
+        """
+        Test that the parts of the bundled templates rendered in turn give
+        the same bytes as the whole template, with every engine.
+        """
+        registry = TemplateRegistry(bytecode_cache_directory=None)
+        for message_type in valid_xml_types[:7]:
+            path = f"pain001/templates/{message_type}/template.xml"
+            rows = load_csv_data(
+                f"pain001/templates/{message_type}/template.csv"
+            )
+            context = {**rows[0], "transactions": rows}
+            for engine in ("jinja", "direct", "fragment"):
+                with self.subTest(message_type=message_type, engine=engine):
+                    parts = compile_template_parts(
+                        path, registry.environment, engine
+                    )
+                    whole = (
+                        registry.get_byte_writer(path)
+                        if engine == "direct"
+                        else registry.get_template(path)
+                    )
+                    self.assertEqual(
+                        b"".join(render(part, context) for part in parts),
+                        render(whole, context),
+                    )
+
+    def test_trailing_newlines_are_kept(self):
+        """
+        Test that a prologue ending with a newline keeps it.
+        """
+        file_descriptor, path = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(file_descriptor, "w") as template_file:
+            template_file.write("<a>\n<PmtInf>{{v}}</PmtInf>\n</a>\n")
+        try:
+            registry = TemplateRegistry(bytecode_cache_directory=None)
+            for engine in ("jinja", "direct", "fragment"):
+                with self.subTest(engine=engine):
+                    parts = compile_template_parts(
+                        path, registry.environment, engine
+                    )
+                    self.assertEqual(
+                        b"".join(render(part, {"v": 1}) for part in parts),
+                        b"<a>\n<PmtInf>1</PmtInf>\n</a>",
+                    )
+        finally:
+            os.remove(path)
+
+    def test_invalid_templates_raise(self):
+        """
+        Test that templates without exactly one element are rejected.
+        """
+        for source in (
+            "<a></a>",
+            "<PmtInf></PmtInf><PmtInf></PmtInf>",
+            "</PmtInf><PmtInf>",
+        ):
+            with self.subTest(source=source):
+                with self.assertRaises(ValueError):
+                    split_template_source(source)
+
+
+if __name__ == "__main__":
+    unittest.main()
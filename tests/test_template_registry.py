@@ -0,0 +1,113 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from jinja2 import TemplateNotFound
+
+from pain001.xml.template_registry import TemplateRegistry
+
+
+class TestTemplateRegistry(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method. Templates are loaded relative to the working
+        directory, so they are written to a directory below it.
+        """
+        self.temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+        self.registry = TemplateRegistry(bytecode_cache_directory=None)
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.temp_dir)
+
+    def write_template(self, content, mtime_offset=0):
+        path = os.path.join(self.temp_dir, "template.xml")
+        with open(path, "w") as f:
+            f.write(content)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+        return path
+
+    def test_template_is_compiled_once(self):
+        """
+        Test that repeated lookups reuse the compiled template.
+        """
+        path = self.write_template("<a>{{ value }}</a>")
+        first = self.registry.get_template(path)
+        self.assertIs(self.registry.get_template(path), first)
+        self.assertEqual(first.render(value="x&y"), "<a>x&amp;y</a>")
+        info = self.registry.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (1, 1))
+
+    def test_changed_template_is_recompiled(self):
+        """
+        Test that a template with a new modification time is recompiled.
+        """
+        path = self.write_template("<a>{{ value }}</a>")
+        first = self.registry.get_template(path)
+        self.write_template("<b>{{ value }}</b>", mtime_offset=10**9)
+        second = self.registry.get_template(path)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render(value="x"), "<b>x</b>")
+
+    def test_production_mode_never_reloads(self):
+        """
+        Test that a registry without auto reload keeps the first compiled
+        template.
+        """
+        registry = TemplateRegistry(
+            auto_reload=False, bytecode_cache_directory=None
+        )
+        path = self.write_template("<a>{{ value }}</a>")
+        first = registry.get_template(path)
+        self.write_template("<b>{{ value }}</b>", mtime_offset=10**9)
+        self.assertIs(registry.get_template(path), first)
+        self.assertFalse(registry.cache_info()["auto_reload"])
+
+    def test_missing_template(self):
+        """
+        Test that a missing template raises TemplateNotFound.
+        """
+        with self.assertRaises(TemplateNotFound):
+            self.registry.get_template(os.path.join(self.temp_dir, "none.xml"))
+
+    def test_clear(self):
+        """
+        Test that clear drops the templates and resets the counters.
+        """
+        self.registry.get_template(self.write_template("<a/>"))
+        self.registry.clear()
+        info = self.registry.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (0, 0))
+        self.assertEqual(info["templates"], 0)
+
+    def test_get_instance(self):
+        """
+        Test that get_instance returns a singleton.
+        """
+        self.assertIs(
+            TemplateRegistry.get_instance(), TemplateRegistry.get_instance()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,13 @@
 
 
 import unittest
-from pain001.csv.validate_csv_data import validate_csv_data
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pain001.csv.validate_csv_data import (
+    iter_validated_csv_data,
+    validate_csv_data,
+)
 
 
 class TestValidateCsvData(unittest.TestCase):
@@ -117,6 +123,51 @@ class TestValidateCsvData(unittest.TestCase):
         ]
         self.assertFalse(validate_csv_data(data))
 
+    def test_validate_csv_stream(self):
+        valid_row = {"id": "1", "date": "2023-03-10", "nb_of_txs": "1"}
+        with redirect_stdout(StringIO()) as stdout:
+            self.assertFalse(validate_csv_data(iter([valid_row])))
+            self.assertFalse(validate_csv_data(iter([])))
+        self.assertIn("Error: The CSV data is empty.", stdout.getvalue())
+
+    def test_iter_validated_csv_data(self):
+        data = [
+            {
+                "id": "1",
+                "date": "2023-03-10T15:30:47.000Z",
+                "nb_of_txs": "1",
+                "ctrl_sum": "150",
+                "initiator_name": "John Doe",
+                "payment_information_id": "Payment-Info-12345",
+                "payment_method": "TRF",
+                "batch_booking": "true",
+                "service_level_code": "SEPA",
+                "requested_execution_date": "2023-03-12",
+                "debtor_name": "Acme Corp",
+                "debtor_account_IBAN": "DE75512108001245126162",
+                "debtor_agent_BIC": "BANKDEFFXXX",
+                "forwarding_agent_BIC": "SPUEDE2UXXX",
+                "charge_bearer": "SLEV",
+                "payment_id": "PaymentID6789",
+                "payment_amount": "150",
+                "currency": "EUR",
+                "creditor_agent_BIC": "SPUEDE2UXXX",
+                "creditor_name": "Global Tech",
+                "creditor_account_IBAN": "DE68210501700024690959",
+                "remittance_information": "Invoice-12345",
+            }
+        ]
+        self.assertEqual(list(iter_validated_csv_data(iter(data))), data)
+
+        rows = iter_validated_csv_data(data + [dict(data[0], id="x")])
+        self.assertIs(next(rows), data[0])
+        with redirect_stdout(StringIO()) as stdout:
+            with self.assertRaises(ValueError):
+                next(rows)
+            with self.assertRaises(ValueError):
+                list(iter_validated_csv_data([]))
+        self.assertIn("Error: Invalid data type", stdout.getvalue())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -16,7 +16,10 @@
 
 import unittest
 from unittest.mock import patch
-from pain001.db.validate_db_data import validate_db_data
+from pain001.db.validate_db_data import (
+    iter_validated_db_data,
+    validate_db_data,
+)
 
 
 class TestValidateDbData(unittest.TestCase):
@@ -89,6 +92,16 @@ class TestValidateDbData(unittest.TestCase):
             invalid_data[0],
         )
 
+    @patch("pain001.db.validate_db_data.logger.error")
+    def test_iter_validated_db_data(self, mock_logging_error):
+        rows = iter_validated_db_data(
+            iter(self.valid_data + [{"id": None}, self.valid_data[0]])
+        )
+        self.assertIs(next(rows), self.valid_data[0])
+        with self.assertRaises(ValueError):
+            next(rows)
+        mock_logging_error.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+
+from pain001.xml.validate_files_via_xsd import (
+    collect_xml_files,
+    detect_message_type,
+    validate_files_via_xsd,
+)
+
+TEMPLATES = "pain001/templates"
+
+
+def copy_messages(tmp_path, versions):
+    for version in versions:
+        message_type = f"pain.001.001.{version}"
+        shutil.copy(
+            f"{TEMPLATES}/{message_type}/{message_type}.xml",
+            tmp_path / f"{message_type}.xml",
+        )
+
+
+def test_collect_xml_files(tmp_path):
+    copy_messages(tmp_path, ["03", "04"])
+    (tmp_path / "notes.txt").write_text("not xml")
+    assert collect_xml_files([str(tmp_path)]) == [
+        str(tmp_path / "pain.001.001.03.xml"),
+        str(tmp_path / "pain.001.001.04.xml"),
+    ]
+
+
+def test_detect_message_type(tmp_path):
+    copy_messages(tmp_path, ["05"])
+    assert (
+        detect_message_type(str(tmp_path / "pain.001.001.05.xml"))
+        == "pain.001.001.05"
+    )
+    other = tmp_path / "other.xml"
+    other.write_text("<root/>")
+    assert detect_message_type(str(other)) is None
+
+
+def test_validate_files_in_parallel(tmp_path):
+    copy_messages(tmp_path, ["03", "06", "09"])
+    (tmp_path / "other.xml").write_text("<root/>")
+    (tmp_path / "pain.001.001.07.xml").write_text(
+        '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.07">'
+        "<CstmrCdtTrfInitn/></Document>"
+    )
+
+    results = list(validate_files_via_xsd([str(tmp_path)], max_workers=2))
+
+    assert [result["is_valid"] for result in results] == [
+        False,
+        True,
+        True,
+        False,
+        True,
+    ]
+    assert results[0]["message_type"] is None
+    assert "message type" in results[0]["errors"][0]["reason"]
+    assert results[3]["message_type"] == "pain.001.001.07"
+    assert results[3]["error_count"] >= 1
+
+
+def test_validate_files_with_custom_schema():
+    results = list(
+        validate_files_via_xsd(
+            [f"{TEMPLATES}/pain.001.001.03/pain.001.001.03.xml"],
+            xsd_file_path="tests/data/invalid.xsd",
+        )
+    )
+    assert len(results) == 1
+    assert not results[0]["is_valid"]
+    assert results[0]["xsd_file_path"] == "tests/data/invalid.xsd"
@@ -16,7 +16,11 @@
 
 import unittest
 import os
-from pain001.xml.validate_via_xsd import validate_via_xsd
+import xml.etree.ElementTree as et
+from pain001.xml.validate_via_xsd import (
+    validate_content_via_xsd,
+    validate_via_xsd,
+)
 
 # Test if the XML file is validated correctly against the XSD schema
 
@@ -88,3 +92,45 @@ class TestValidateViaXsd(unittest.TestCase):
         """
         assert not validate_via_xsd(self.invalid_xml_file, self.xsd_file)
         assert not validate_via_xsd(self.invalid_xml_file, self.xsd_file)
+
+    def test_lazy_validation(self):
+        """
+        Test case for validating XML files in lazy (streaming) mode.
+        """
+        assert validate_via_xsd(self.valid_xml_file, self.xsd_file, lazy=True)
+        assert validate_via_xsd(self.valid_xml_file, self.xsd_file, lazy=1)
+        assert not validate_via_xsd(
+            self.invalid_xml_file, self.xsd_file, lazy=True
+        )
+        assert not validate_via_xsd("missing.xml", self.xsd_file, lazy=True)
+
+    def test_lazy_validation_of_pain001_file(self):
+        """
+        Test case for lazy validation of a bundled pain.001 message.
+        """
+        directory = "pain001/templates/pain.001.001.03/"
+        assert validate_via_xsd(
+            directory + "pain.001.001.03.xml",
+            directory + "pain.001.001.03.xsd",
+            lazy=True,
+        )
+
+    def test_valid_content(self):
+        """
+        Test case for validating in-memory XML content against an XSD schema.
+        """
+        with open(self.valid_xml_file) as f:
+            content = f.read()
+        assert validate_content_via_xsd(content, self.xsd_file)
+        assert validate_content_via_xsd(content.encode(), self.xsd_file)
+        assert validate_content_via_xsd(et.fromstring(content), self.xsd_file)
+
+    def test_invalid_content(self):
+        """
+        Test case for validating invalid in-memory XML content against an XSD
+        schema.
+        """
+        with open(self.invalid_xml_file) as f:
+            content = f.read()
+        assert not validate_content_via_xsd(content, self.xsd_file)
+        assert not validate_content_via_xsd("<root>", self.xsd_file)
@@ -0,0 +1,198 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.create_validation_report import create_validation_report
+from pain001.xml.generate_xml import generate_xml
+from pain001.xml.validate_via_xsd import validate_via_xsd
+from pain001.xml.validation_result_cache import (
+    ValidationResultCache,
+    get_validation_cache_directory,
+)
+
+DIRECTORY = "pain001/templates/pain.001.001.03/"
+XML_FILE = DIRECTORY + "pain.001.001.03.xml"
+XSD_FILE = DIRECTORY + "pain.001.001.03.xsd"
+
+
+class TestValidationResultCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method. Points the singleton cache to a temporary
+        directory.
+        """
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ValidationResultCache(self.cache_dir)
+        self.previous_instance = ValidationResultCache.instance
+        ValidationResultCache.instance = self.cache
+        with open(XML_FILE, "rb") as f:
+            content = f.read()
+        self.invalid_content = content.replace(
+            b"<ChrgBr>", b"<Bogus/><ChrgBr>"
+        )
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        ValidationResultCache.instance = self.previous_instance
+        shutil.rmtree(self.cache_dir)
+
+    def test_cache_directory_is_versioned(self):
+        """
+        Test that the cache directory honours the environment variable.
+        """
+        with patch.dict(
+            os.environ, {"PAIN001_VALIDATION_CACHE_DIR": self.cache_dir}
+        ):
+            cache_directory = get_validation_cache_directory()
+        self.assertEqual(os.path.dirname(cache_directory), self.cache_dir)
+
+    def test_get_and_put(self):
+        """
+        Test that a stored result is returned for the same digests only.
+        """
+        self.assertIsNone(self.cache.get("a" * 64, "b" * 64))
+        path = self.cache.put("a" * 64, "b" * 64, {"errors": []})
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(self.cache.get("a" * 64, "b" * 64), {"errors": []})
+        self.assertIsNone(self.cache.get("a" * 64, "c" * 64))
+        info = self.cache.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (1, 2))
+
+    def test_least_recently_used_results_are_evicted(self):
+        """
+        Test that the results above the cap are evicted, oldest first, and
+        that reading a result marks it as recently used.
+        """
+        cache = ValidationResultCache(self.cache_dir, max_entries=10)
+        digests = [f"{index:02d}" * 32 for index in range(11)]
+        for index, digest in enumerate(digests[:10]):
+            path = cache.put(digest, "b" * 64, {"errors": []})
+            os.utime(path, (index, index))
+        self.assertIsNotNone(cache.get(digests[0], "b" * 64))
+        cache.put(digests[10], "b" * 64, {"errors": []})
+
+        kept = [
+            digest
+            for digest in digests
+            if os.path.isfile(cache.get_result_path(digest, "b" * 64))
+        ]
+        self.assertEqual(kept, [digests[0], *digests[3:]])
+        self.assertEqual(cache.prune(), 0)
+
+    def test_corrupt_result(self):
+        """
+        Test that an unreadable result is ignored.
+        """
+        path = self.cache.get_result_path("a" * 64, "b" * 64)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write("not json")
+        self.assertIsNone(self.cache.get("a" * 64, "b" * 64))
+
+    def test_report_is_reused(self):
+        """
+        Test that validating the same file twice skips the second XSD pass.
+        """
+        report = create_validation_report(XML_FILE, XSD_FILE, use_cache=True)
+        self.assertTrue(report.is_valid)
+        with patch("xmlschema.XMLSchema.iter_errors") as iter_errors:
+            report = create_validation_report(
+                XML_FILE, XSD_FILE, use_cache=True
+            )
+            iter_errors.assert_not_called()
+        self.assertTrue(report.is_valid)
+        self.assertEqual(self.cache.cache_info()["hits"], 1)
+
+    def test_cached_errors_honour_max_errors(self):
+        """
+        Test that a cached report is trimmed to fewer errors, and that a
+        truncated report is not reused for a request for more errors.
+        """
+        report = create_validation_report(
+            self.invalid_content, XSD_FILE, max_errors=2, use_cache=True
+        )
+        self.assertEqual(len(report.errors), 2)
+        self.assertTrue(report.truncated)
+
+        report = create_validation_report(
+            self.invalid_content, XSD_FILE, max_errors=1, use_cache=True
+        )
+        self.assertEqual(len(report.errors), 1)
+        self.assertEqual(report.errors[0].transaction_index, 1)
+        self.assertEqual(self.cache.cache_info()["hits"], 1)
+
+        report = create_validation_report(
+            self.invalid_content, XSD_FILE, max_errors=None, use_cache=True
+        )
+        self.assertFalse(report.truncated)
+        self.assertGreater(len(report.errors), 2)
+
+    def test_cache_is_bypassed_by_default(self):
+        """
+        Test that the cache is only used when requested.
+        """
+        create_validation_report(XML_FILE, XSD_FILE)
+        self.assertEqual(self.cache.cache_info()["misses"], 0)
+
+    def test_generate_xml_leaves_cache_off_by_default(self):
+        """
+        Test that library calls only use the cache when requested.
+        """
+        data = load_csv_data("tests/data/template.csv")
+        temp_dir = os.path.relpath(tempfile.mkdtemp(dir="."))
+        try:
+            xml_file_path = os.path.join(temp_dir, "template.xml")
+            shutil.copy("tests/data/template.xml", xml_file_path)
+            with redirect_stdout(StringIO()):
+                generate_xml(
+                    data,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/template.xsd",
+                )
+                self.assertEqual(os.listdir(self.cache_dir), [])
+                generate_xml(
+                    data,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/template.xsd",
+                    use_validation_cache=True,
+                )
+            self.assertNotEqual(os.listdir(self.cache_dir), [])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_validate_via_xsd_uses_cache(self):
+        """
+        Test that validate_via_xsd reuses cached outcomes.
+        """
+        self.assertTrue(validate_via_xsd(XML_FILE, XSD_FILE, use_cache=True))
+        self.assertTrue(validate_via_xsd(XML_FILE, XSD_FILE, use_cache=True))
+        self.assertEqual(self.cache.cache_info()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from pain001.xml.write_xml_atomically import (
+    open_xml_atomically,
+    write_xml_atomically,
+)
+
+
+def test_write_xml_atomically(tmp_path):
+    xml_file = tmp_path / "out.xml"
+    write_xml_atomically(str(xml_file), "<a>é</a>")
+    assert xml_file.read_bytes() == "<a>é</a>".encode("utf-8")
+
+    write_xml_atomically(str(xml_file), b"<b/>")
+    assert xml_file.read_bytes() == b"<b/>"
+    assert os.listdir(tmp_path) == ["out.xml"]
+
+
+def test_write_xml_atomically_keeps_existing_file_on_failure(tmp_path):
+    xml_file = tmp_path / "out.xml"
+    xml_file.write_bytes(b"<old/>")
+
+    with patch("os.replace", side_effect=OSError("boom")):
+        with pytest.raises(OSError):
+            write_xml_atomically(str(xml_file), b"<new/>")
+
+    assert xml_file.read_bytes() == b"<old/>"
+    assert os.listdir(tmp_path) == ["out.xml"]
+
+
+def test_open_xml_atomically_streams_into_temporary_file(tmp_path):
+    xml_file = tmp_path / "out.xml"
+
+    with open_xml_atomically(str(xml_file), buffer_size=4) as f:
+        f.write(b"<a>")
+        f.write(b"</a>")
+        assert os.path.dirname(f.name) == str(tmp_path)
+        assert not xml_file.exists()
+
+    assert xml_file.read_bytes() == b"<a></a>"
+    assert os.listdir(tmp_path) == ["out.xml"]
+
+
+def test_open_xml_atomically_discards_file_on_exit(tmp_path):
+    xml_file = tmp_path / "out.xml"
+
+    with pytest.raises(SystemExit):
+        with open_xml_atomically(str(xml_file)) as f:
+            f.write(b"<a>")
+            raise SystemExit(1)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_write_xml_atomically_permissions(tmp_path):
+    xml_file = tmp_path / "out.xml"
+    previous_umask = os.umask(0o027)
+    try:
+        write_xml_atomically(str(xml_file), b"<a/>")
+    finally:
+        os.umask(previous_umask)
+    assert xml_file.stat().st_mode & 0o777 == 0o640
+
+    # The permissions of a replaced file are kept
+    os.chmod(xml_file, 0o604)
+    write_xml_atomically(str(xml_file), b"<b/>")
+    assert xml_file.stat().st_mode & 0o777 == 0o604
@@ -0,0 +1,85 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as et
+
+from pain001.xml.write_xml_to_file import write_xml_to_file
+
+
+class TestWriteXmlToFile(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.xml_file_path = os.path.join(tempfile.mkdtemp(), "out.xml")
+        self.root = et.fromstring(
+            "<Document>\n  <A>x &amp; y</A>\n  <B>\n    <C/>\n  </B>\n</Document>"
+        )
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        if os.path.exists(self.xml_file_path):
+            os.remove(self.xml_file_path)
+        os.rmdir(os.path.dirname(self.xml_file_path))
+
+    def read(self):
+        with open(self.xml_file_path, encoding="utf-8") as xml_file:
+            return xml_file.read()
+
+    def test_pretty_printed(self):
+        """
+        Test that the elements are indented with tabs, one per line.
+        """
+        write_xml_to_file(self.xml_file_path, self.root)
+        self.assertEqual(
+            self.read(),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            "<Document>\n\t<A>x &amp; y</A>\n\t<B>\n\t\t<C />\n\t</B>\n"
+            "</Document>\n",
+        )
+
+    def test_compact(self):
+        """
+        Test that compact output has no whitespace between elements.
+        """
+        write_xml_to_file(self.xml_file_path, self.root, compact=True)
+        self.assertEqual(
+            self.read(),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            "<Document><A>x &amp; y</A><B><C /></B></Document>",
+        )
+
+    def test_compact_keeps_whitespace_values(self):
+        """
+        Test that compact output keeps the whitespace-only leaf values.
+        """
+        root = et.fromstring(
+            "<Document>\n  <Nm> </Nm>\n  <B>\n</B>\n</Document>"
+        )
+        write_xml_to_file(self.xml_file_path, root, compact=True)
+        self.assertEqual(
+            self.read(),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            "<Document><Nm> </Nm><B>\n</B></Document>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
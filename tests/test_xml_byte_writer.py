@@ -0,0 +1,127 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import unittest
+
+from jinja2 import Environment
+
+from pain001.constants.constants import valid_xml_types
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.template_registry import TemplateRegistry
+from pain001.xml.xml_byte_writer import XmlByteWriter, escape_xml_value
+
+
+class TestXmlByteWriter(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.registry = TemplateRegistry(bytecode_cache_directory=None)
+
+    def test_bundled_templates_are_byte_identical(self):
+        """
+        Test that every bundled template renders to the same bytes as
+        Jinja2, including values that need escaping.
+        """
+        for message_type in valid_xml_types[:7]:
+            path = f"pain001/templates/{message_type}/template.xml"
+            rows = load_csv_data(
+                f"pain001/templates/{message_type}/template.csv"
+            )
+            rows[0]["creditor_name"] = "A & B <\"Ltd\"> 'UK' 100%"
+            context = {**rows[0], "transactions": rows * 3}
+            with self.subTest(message_type=message_type):
+                self.assertEqual(
+                    self.registry.get_byte_writer(path).render(context),
+                    self.registry.get_template(path)
+                    .render(**context)
+                    .encode("utf-8"),
+                )
+
+    def test_loop_index_and_conditions(self):
+        """
+        Test loop indexes, conditions and missing values.
+        """
+        source = (
+            "<a>{{ name }}{% for tx in items %}<b i='{{loop.index}}'>"
+            "{% if tx.note %}{{tx.note}}{% endif %}{{ tx.missing }}</b>"
+            "{% endfor %}</a>\n"
+        )
+        context = {
+            "name": None,
+            "items": [{"note": "x"}, {"note": ""}, {"note": 5}],
+        }
+        self.assertEqual(
+            XmlByteWriter(source).render(context),
+            Environment(autoescape=True)
+            .from_string(source)
+            .render(**context)
+            .encode("utf-8"),
+        )
+
+    def test_write(self):
+        """
+        Test that write streams the same bytes as render.
+        """
+        writer = XmlByteWriter("{% for tx in t %}<a>{{tx.v}}</a>{% endfor %}")
+        context = {"t": [{"v": str(i)} for i in range(1000)]}
+        xml_file = io.BytesIO()
+        writer.write(xml_file, context)
+        self.assertEqual(xml_file.getvalue(), writer.render(context))
+
+    def test_iter_item_sizes(self):
+        """
+        Test that the item sizes add up to the size of the document.
+        """
+        writer = XmlByteWriter(
+            "<a>{% for tx in t %}<b>{{tx.v}}{{loop.index}}</b>{% endfor %}</a>"
+        )
+        context = {"t": [{"v": "é&"}, {"v": ""}]}
+        sizes = list(writer.iter_item_sizes(context))
+        self.assertEqual(sizes, [15, 8])
+        self.assertEqual(
+            len(writer.render(context)),
+            len(writer.render({"t": []})) + sum(sizes),
+        )
+        with self.assertRaises(ValueError):
+            XmlByteWriter("<a>{{v}}</a>").iter_item_sizes({})
+
+    def test_unsupported_constructs(self):
+        """
+        Test that templates using other Jinja2 constructs are rejected.
+        """
+        for source in (
+            "{{ name | upper }}",
+            "{% set x = 1 %}",
+            "{% for tx in t %}",
+            "{{ other.name }}",
+        ):
+            with self.subTest(source=source):
+                with self.assertRaises(ValueError):
+                    XmlByteWriter(source)
+
+    def test_escape_xml_value(self):
+        """
+        Test that values are escaped like the Jinja2 autoescape mode.
+        """
+        self.assertEqual(escape_xml_value("plain"), "plain")
+        self.assertEqual(escape_xml_value("<&>\"'"), "&lt;&amp;&gt;&#34;&#39;")
+        self.assertEqual(escape_xml_value(12.5), "12.5")
+
+
+if __name__ == "__main__":
+    unittest.main()
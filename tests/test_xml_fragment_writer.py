@@ -0,0 +1,166 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import unittest
+
+from jinja2 import Environment
+
+from pain001.constants.constants import valid_xml_types
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.xml.template_registry import TemplateRegistry
+from pain001.xml.xml_fragment_writer import (
+    XmlFragmentWriter,
+    split_transaction_loop,
+)
+
+
+class TestXmlFragmentWriter(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.registry = TemplateRegistry(bytecode_cache_directory=None)
+        self.environment = Environment(autoescape=True)
+
+    def assert_renders_like_jinja(self, source, context):
+        self.assertEqual(
+            XmlFragmentWriter(source, self.environment).render(context),
+            self.environment.from_string(source)
+            .render(**context)
+            .encode("utf-8"),
+        )
+
+    def test_bundled_templates_are_byte_identical(self):
+        """
+        Test that every bundled template renders to the same bytes as
+        Jinja2, in both output modes, including values that need escaping
+        and empty optional values.
+        """
+        for message_type in valid_xml_types[:7]:
+            path = f"pain001/templates/{message_type}/template.xml"
+            rows = load_csv_data(
+                f"pain001/templates/{message_type}/template.csv"
+            )
+            rows[0]["creditor_name"] = "A & B <\"Ltd\"> 'UK' 100%"
+            rows[0]["debtor_name"] = "50% & more"
+            rows.append({**rows[-1], "remittance_information": ""})
+            context = {**rows[0], "transactions": rows * 3}
+            for compact in (False, True):
+                with self.subTest(message_type=message_type, compact=compact):
+                    self.assertEqual(
+                        self.registry.get_fragment_writer(
+                            path, compact
+                        ).render(context),
+                        self.registry.get_template(path, compact)
+                        .render(**context)
+                        .encode("utf-8"),
+                    )
+
+    def test_conditions(self):
+        """
+        Test nested conditions on transaction and message values, the loop
+        index and missing values.
+        """
+        source = (
+            "<a>{{ name }}{% for tx in transactions %}<b i='{{loop.index}}'>"
+            "{% if tx.note %}{{tx.note}}{% if flag %}!{{ name }}{% endif %}"
+            "{% endif %}{% if tx.other %}?{% endif %}{{ tx.missing }}</b>"
+            "{% endfor %}</a>\n"
+        )
+        items = [{"note": "x"}, {"note": "", "other": 1}, {"note": 5}]
+        for flag in (False, True):
+            with self.subTest(flag=flag):
+                self.assert_renders_like_jinja(
+                    source,
+                    {"name": "5%", "flag": flag, "transactions": items},
+                )
+
+    def test_jinja_parts(self):
+        """
+        Test that a prologue the byte writer does not support is rendered
+        with Jinja2, and a part without tags is encoded once.
+        """
+        source = (
+            "<a n='{{ name | upper }}'>{% for tx in transactions %}"
+            "<b>{{ tx.v }}</b>{% endfor %}</a>\n"
+        )
+        writer = XmlFragmentWriter(source, self.environment)
+        self.assertEqual(writer.epilogue, b"</a>")
+        self.assert_renders_like_jinja(
+            source, {"name": "é", "transactions": [{"v": "<"}]}
+        )
+
+    def test_template_without_loop(self):
+        """
+        Test that a template without a transaction loop is a prologue.
+        """
+        source = "<a>{{ name }}</a>\n"
+        writer = XmlFragmentWriter(source, self.environment)
+        self.assertEqual(writer.variants, {})
+        self.assert_renders_like_jinja(source, {"name": "x"})
+
+    def test_write(self):
+        """
+        Test that write streams the same bytes as render.
+        """
+        writer = XmlFragmentWriter(
+            "<a>{% for tx in transactions %}<b>{{tx.v}}</b>{% endfor %}</a>",
+            self.environment,
+        )
+        context = {"transactions": [{"v": str(i)} for i in range(1000)]}
+        xml_file = io.BytesIO()
+        writer.write(xml_file, context)
+        self.assertEqual(xml_file.getvalue(), writer.render(context))
+
+    def test_split_transaction_loop(self):
+        """
+        Test that a template is split around its outer transaction loop.
+        """
+        self.assertEqual(
+            split_transaction_loop(
+                "<a>{% for tx in transactions %}{% for x in y %}"
+                "{% endfor %}{% endfor %}</a>"
+            ),
+            (
+                "<a>",
+                "{% for tx in transactions %}{% for x in y %}{% endfor %}"
+                "{% endfor %}",
+                "</a>",
+            ),
+        )
+        with self.assertRaises(ValueError):
+            split_transaction_loop("<a>{% for x in y %}{% endfor %}</a>")
+
+    def test_unsupported_loops(self):
+        """
+        Test that loops the writer cannot compile are rejected.
+        """
+        for source in (
+            "{% for tx in transactions %}{{ tx.v | upper }}{% endfor %}",
+            "{% for tx in transactions %}{% for x in tx.y %}{% endfor %}"
+            "{% endfor %}",
+            "{% for tx in transactions %}"
+            + "{% if tx.v %}{% endif %}" * 7
+            + "{% endfor %}",
+        ):
+            with self.subTest(source=source):
+                with self.assertRaises(ValueError):
+                    XmlFragmentWriter(source, self.environment)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,8 +14,13 @@
 # limitations under the License.
 
 
+import os
+import shutil
+import tempfile
 import unittest
 
+from pain001.csv.load_csv_data import load_csv_data
+from pain001.csv.validate_csv_data import iter_validated_csv_data
 from pain001.xml.generate_xml import generate_xml
 
 
@@ -51,6 +56,207 @@ class TestXmlGenerator(unittest.TestCase):
         # Assert
         # self.assertEqual(sys.exitcode, 1)
 
+    def test_xml_generator_validates_before_writing(self):
+        """
+        Test that the XML file is only written once the rendered content has
+        passed XSD validation.
+        """
+
+        # Arrange
+        data = load_csv_data("tests/data/template.csv")
+        with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+            temp_dir = os.path.relpath(temp_dir)
+            xml_file_path = os.path.join(temp_dir, "template.xml")
+            shutil.copy("tests/data/template.xml", xml_file_path)
+            output_path = os.path.join(temp_dir, "pain.001.001.03.xml")
+
+            # Act & Assert
+            with self.assertRaises(SystemExit):
+                generate_xml(
+                    data,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/invalid.xsd",
+                )
+            self.assertFalse(os.path.exists(output_path))
+
+            generate_xml(
+                data,
+                "pain.001.001.03",
+                xml_file_path,
+                "tests/data/template.xsd",
+            )
+            self.assertTrue(os.path.exists(output_path))
+            self.assertEqual(
+                [
+                    name
+                    for name in os.listdir(temp_dir)
+                    if name.endswith(".tmp")
+                ],
+                [],
+            )
+
+    def test_xml_generator_streaming_matches_rendering(self):
+        """
+        Test that streaming mode writes the same document as rendering it in
+        memory, and writes nothing when validation fails.
+        """
+
+        # Arrange
+        data = load_csv_data("tests/data/template.csv")
+        with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+            temp_dir = os.path.relpath(temp_dir)
+            xml_file_path = os.path.join(temp_dir, "template.xml")
+            shutil.copy("tests/data/template.xml", xml_file_path)
+            output_path = os.path.join(temp_dir, "pain.001.001.03.xml")
+
+            # Act & Assert
+            with self.assertRaises(SystemExit):
+                generate_xml(
+                    data,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/invalid.xsd",
+                    streaming=True,
+                )
+            self.assertEqual(os.listdir(temp_dir), ["template.xml"])
+
+            generate_xml(
+                data,
+                "pain.001.001.03",
+                xml_file_path,
+                "tests/data/template.xsd",
+            )
+            with open(output_path, "rb") as f:
+                rendered = f.read()
+            generate_xml(
+                data,
+                "pain.001.001.03",
+                xml_file_path,
+                "tests/data/template.xsd",
+                streaming=True,
+            )
+            with open(output_path, "rb") as f:
+                self.assertEqual(f.read(), rendered)
+
+    def test_xml_generator_direct_engine_matches_jinja(self):
+        """
+        Test that the direct engine writes the same document as Jinja2.
+        """
+
+        # Arrange
+        data = load_csv_data("tests/data/template.csv")
+        with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+            temp_dir = os.path.relpath(temp_dir)
+            xml_file_path = os.path.join(temp_dir, "template.xml")
+            shutil.copy("tests/data/template.xml", xml_file_path)
+            output_path = os.path.join(temp_dir, "pain.001.001.03.xml")
+
+            # Act & Assert
+            generate_xml(
+                data,
+                "pain.001.001.03",
+                xml_file_path,
+                "tests/data/template.xsd",
+            )
+            with open(output_path, "rb") as f:
+                rendered = f.read()
+            for streaming in (False, True):
+                generate_xml(
+                    data,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/template.xsd",
+                    streaming=streaming,
+                    engine="direct",
+                )
+                with open(output_path, "rb") as f:
+                    self.assertEqual(f.read(), rendered)
+
+            with self.assertRaises(SystemExit):
+                generate_xml(
+                    data,
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/template.xsd",
+                    engine="unknown",
+                )
+
+    def test_xml_generator_streams_rows(self):
+        """
+        Test that a stream of rows writes the same document as a list, that
+        an empty stream is rejected and that every row of a stream is
+        validated, including with a template that only reads the first row.
+        """
+
+        # Arrange
+        data = load_csv_data("tests/data/template.csv")
+        with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+            temp_dir = os.path.relpath(temp_dir)
+            xml_file_path = os.path.join(temp_dir, "template.xml")
+            shutil.copy("tests/data/template.xml", xml_file_path)
+            output_path = os.path.join(temp_dir, "pain.001.001.03.xml")
+
+            # Act & Assert
+            generate_xml(
+                data,
+                "pain.001.001.03",
+                xml_file_path,
+                "tests/data/template.xsd",
+            )
+            with open(output_path, "rb") as f:
+                rendered = f.read()
+            for streaming in (False, True):
+                generate_xml(
+                    iter_validated_csv_data(iter(data)),
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/template.xsd",
+                    streaming=streaming,
+                )
+                with open(output_path, "rb") as f:
+                    self.assertEqual(f.read(), rendered)
+
+            with self.assertRaises(SystemExit):
+                generate_xml(
+                    iter([]),
+                    "pain.001.001.03",
+                    xml_file_path,
+                    "tests/data/template.xsd",
+                )
+
+        directory = "pain001/templates/pain.001.001.05"
+        data = load_csv_data(f"{directory}/template.csv")
+        with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+            temp_dir = os.path.relpath(temp_dir)
+            xml_file_path = os.path.join(temp_dir, "template.xml")
+            shutil.copy(f"{directory}/template.xml", xml_file_path)
+            with self.assertRaises(ValueError):
+                generate_xml(
+                    iter_validated_csv_data(
+                        iter([*data, {**data[0], "payment_amount": "x"}])
+                    ),
+                    "pain.001.001.05",
+                    xml_file_path,
+                    f"{directory}/pain.001.001.05.xsd",
+                )
+            self.assertEqual(os.listdir(temp_dir), ["template.xml"])
+
+    def test_xml_generator_single_pass_cannot_be_split(self):
+        """
+        Test that single pass files and splitting into files are exclusive.
+        """
+        data = load_csv_data("tests/data/template.csv")
+        with self.assertRaises(SystemExit):
+            generate_xml(
+                iter(data),
+                "pain.001.001.03",
+                "tests/data/template.xml",
+                "tests/data/template.xsd",
+                single_pass=True,
+                max_transactions=1,
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,160 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pain001.xml.compute_file_digest import compute_file_digest
+from pain001.xml.xsd_schema_artifacts import (
+    build_schema_artifacts,
+    get_artifact_path,
+    get_bundled_xsd_file_paths,
+    get_schema_cache_directory,
+    load_schema_artifact,
+    save_schema_artifact,
+)
+from pain001.xml.xsd_schema_registry import XsdSchemaRegistry
+
+BUNDLED_XSD = "pain001/templates/pain.001.001.03/pain.001.001.03.xsd"
+
+
+class TestXsdSchemaArtifacts(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.cache_dir = tempfile.mkdtemp()
+        self.digest = compute_file_digest(BUNDLED_XSD)
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.cache_dir)
+
+    def test_cache_directory_is_versioned(self):
+        """
+        Test that the cache directory honours the environment variable and
+        embeds the library versions.
+        """
+        with patch.dict(
+            os.environ, {"PAIN001_SCHEMA_CACHE_DIR": self.cache_dir}
+        ):
+            cache_directory = get_schema_cache_directory()
+        self.assertEqual(os.path.dirname(cache_directory), self.cache_dir)
+        self.assertIn("xmlschema-", os.path.basename(cache_directory))
+
+    def test_missing_artifact(self):
+        """
+        Test that a missing artifact loads as None.
+        """
+        self.assertIsNone(
+            load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+        )
+
+    def test_corrupt_artifact(self):
+        """
+        Test that an unreadable artifact is ignored.
+        """
+        path = get_artifact_path(BUNDLED_XSD, self.digest, self.cache_dir)
+        with open(path, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(
+            load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+        )
+
+    def test_build_and_load(self):
+        """
+        Test that every bundled schema is built and can be loaded back.
+        """
+        paths = build_schema_artifacts(self.cache_dir)
+        self.assertEqual(len(paths), len(get_bundled_xsd_file_paths()))
+        for path in paths:
+            self.assertTrue(os.path.isfile(path))
+
+        schema = load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+        with open(
+            "pain001/templates/pain.001.001.03/pain.001.001.03.xml"
+        ) as f:
+            self.assertTrue(schema.is_valid(f.read()))
+
+    def test_artifacts_writable_by_others_are_ignored(self):
+        """
+        Test that an artifact is only unpickled if it and its directory
+        belong to the current user and are not writable by others.
+        """
+        registry = XsdSchemaRegistry(artifact_directory=None)
+        schema = registry.get_schema(BUNDLED_XSD)
+        path = save_schema_artifact(
+            BUNDLED_XSD, self.digest, schema, self.cache_dir
+        )
+        self.assertIsNotNone(
+            load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+        )
+
+        os.chmod(path, 0o666)
+        self.assertIsNone(
+            load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+        )
+        os.chmod(path, 0o600)
+        os.chmod(self.cache_dir, 0o777)
+        self.assertIsNone(
+            load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+        )
+        os.chmod(self.cache_dir, 0o700)
+        with patch("os.getuid", return_value=os.getuid() + 1):
+            self.assertIsNone(
+                load_schema_artifact(BUNDLED_XSD, self.digest, self.cache_dir)
+            )
+
+    def test_stale_artifacts_are_removed(self):
+        """
+        Test that saving a new artifact removes the ones built from an older
+        version of the same XSD.
+        """
+        stale_path = get_artifact_path(BUNDLED_XSD, "0" * 64, self.cache_dir)
+        with open(stale_path, "wb") as f:
+            f.write(b"stale")
+        registry = XsdSchemaRegistry(artifact_directory=None)
+        schema = registry.get_schema(BUNDLED_XSD)
+        save_schema_artifact(BUNDLED_XSD, self.digest, schema, self.cache_dir)
+        self.assertFalse(os.path.exists(stale_path))
+
+    def test_registry_uses_artifacts(self):
+        """
+        Test that a fresh registry loads bundled schemas from the artifacts.
+        """
+        first = XsdSchemaRegistry(artifact_directory=self.cache_dir)
+        first.get_schema(BUNDLED_XSD)
+        self.assertEqual(first.cache_info()["artifact_hits"], 0)
+        self.assertTrue(
+            os.path.isfile(
+                get_artifact_path(BUNDLED_XSD, self.digest, self.cache_dir)
+            )
+        )
+
+        second = XsdSchemaRegistry(artifact_directory=self.cache_dir)
+        with patch("xmlschema.XMLSchema") as compile_schema:
+            second.get_schema(BUNDLED_XSD)
+            compile_schema.assert_not_called()
+        self.assertEqual(second.cache_info()["artifact_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+# Copyright (C) 2023-2024 Sebastien Rousseau.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pain001.xml.xsd_schema_registry import XsdSchemaRegistry
+
+XSD_CONTENT = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:element name="{name}" type="xs:string"/>
+</xs:schema>
+"""
+
+BUNDLED_XSD = "pain001/templates/pain.001.001.03/pain.001.001.03.xsd"
+
+
+class TestXsdSchemaRegistry(unittest.TestCase):
+    def setUp(self):
+        """
+        Test case setup method.
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.registry = XsdSchemaRegistry(
+            max_custom_schemas=2, artifact_directory=None
+        )
+
+    def tearDown(self):
+        """
+        Test case tear down method.
+        """
+        shutil.rmtree(self.temp_dir)
+
+    def write_xsd(self, file_name, name="root"):
+        path = os.path.join(self.temp_dir, file_name)
+        with open(path, "w") as f:
+            f.write(XSD_CONTENT.format(name=name))
+        return path
+
+    def test_schema_is_compiled_once(self):
+        """
+        Test that repeated lookups reuse the compiled schema.
+        """
+        xsd_file = self.write_xsd("a.xsd")
+        first = self.registry.get_schema(xsd_file)
+        second = self.registry.get_schema(xsd_file)
+        self.assertIs(first, second)
+        info = self.registry.cache_info()
+        self.assertEqual(info["misses"], 1)
+        self.assertEqual(info["hits"], 1)
+
+    def test_touched_schema_with_same_content_is_reused(self):
+        """
+        Test that a new mtime with unchanged content does not recompile.
+        """
+        xsd_file = self.write_xsd("a.xsd")
+        first = self.registry.get_schema(xsd_file)
+        stat = os.stat(xsd_file)
+        os.utime(xsd_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIs(self.registry.get_schema(xsd_file), first)
+        self.assertEqual(self.registry.cache_info()["misses"], 1)
+
+    def test_changed_schema_is_recompiled(self):
+        """
+        Test that a schema whose content changed is recompiled.
+        """
+        xsd_file = self.write_xsd("a.xsd")
+        first = self.registry.get_schema(xsd_file)
+        digest = self.registry.get_digest(xsd_file)
+        self.write_xsd("a.xsd", name="other")
+        stat = os.stat(xsd_file)
+        os.utime(xsd_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = self.registry.get_schema(xsd_file)
+        self.assertIsNot(first, second)
+        self.assertNotEqual(self.registry.get_digest(xsd_file), digest)
+        self.assertTrue(second.is_valid("<other>text</other>"))
+
+    def test_custom_schemas_are_bounded(self):
+        """
+        Test that the least recently used custom schema is evicted.
+        """
+        a_file = self.write_xsd("a.xsd")
+        b_file = self.write_xsd("b.xsd")
+        c_file = self.write_xsd("c.xsd")
+        self.registry.get_schema(a_file)
+        self.registry.get_schema(b_file)
+        self.registry.get_schema(a_file)
+        self.registry.get_schema(c_file)
+        self.assertEqual(self.registry.cache_info()["custom"], 2)
+        self.registry.get_schema(a_file)
+        self.assertEqual(self.registry.cache_info()["misses"], 3)
+        self.registry.get_schema(b_file)
+        self.assertEqual(self.registry.cache_info()["misses"], 4)
+
+    def test_bundled_schemas_are_not_evicted(self):
+        """
+        Test that the bundled schemas are kept outside the LRU.
+        """
+        self.assertTrue(XsdSchemaRegistry.is_bundled(BUNDLED_XSD))
+        self.assertFalse(XsdSchemaRegistry.is_bundled(self.write_xsd("a.xsd")))
+        self.registry.get_schema(BUNDLED_XSD)
+        for file_name in ("a.xsd", "b.xsd", "c.xsd"):
+            self.registry.get_schema(self.write_xsd(file_name))
+        info = self.registry.cache_info()
+        self.assertEqual(info["bundled"], 1)
+        self.assertEqual(info["custom"], 2)
+
+    def test_clear(self):
+        """
+        Test that clear drops the schemas and resets the counters.
+        """
+        self.registry.get_schema(self.write_xsd("a.xsd"))
+        self.registry.clear()
+        info = self.registry.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (0, 0))
+        self.assertEqual((info["bundled"], info["custom"]), (0, 0))
+
+    def test_missing_schema(self):
+        """
+        Test that a missing schema raises FileNotFoundError.
+        """
+        with self.assertRaises(FileNotFoundError):
+            self.registry.get_schema(os.path.join(self.temp_dir, "none.xsd"))
+
+    def test_invalid_max_custom_schemas(self):
+        """
+        Test that the LRU must hold at least one schema.
+        """
+        with self.assertRaises(ValueError):
+            XsdSchemaRegistry(max_custom_schemas=0)
+
+    def test_get_instance(self):
+        """
+        Test that get_instance returns a singleton.
+        """
+        self.assertIs(
+            XsdSchemaRegistry.get_instance(), XsdSchemaRegistry.get_instance()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()